@@ -0,0 +1,181 @@
+"""
+Alert engine cost per tick for a ward of N patients: vectorized vs per-patient loop.
+
+Each tick delivers one reading per patient (normal vitals with noise, and
+a share of patients drifting into trouble: rising heart rate, falling
+SpO2, fever, blood-pressure spikes). Times AlertEngine.ingest(),
+evaluate() and status_changes() per tick after the windows have filled,
+then runs the same rules as plain Python over a deque per patient (the
+obvious implementation) for a few ticks, and checks both agree on every
+patient's status.
+Run from the project root:
+    python -m benchmarks.bench_alerts [--patients 10000] [--ticks 200] [--window 60]
+"""
+import argparse
+import math
+import statistics
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from vitals.alerts import (AlertEngine, DEFAULT_RULES, SEVERITIES, STABLE,
+                           ThresholdRule, TrendRule, ZScoreRule)
+
+BASELINE = np.array([80.0, 125.0, 97.0, 98.4])
+NOISE = np.array([4.0, 6.0, 1.0, 0.3])
+
+
+class Ward:
+    """Synthetic vitals: noise around a baseline plus per-patient drift."""
+
+    def __init__(self, patients, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.drift = np.zeros((patients, 4))
+        troubled = self.rng.random(patients) < 0.05
+        kind = self.rng.integers(0, 4, patients)
+        per_tick = np.array([0.5, 1.0, -0.08, 0.02])   # hr up, bp up, spo2 down, fever
+        self.drift[troubled, kind[troubled]] = per_tick[kind[troubled]]
+        self.spikes = self.rng.random(patients) < 0.002
+        self.t = 0
+
+    def tick(self):
+        n = len(self.drift)
+        values = BASELINE + self.rng.normal(0, 1, (n, 4)) * NOISE + self.drift * self.t
+        if self.t % 50 == 49:
+            values[self.spikes, 1] += 60
+        self.t += 1
+        return values
+
+
+class LoopEngine:
+    """The same rules, one patient and one rule at a time."""
+
+    def __init__(self, patients, rules, window, rate_hz=1.0):
+        self.rules = rules
+        self.rate_hz = rate_hz
+        self.windows = [[deque(maxlen=window) for _ in range(4)] for _ in range(patients)]
+        self.window = window
+
+    def ingest(self, values):
+        for windows, row in zip(self.windows, values.tolist()):
+            for window, value in zip(windows, row):
+                window.append(value)
+
+    def rule_fires(self, rule, samples):
+        if len(samples) < (rule.min_samples or self.window):
+            return False
+        latest = samples[-1]
+        if isinstance(rule, ThresholdRule):
+            return latest < rule.low or latest > rule.high
+        if isinstance(rule, ZScoreRule):
+            rest = list(samples)[:-1]
+            mean = statistics.fmean(rest)
+            std = statistics.pstdev(rest, mean)
+            if std < 1e-9:
+                return abs(latest - mean) > 1e-9
+            return abs(latest - mean) / std > rule.z
+        if isinstance(rule, TrendRule):
+            k = len(samples)
+            xm = (k - 1) / 2
+            ym = statistics.fmean(samples)
+            slope = (sum((x - xm) * (y - ym) for x, y in enumerate(samples)) /
+                     sum((x - xm) ** 2 for x in range(k))) * 60 * self.rate_hz
+            return slope > rule.per_minute if rule.per_minute > 0 else slope < rule.per_minute
+        raise TypeError(rule)
+
+    def statuses(self):
+        metric = {"hr": 0, "bp": 1, "spo2": 2, "temp": 3}
+        out = []
+        for windows in self.windows:
+            status = STABLE
+            for rule in self.rules:
+                if self.rule_fires(rule, windows[metric[rule.metric]]):
+                    if status == STABLE or SEVERITIES.index(rule.severity) < SEVERITIES.index(status):
+                        status = rule.severity
+            out.append(status)
+        return out
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--loop-ticks", type=int, default=3)
+    args = parser.parse_args()
+
+    n = args.patients
+    ward = Ward(n)
+    engine = AlertEngine(range(n), window=args.window)
+    slots = np.arange(n)
+    history = deque(maxlen=args.window)
+
+    # Fill the windows first: evaluation cost is steady once they are full
+    for _ in range(args.window):
+        values = ward.tick()
+        history.append(values)
+        engine.ingest(slots, values)
+        engine.evaluate()
+        engine.status_changes()
+
+    timings = {"ingest": [], "evaluate": [], "status_changes": [], "tick": []}
+    alerts = changes = 0
+    for _ in range(args.ticks):
+        values = ward.tick()
+        history.append(values)
+        t0 = time.perf_counter()
+        engine.ingest(slots, values)
+        t1 = time.perf_counter()
+        alerts += len(engine.evaluate())
+        t2 = time.perf_counter()
+        changes += len(engine.status_changes())
+        t3 = time.perf_counter()
+        for name, seconds in (("ingest", t1 - t0), ("evaluate", t2 - t1),
+                              ("status_changes", t3 - t2), ("tick", t3 - t0)):
+            timings[name].append(seconds * 1000)
+
+    print(f"{n} patients, {len(engine.rules)} rules, window {args.window}, {args.ticks} ticks")
+    print(f"{'vectorized':<16} {'median ms':>10} {'p99 ms':>8}")
+    for name, samples in timings.items():
+        ordered = sorted(samples)
+        print(f"{name:<16} {statistics.median(ordered):>10.2f} {percentile(ordered, 99):>8.2f}")
+    counts = {name: int((engine.status_codes == i).sum()) for i, name in enumerate((STABLE,) + SEVERITIES)}
+    print(f"{alerts} alerts, {changes} status changes; now {counts}")
+
+    # Same rules, per patient, over the same last `window` readings
+    loop = LoopEngine(n, DEFAULT_RULES, args.window)
+    for values in history:
+        loop.ingest(values)
+    loop_ms = []
+    for _ in range(args.loop_ticks):
+        values = ward.tick()
+        engine.ingest(slots, values)
+        engine.evaluate()
+        start = time.perf_counter()
+        loop.ingest(values)
+        expected = loop.statuses()
+        loop_ms.append((time.perf_counter() - start) * 1000)
+    names = (STABLE,) + SEVERITIES
+    got = [names[code] for code in engine.status_codes.tolist()]
+    mismatches = sum(1 for a, b in zip(got, expected) if a != b)
+    loop_median = statistics.median(loop_ms)
+    vector_median = statistics.median(timings["tick"])
+    print(f"{'per-patient loop':<16} {loop_median:>10.2f} ms/tick "
+          f"({loop_median / vector_median:.0f}x the vectorized tick)")
+    print(f"status mismatches vs loop: {mismatches}")
+
+    # Boundary cases can round either way in the running sums; anything
+    # more than a handful means the engine is wrong
+    if mismatches > max(1, n // 10000) or not math.isfinite(vector_median):
+        print("FAIL")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
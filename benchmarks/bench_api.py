@@ -0,0 +1,215 @@
+"""
+API server load generator: requests per second and tail latency per endpoint.
+
+Starts services.api_server in a subprocess on scratch databases, seeds
+users and vitals, then drives a mixed workload (login, vitals history,
+OTP request + verify, signup, OTP-verified password reset) from many concurrent
+connections. Runs three configurations so the effect of write batching
+and connection reuse is visible: keep-alive with batched writes,
+keep-alive with one write per transaction, and a new connection per request.
+Run from the project root:
+    python -m benchmarks.bench_api [--seconds 5] [--connections 64] [--users 2000] [--log-n 10]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = (
+    ("keep-alive, batched writes", True, 256),
+    ("keep-alive, 1 write/commit", True, 1),
+    ("connection per request", False, 256),
+)
+#! Share of requests per endpoint
+MIX = (("login", 40), ("history", 30), ("otp", 10), ("signup", 10), ("reset", 10))
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Connection:
+    """Just enough of an HTTP/1.1 client to keep the generator cheap."""
+
+    def __init__(self, host, port, keep_alive):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if not self.keep_alive:
+            head += "Connection: close\r\n"
+        self.writer.write((head + "\r\n").encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        close = not self.keep_alive
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "connection" and value.strip().lower() == "close":
+                close = True
+        data = await self.reader.readexactly(length)
+        if close:
+            self.writer.close()
+            self.writer = None
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def start_server(tmp, max_batch, log_n):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.Popen([sys.executable, "-m", "services.api_server", "--port", "0",
+                             "--db", os.path.join(tmp, "users.db"),
+                             "--vitals-db", os.path.join(tmp, "vitals.db"),
+                             "--max-batch", str(max_batch), "--log-n", str(log_n), "--otp-rate", "1e6",
+                             "--expose-codes"],
+                            cwd=tmp, env=env, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("listening on"):
+        proc.kill()
+        raise RuntimeError("server did not start")
+    host, port = line.rsplit("/", 1)[1].strip().rsplit(":", 1)
+    return proc, host, int(port)
+
+
+async def seed(host, port, users, patients):
+    conns = [Connection(host, port, True) for _ in range(32)]
+
+    async def worker(conn, ids):
+        for i in ids:
+            await conn.request("POST", "/auth/signup", {
+                "name": f"User {i}", "email": f"u{i}@example.com", "aadhaar": f"{i:012d}",
+                "phone": f"9{i:09d}", "password": "secret", "role": "Patient"})
+
+    await asyncio.gather(*(worker(conn, range(k, users, len(conns))) for k, conn in enumerate(conns)))
+    now = time.time()
+    readings = [[p, now - 300 + s, 70 + s % 20, 120, 98, 36.6] for p in range(patients) for s in range(300)]
+    for start in range(0, len(readings), 5000):
+        await conns[0].request("POST", "/vitals", {"readings": readings[start:start + 5000]})
+    for conn in conns:
+        conn.close()
+    await asyncio.sleep(1.5)   # let the vitals writer commit
+
+
+async def drive(host, port, keep_alive, connections, seconds, users, patients):
+    rng = random.Random(1)
+    ops = [name for name, weight in MIX for _ in range(weight)]
+    new_ids = itertools.count(10 ** 11)
+    latencies = {name: [] for name, _ in MIX}
+    errors = {name: 0 for name, _ in MIX}
+    deadline = time.perf_counter() + seconds
+
+    async def one(conn, op):
+        user = f"{rng.randrange(users):012d}"
+        if op == "login":
+            status, _ = await conn.request("POST", "/auth/login",
+                                           {"aadhaar": user, "password": "secret", "role": "Patient"})
+        elif op == "history":
+            now = time.time()
+            status, _ = await conn.request("GET", f"/vitals/history?patient={rng.randrange(patients)}"
+                                                  f"&t0={now - 600}&t1={now}&max_points=300")
+        elif op == "otp":
+            status, data = await conn.request("POST", "/auth/otp", {"aadhaar": user})
+            if status == 200:
+                code = json.loads(data)["code"]
+                status, _ = await conn.request("POST", "/auth/otp/verify", {"aadhaar": user, "code": code})
+        elif op == "signup":
+            i = next(new_ids)
+            status, _ = await conn.request("POST", "/auth/signup", {
+                "name": f"New {i}", "email": f"n{i}@example.com", "aadhaar": f"{i:012d}",
+                "phone": f"8{i % 10 ** 9:09d}", "password": "secret", "role": "Patient"})
+        else:
+            status, data = await conn.request("POST", "/auth/otp", {"aadhaar": user})
+            if status == 200:
+                code = json.loads(data)["code"]
+                status, data = await conn.request("POST", "/auth/otp/verify", {"aadhaar": user, "code": code})
+            if status == 200:
+                token = json.loads(data)["reset_token"]
+                status, _ = await conn.request("POST", "/auth/reset",
+                                               {"aadhaar": user, "password": "secret", "reset_token": token})
+        return status
+
+    async def worker():
+        conn = Connection(host, port, keep_alive)
+        while time.perf_counter() < deadline:
+            op = rng.choice(ops)
+            start = time.perf_counter()
+            try:
+                status = await one(conn, op)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn.writer = None
+                status = 0
+            latencies[op].append(time.perf_counter() - start)
+            if status >= 400 or status == 0:
+                errors[op] += 1
+        conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(label, latencies, errors, elapsed):
+    print(f"\n{label}")
+    print(f"  {'endpoint':<9} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'errors':>7}")
+    everything = []
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        everything.extend(samples)
+        print(f"  {name:<9} {len(ordered):>9} {len(ordered) / elapsed:>8.0f} {percentile(ordered, 50) * 1e3:>8.2f} "
+              f"{percentile(ordered, 99) * 1e3:>8.2f} {percentile(ordered, 99.9) * 1e3:>9.2f} {errors[name]:>7}")
+    ordered = sorted(everything)
+    print(f"  {'total':<9} {len(ordered):>9} {len(ordered) / elapsed:>8.0f} {percentile(ordered, 50) * 1e3:>8.2f} "
+          f"{percentile(ordered, 99) * 1e3:>8.2f} {percentile(ordered, 99.9) * 1e3:>9.2f} {sum(errors.values()):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--log-n", type=int, default=10,
+                        help="scrypt work factor on the server; login/signup/reset cost is mostly this")
+    args = parser.parse_args()
+
+    print(f"{args.connections} connections, {args.seconds:.0f} s per mode, scrypt log2 N = {args.log_n}")
+    for label, keep_alive, max_batch in MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            proc, host, port = start_server(tmp, max_batch, args.log_n)
+            try:
+                asyncio.run(seed(host, port, args.users, args.patients))
+                latencies, errors, elapsed = asyncio.run(
+                    drive(host, port, keep_alive, args.connections, args.seconds, args.users, args.patients))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+        report(label, latencies, errors, elapsed)
+
+
+if __name__ == "__main__":
+    main()
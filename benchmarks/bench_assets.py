@@ -0,0 +1,125 @@
+"""
+Image assets: peak RSS and texture decode/upload time for the full-size
+source PNGs vs the pre-scaled density variants behind the texture cache.
+
+Each mode runs in a fresh process so peak RSS is comparable. "original"
+loads the sources as the app used to (Kivy's image cache, full size) and
+re-enters the splash by adding a new FloatLayout + Image every time;
+"variants" uses services.assets and the reusable SplashScreen. Needs a
+Kivy window and the generated variants (python -m services.assets build).
+Run from the project root:
+    python -m benchmarks.bench_assets [--reenters 200] [--repeat 10]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, reenters, repeat):
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    from kivy.core.window import Window
+    from kivy.cache import Cache
+    from kivy.core.image import Image as CoreImage
+    from kivy.uix.floatlayout import FloatLayout
+    from kivy.uix.image import Image
+    from services.assets import ASSETS, best_source, get_cache, get_texture
+    from screens.splash import LOGO_FILE, SplashScreen
+
+    Window.size = (250, 540)
+    result = {"base_rss_mb": peak_rss_mb()}
+
+    # First load of every asset, as a screen would do it
+    start = time.perf_counter()
+    if mode == "original":
+        textures = [CoreImage(source).texture for source in ASSETS]
+    else:
+        textures = [get_texture(source) for source in ASSETS]
+    result["first_load_ms"] = (time.perf_counter() - start) * 1000
+    result["texture_mb"] = sum(t.width * t.height * 4 for t in textures) / 2 ** 20
+
+    # Splash re-enters
+    if mode == "original":
+        screen = FloatLayout()
+        start = time.perf_counter()
+        for _ in range(reenters):
+            layout = FloatLayout()
+            screen.add_widget(layout)
+            layout.add_widget(Image(source=LOGO_FILE, size_hint=(None, None), size=(250, 250), opacity=0,
+                                    pos_hint={'center_x': 0.5, 'center_y': 0.5}))
+    else:
+        screen = SplashScreen(name="splash")
+        start = time.perf_counter()
+        for _ in range(reenters):
+            screen.on_enter()
+            screen.on_leave()
+    result["reenter_us"] = (time.perf_counter() - start) / max(reenters, 1) * 1e6
+    result["widgets"] = sum(1 for _ in screen.walk())
+    result["peak_rss_mb"] = peak_rss_mb()
+
+    # Uncached decode + upload of one file, averaged
+    per_file = {}
+    for source in ASSETS:
+        path = source if mode == "original" else best_source(source)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            # nocache alone still returns a texture Kivy cached earlier
+            Cache.remove("kv.image")
+            Cache.remove("kv.texture")
+            CoreImage(path, nocache=True).texture
+        per_file[os.path.basename(source)] = (time.perf_counter() - start) / repeat * 1000
+    result["upload_ms"] = per_file
+    if mode != "original":
+        cache = get_cache()
+        result["cache"] = {"hits": cache.hits, "misses": cache.misses, "bytes": cache.used}
+    print(json.dumps(result))
+
+
+def run(mode, reenters, repeat):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_assets", "--child", mode,
+                          "--reenters", str(reenters), "--repeat", str(repeat)],
+                         cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"{mode} run failed:\n{out.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reenters", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--child", choices=("original", "variants"))
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.reenters, args.repeat)
+        return
+
+    results = {mode: run(mode, args.reenters, args.repeat) for mode in ("original", "variants")}
+    print(f"{'mode':<9} {'first load ms':>14} {'texture MB':>11} {'re-enter us':>12} "
+          f"{'widgets':>8} {'peak RSS MB':>12} {'+ over base':>12}")
+    for mode, r in results.items():
+        print(f"{mode:<9} {r['first_load_ms']:>14.1f} {r['texture_mb']:>11.2f} {r['reenter_us']:>12.1f} "
+              f"{r['widgets']:>8} {r['peak_rss_mb']:>12.1f} {r['peak_rss_mb'] - r['base_rss_mb']:>12.1f}")
+    print()
+    print("uncached decode + upload per file (ms)")
+    for name in results["original"]["upload_ms"]:
+        print(f"  {name:<26} original {results['original']['upload_ms'][name]:>7.2f}"
+              f"   variant {results['variants']['upload_ms'][name]:>7.2f}")
+    if "cache" in results["variants"]:
+        print(f"texture cache: {results['variants']['cache']}")
+
+
+if __name__ == "__main__":
+    main()
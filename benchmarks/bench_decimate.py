@@ -0,0 +1,54 @@
+"""
+Render-ready point generation for a 400 px wide graph from 1k, 100k and
+10M samples: min/max bucketing, LTTB, and MultiResolution (build once,
+then full-range and zoomed queries).
+
+Run from the project root:
+    python -m benchmarks.bench_decimate [--width 400] [--sizes 1000 100000 10000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from vitals.decimate import minmax, lttb, MultiResolution
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=400)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 10_000_000])
+    args = parser.parse_args()
+    width = args.width
+
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>10} {'method':<22} {'ms':>9} {'points':>7}")
+    for n in args.sizes:
+        y = 75 + np.cumsum(rng.normal(0, 0.2, n))
+        repeat = 5 if n <= 1_000_000 else 2
+        rows = [
+            ("minmax", lambda: minmax(y, width)),
+            ("lttb", lambda: lttb(y, width)),
+        ]
+        build_ms, pyramid = timed(lambda: MultiResolution(y), repeat)
+        rows += [
+            ("pyramid full range", lambda: pyramid.query(0, n - 1, width)),
+            ("pyramid 10% zoom", lambda: pyramid.query(n * 0.45, n * 0.55, width)),
+        ]
+        for name, fn in rows:
+            ms, (xs, _ys) = timed(fn, repeat)
+            print(f"{n:>10,} {name:<22} {ms:>9.3f} {len(xs):>7}")
+        print(f"{n:>10,} {'pyramid build (once)':<22} {build_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
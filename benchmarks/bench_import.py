@@ -0,0 +1,139 @@
+"""
+Bulk user import throughput by chunk size, and export memory vs fetchall().
+
+Generates N users as CSV and JSONL, with Aadhaars written in the formats
+people type them ("1234-5678 9012", spaces), plus a share of duplicates and
+invalid rows. Each import runs into a fresh scratch database. A row-per-
+transaction import of a small sample is the baseline. Peak traced memory is
+measured on a separate, shorter run (it depends on the chunk, not the file)
+so tracemalloc doesn't slow the timed one. Export is timed and its peak
+memory compared with loading the table with fetchall().
+Run from the project root:
+    python -m benchmarks.bench_import [--users 200000] [--chunks 1000 5000 20000]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from services import bulk
+from services.db import ConnectionPool
+from services.users import UserRepository
+
+BASELINE_ROWS = 5000
+
+
+def make_records(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        digits = f"{100000000000 + i * 7919 % 899999999999:012d}"
+        style = i % 3
+        aadhaar = (digits if style == 0 else
+                   "-".join(digits[k:k + 4] for k in (0, 4, 8)) if style == 1 else
+                   " ".join(digits[k:k + 4] for k in (0, 4, 8)))
+        if i % 500 == 1:
+            aadhaar = aadhaar[:-3]                       # invalid: too short
+        elif i % 200 == 2 and i > 2:
+            aadhaar = f"{100000000000 + (i - 1) * 7919 % 899999999999:012d}"   # duplicate
+        yield {"name": f"User {i}", "email": f"user{i}@example.com", "aadhaar": aadhaar,
+               "phone": f"9{rng.randrange(10 ** 9):09d}", "password": "scrypt$14$8$1$c2FsdA$aGFzaA",
+               "role": ("Patient", "Doctor")[i % 2]}
+
+
+def write_files(tmp, n):
+    csv_path = os.path.join(tmp, "users.csv")
+    jsonl_path = os.path.join(tmp, "users.jsonl")
+    with open(csv_path, "w", newline="", encoding="utf-8") as fc, \
+            open(jsonl_path, "w", encoding="utf-8") as fj:
+        writer = csv.DictWriter(fc, ("name", "email", "aadhaar", "phone", "password", "role"))
+        writer.writeheader()
+        for record in make_records(n):
+            writer.writerow(record)
+            fj.write(json.dumps(record) + "\n")
+    return csv_path, jsonl_path
+
+
+def run_import(tmp, path, chunk_size, limit=None, trace=False):
+    db = os.path.join(tmp, "import.db")
+    users = UserRepository(ConnectionPool(db))
+    users.create_tables()
+    fmt = bulk.detect_format(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        records = bulk.read_records(f, fmt)
+        if limit:
+            records = (r for r, _ in zip(records, range(limit)))
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        stats = bulk.import_users(users, records, chunk_size)
+        elapsed = time.perf_counter() - start
+        if trace:
+            elapsed = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    users.pool.close()
+    os.remove(db)
+    return stats, elapsed
+
+
+def import_row(tmp, label, path, chunk_size, limit=None):
+    stats, elapsed = run_import(tmp, path, chunk_size, limit)
+    #! Peak memory depends on the chunk, not the file, and tracemalloc
+    #! slows everything down, so it is measured on a short separate run
+    sample = 3 * chunk_size + 1
+    _, peak = run_import(tmp, path, chunk_size, min(limit or sample, sample), trace=True)
+    print(f"{label:<24} {stats.read:>8} {elapsed:>8.2f} {stats.read / elapsed:>9,.0f} "
+          f"{peak / 2 ** 20:>9.1f}  {stats}")
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, jsonl_path = write_files(tmp, args.users)
+        print(f"{'import':<24} {'rows':>8} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9}  result")
+        import_row(tmp, "csv, 1 row/transaction", csv_path, 1, limit=BASELINE_ROWS)
+        for label, path in (("csv", csv_path), ("jsonl", jsonl_path)):
+            for chunk in args.chunks:
+                import_row(tmp, f"{label}, chunk {chunk}", path, chunk)
+
+        # Export from one fully imported database
+        db = os.path.join(tmp, "export.db")
+        users = UserRepository(ConnectionPool(db))
+        users.create_tables()
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            bulk.import_users(users, bulk.read_records(f, "csv"))
+        print()
+        print(f"{'export':<24} {'rows':>8} {'seconds':>8} {'peak MiB':>9}")
+
+        def export(fmt):
+            with open(os.path.join(tmp, f"export.{fmt}"), "w", newline="", encoding="utf-8") as f:
+                return bulk.export_users(users, f, fmt)
+
+        for fmt in bulk.FORMATS:
+            count, elapsed, peak = timed(export, fmt)
+            print(f"{'streamed ' + fmt:<24} {count:>8} {elapsed:>8.2f} {peak / 2 ** 20:>9.1f}")
+        rows, elapsed, peak = timed(users.all_users)
+        print(f"{'fetchall (old list)':<24} {len(rows):>8} {elapsed:>8.2f} {peak / 2 ** 20:>9.1f}")
+        users.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Ingestion throughput in readings per second.
+
+  * simulator -> pipeline, drained by a 60 Hz consumer (DROP_OLDEST and COALESCE)
+  * line protocol over a socket pair -> pipeline
+
+Then checks that stopping a pipeline mid-read ends its reader thread
+cleanly and that a sink which raises is logged without stopping
+ingestion. Exits non-zero on failure. Run from the project root:
+    python -m benchmarks.bench_ingest [--seconds 2] [--patients 500]
+"""
+import argparse
+import logging
+import socket
+import sys
+import threading
+import time
+
+from vitals.ingest import (IngestPipeline, SimulatedSource, LineProtocolSource,
+                           DROP_OLDEST, COALESCE, format_line)
+
+
+def consume(pipeline, seconds, frame=1 / 60.0):
+    delivered = frames = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        delivered += len(pipeline.drain())
+        frames += 1
+        time.sleep(frame)
+    pipeline.stop()
+    delivered += len(pipeline.drain())
+    return delivered, frames
+
+
+def report(label, pipeline, delivered, frames, seconds):
+    print(f"{label:<28} received {pipeline.received / seconds:>12,.0f}/s  "
+          f"delivered {delivered:>10,}  dropped {pipeline.dropped:>10,}  "
+          f"in {frames} drains ({delivered / max(frames, 1):,.0f}/drain)")
+
+
+def bench_simulated(policy, patients, seconds):
+    pipeline = IngestPipeline(SimulatedSource(patients, rate_hz=None, seed=1),
+                              max_pending=4096, policy=policy)
+    pipeline.start()
+    delivered, frames = consume(pipeline, seconds)
+    report(f"simulator / {policy}", pipeline, delivered, frames, seconds)
+
+
+def bench_line_protocol(patients, seconds):
+    reader, writer = socket.socketpair()
+    stop = threading.Event()
+    source = SimulatedSource(patients, rate_hz=None, seed=2)
+
+    def produce():
+        try:
+            while not stop.is_set():
+                writer.sendall(b"".join(format_line(r) for r in source.read_batch(512)))
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    pipeline = IngestPipeline(LineProtocolSource(reader), max_pending=65536)
+    pipeline.start()
+    delivered, frames = consume(pipeline, seconds)
+    stop.set()
+    producer.join(timeout=1.0)
+    report("line protocol / drop_oldest", pipeline, delivered, frames, seconds)
+
+
+class Counter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = 0
+
+    def emit(self, record):
+        self.records += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--patients", type=int, default=500)
+    args = parser.parse_args()
+
+    crashed = []
+
+    def excepthook(hook):
+        crashed.append(f"{hook.thread.name}: {hook.exc_type.__name__}: {hook.exc_value}")
+    threading.excepthook = excepthook
+
+    bench_simulated(DROP_OLDEST, args.patients, args.seconds)
+    bench_simulated(COALESCE, args.patients, args.seconds)
+    bench_line_protocol(args.patients, args.seconds)
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    # Stop while the reader is blocked in recv on a quiet socket
+    reader, writer = socket.socketpair()
+    pipeline = IngestPipeline(LineProtocolSource(reader))
+    pipeline.start()
+    time.sleep(0.3)
+    pipeline.stop()
+    writer.close()
+    # The socket closed between the EOF check and the read (stop() racing the reader)
+    reader, writer = socket.socketpair()
+    source = LineProtocolSource(reader)
+    reader.close()
+    try:
+        check(source.read_batch() == [] and source.read_batch() is None, "closed socket did not read as EOF")
+    except OSError as e:
+        check(False, f"closed socket raised {e!r}")
+    writer.close()
+
+    # A failing sink is logged per batch and the readings still arrive
+    log = logging.getLogger("vitals.ingest")
+    counter = Counter()
+    log.addHandler(counter)
+    log.propagate = False
+
+    def broken(batch):
+        raise RuntimeError("sink down")
+
+    pipeline = IngestPipeline(SimulatedSource(10, rate_hz=None, seed=3), batch_size=10, sinks=[broken])
+    pipeline.start()
+    time.sleep(0.2)
+    pipeline.stop()
+    check(pipeline.sink_errors > 1 and pipeline.received >= 10 * pipeline.sink_errors,
+          f"ingestion stopped after a sink failed ({pipeline.sink_errors} errors, {pipeline.received} received)")
+    check(counter.records == pipeline.sink_errors, "sink failures were not logged")
+    check(not crashed, f"reader thread raised: {crashed}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: readers stop cleanly, failing sinks are logged and skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Logins per second: connect-per-call (old LoginSignupScreen) vs pooled repository.
+
+Run from the project root:
+    python -m benchmarks.bench_login [--users 10000] [--logins 5000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from services.db import ConnectionPool
+from services.users import UserRepository
+
+
+def seed(path, n_users):
+    repo = UserRepository(ConnectionPool(path, size=1))
+    repo.create_tables()
+    with repo.pool.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, aadhaar, phone, password, role) VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"user{i}", f"user{i}@example.com", f"{i:012d}", f"9{i:09d}", f"pw{i}", "Patient")
+             for i in range(n_users)),
+        )
+    repo.pool.close()
+
+
+def login_old(path, aadhaar, password, role):
+    #! Same shape as the original validate_login: fresh connection every call
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT password, role FROM users WHERE aadhaar=? AND password=? AND role=?",
+                   (aadhaar, password, role))
+    result = cursor.fetchone()
+    conn.close()
+    return result
+
+
+def run(label, fn, keys):
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(keys) / elapsed:>10,.0f} logins/s  ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--logins", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.users)
+        keys = [random.randrange(args.users) for _ in range(args.logins)]
+
+        run("before (connect/call)", lambda i: login_old(path, f"{i:012d}", f"pw{i}", "Patient"), keys)
+
+        repo = UserRepository(ConnectionPool(path))
+        run("after (pooled)", lambda i: repo.find_login(f"{i:012d}", "Patient"), keys)
+        repo.pool.close()
+
+
+if __name__ == "__main__":
+    main()
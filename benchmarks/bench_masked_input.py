@@ -0,0 +1,152 @@
+"""
+Per-keystroke cost of the masked inputs vs the old AadhaarInput, plus behaviour checks.
+
+Times typing, inserting in the middle, backspace and pastes of 1k / 100k /
+1M characters into the old AadhaarInput (refilter and regroup the whole
+text on every insert, cursor forced to the end) and into
+screens.masked_input.AadhaarInput, counting how many times `text` is
+reassigned per paste. Then checks cursor placement for mid-string edits,
+backspace and delete across separators, phone clamping, and an OTP code
+typed or pasted across the four chained boxes. Exits non-zero on failure.
+Run from the project root:
+    python -m benchmarks.bench_masked_input [--keystrokes 2000]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_CLIPBOARD", "dummy")
+
+import argparse
+import random
+import sys
+import time
+
+from kivy.uix.textinput import TextInput
+
+from screens.masked_input import AadhaarInput, OtpDigitInput, PhoneInput
+
+
+class LegacyAadhaarInput(TextInput):
+    """The AadhaarInput this replaces, verbatim."""
+
+    def insert_text(self, substring, from_undo=False):
+        s = ''.join(filter(str.isdigit, self.text + substring))
+        if len(s) > 12:
+            s = s[:12]
+        groups = [s[i:i+4] for i in range(0, len(s), 4)]
+        s = '-'.join(groups)
+        self.text = s
+        self.cursor = (len(self.text), 0)
+
+
+def us_per(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def measure(cls, keystrokes, blobs):
+    field = cls(multiline=False)
+    assignments = []
+    field.bind(text=lambda *a: assignments.append(1))
+    rows = {}
+
+    def type_number():
+        field.text = ""
+        for digit in "123456789012":
+            field.insert_text(digit)
+    rows["type 12 digits (per key)"] = us_per(type_number, keystrokes // 12) / 12
+
+    def insert_middle():
+        field.text = "1234-5678"
+        field.cursor = (2, 0)
+        field.insert_text("9")
+    rows["insert mid-string"] = us_per(insert_middle, keystrokes)
+
+    def backspace():
+        field.text = "1234-5678-9012"
+        field.cursor = (len(field.text), 0)
+        field.do_backspace()
+    rows["backspace"] = us_per(backspace, keystrokes)
+
+    for label, blob in blobs:
+        def paste():
+            field.text = ""
+            assignments.clear()
+            field.insert_text(blob)
+        rows[f"paste {label}"] = us_per(paste, 5)
+        rows[f"paste {label} text sets"] = len(assignments)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keystrokes", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    blobs = [(label, "".join(rng.choice("0123456789 -x") for _ in range(size)))
+             for label, size in (("1k", 1_000), ("100k", 100_000), ("1M", 1_000_000))]
+    old = measure(LegacyAadhaarInput, args.keystrokes, blobs)
+    new = measure(AadhaarInput, args.keystrokes, blobs)
+    print(f"{'':<28} {'old us':>10} {'new us':>10}")
+    for name in old:
+        fmt = "{:>10.0f}" if name.endswith("sets") else "{:>10.1f}"
+        print(f"{name:<28} {fmt.format(old[name])} {fmt.format(new[name])}")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    field = AadhaarInput(multiline=False)
+    field.insert_text("1234567890")
+    field.cursor = (2, 0)
+    field.insert_text("9")
+    check(field.text == "1293-4567-890" and field.cursor_index() == 3,
+          f"mid insert gave {field.text!r} cursor {field.cursor_index()}")
+    field.cursor = (5, 0)                       # just after the first dash
+    field.do_backspace()
+    check(field.text == "1294-5678-90" and field.cursor_index() == 3,
+          f"backspace over a separator gave {field.text!r} cursor {field.cursor_index()}")
+    field.cursor = (5, 0)
+    field.do_backspace(mode='del')              # Delete moved the cursor past a dash
+    check(field.text == "1294-6789-0", f"delete after a separator gave {field.text!r}")
+    field.cursor = (len(field.text), 0)
+    field.insert_text("1" * 50)
+    check(field.text == "1294-6789-0111", f"overfill gave {field.text!r}")
+    field.select_text(0, 5)
+    field.delete_selection()
+    check(field.text == "6789-0111" and field.cursor_index() == 0, f"selection delete gave {field.text!r}")
+    check(new["paste 1M text sets"] == 1, f"a paste set text {new['paste 1M text sets']} times")
+
+    phone = PhoneInput(multiline=False)
+    phone.insert_text("98765-43210 ext 99")
+    check(phone.text == "98765 43210" and phone.digits == "9876543210", f"phone gave {phone.text!r}")
+
+    boxes = [OtpDigitInput(multiline=False) for _ in range(4)]
+    for a, b in zip(boxes, boxes[1:]):
+        a.focus_next, b.focus_previous = b, a
+    boxes[0].insert_text("4 3 2 1 0")
+    check([b.text for b in boxes] == list("4321"), f"pasted OTP gave {[b.text for b in boxes]}")
+    boxes[3].text = ""
+    boxes[3].do_backspace()
+    check([b.text for b in boxes] == list("43") + ["", ""], f"OTP backspace gave {[b.text for b in boxes]}")
+    for b in boxes:
+        b.text = ""
+    for digit in "9876":
+        target = next((b for b in boxes if not b.text), boxes[-1])
+        target.insert_text(digit)
+    check("".join(b.text for b in boxes) == "9876", "typed OTP did not fill the boxes in order")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: edits at the cursor, one text update per paste, OTP boxes chain")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+OTP service under load: many concurrent password resets, memory over time
+and the rate limits.
+
+Each round issues codes for N distinct Aadhaars from a thread pool, makes
+one wrong and one right guess for half of them, flushes to a scratch
+otps table and then moves a fake clock past the TTL. Live codes, limiter
+buckets, table rows and traced memory must stay bounded round after round.
+A second phase fires N requests at the default limits and checks that no
+more codes are issued than the token buckets allow. Last, the otps table
+is taken away for a moment: the write-behind thread must log the failure,
+keep the changes and write them once the table is back. Exits non-zero
+on any failure. Run from the project root:
+    python -m benchmarks.bench_otp [--resets 10000] [--rounds 5] [--threads 64]
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from services.db import ConnectionPool
+from services.otp import OtpService, RateLimited
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def reset_flow(otps, aadhaar, finish):
+    start = time.perf_counter()
+    code = otps.request_code(aadhaar)
+    issued = time.perf_counter()
+    ok = True
+    if finish:
+        wrong = f"{(int(code) + 1) % 10 ** otps.digits:0{otps.digits}d}"
+        ok = not otps.verify_code(aadhaar, wrong) and otps.verify_code(aadhaar, code)
+    return ok, issued - start, time.perf_counter() - issued
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def table_rows(otps):
+    with otps.pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM otps").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--resets", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=64)
+    args = parser.parse_args()
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock()
+        pool = ConnectionPool(os.path.join(tmp, "otp.db"))
+        #! Limits wide open here: this phase measures throughput and memory
+        otps = OtpService(pool, clock=clock, global_limit=(1e9, 1e9), per_aadhaar=(1.0, 3))
+        tracemalloc.start()
+        baseline = None
+        print(f"{'round':>5} {'resets/s':>9} {'issue p99 us':>13} {'verify p99 us':>14} "
+              f"{'live':>6} {'buckets':>8} {'rows':>6} {'traced KiB':>11}")
+        with ThreadPoolExecutor(args.threads) as workers:
+            for rnd in range(args.rounds):
+                ids = [f"{rnd:02d}{i:010d}" for i in range(args.resets)]
+                start = time.perf_counter()
+                results = list(workers.map(lambda a: reset_flow(otps, a, int(a) % 2 == 0), ids))
+                elapsed = time.perf_counter() - start
+                check(all(ok for ok, _, _ in results), f"round {rnd}: a verify gave the wrong answer")
+                live = otps.live
+                check(live == args.resets - (args.resets + 1) // 2,
+                      f"round {rnd}: {live} live codes, expected the unverified half")
+                otps.flush()
+                rows = table_rows(otps)
+                check(rows == live, f"round {rnd}: {rows} rows in otps, {live} live codes")
+
+                # Let everything from this round expire
+                clock.now += otps.ttl + 1
+                check(otps.purge() == 0, f"round {rnd}: codes survived their TTL")
+                otps.flush()
+                gc.collect()
+                traced = tracemalloc.get_traced_memory()[0]
+                if baseline is None:
+                    baseline = traced
+                print(f"{rnd:>5} {args.resets / elapsed:>9,.0f} "
+                      f"{percentile([r[1] for r in results], 99) * 1e6:>13.1f} "
+                      f"{percentile([r[2] for r in results], 99) * 1e6:>14.1f} "
+                      f"{live:>6} {len(otps._per_aadhaar):>8} {rows:>6} {traced / 1024:>11.1f}")
+        check(table_rows(otps) == 0, "expired rows left in otps")
+        check(len(otps._expiries) <= 1024, f"{len(otps._expiries)} stale expiry entries")
+        check(traced - baseline < 1024 * 1024,
+              f"traced memory grew {(traced - baseline) / 1024:.0f} KiB from round 0")
+        tracemalloc.stop()
+        otps.close()
+
+        # Survives a restart: a code issued before close is still valid after
+        otps = OtpService(pool, clock=clock)
+        code = otps.request_code("999999999999")
+        otps.close()
+        otps = OtpService(pool, clock=clock)
+        check(otps.verify_code("999999999999", code), "code lost across restart")
+
+        # Rate limits at their defaults
+        granted = limited = 0
+        start = clock.now
+        for i in range(args.resets):
+            clock.now = start + i / args.resets   # all N requests within one second
+            try:
+                otps.request_code(f"8{i:011d}")
+                granted += 1
+            except RateLimited:
+                limited += 1
+        rate, burst = otps._global.rate, otps._global.burst
+        allowed = int(burst + rate * 1.0)
+        check(granted <= allowed, f"{granted} codes issued in 1 s, global limit allows {allowed}")
+        clock.now += 60   # let the global bucket refill
+        same = 0
+        for _ in range(10):
+            try:
+                otps.request_code("700000000000")
+                same += 1
+            except RateLimited:
+                pass
+        check(same == otps._per_aadhaar.burst, f"{same} codes for one Aadhaar in a burst")
+        otps.close()
+        pool.close()
+    # A failed write-behind keeps its changes and the thread keeps going
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "otp.db"))
+        errors = Collect()
+        log = logging.getLogger("services.otp")
+        log.addHandler(errors)
+        log.propagate = False
+        otps = OtpService(pool, write_interval=0.05)
+        with pool.transaction() as conn:
+            conn.execute("ALTER TABLE otps RENAME TO otps_away")
+        otps.request_code("600000000000")
+        time.sleep(0.5)
+        check(errors.records, "the failed write was not logged")
+        with pool.transaction() as conn:
+            conn.execute("ALTER TABLE otps_away RENAME TO otps")
+        time.sleep(0.5)
+        check(otps._thread.is_alive(), "the write-behind thread died on a DB error")
+        check(table_rows(otps) == 1, "the code was lost when its write failed")
+        otps.close()
+        pool.close()
+
+    print(f"global limit: {granted} issued / {limited} refused of {args.resets} in 1 s")
+    print(f"per-Aadhaar limit: {same} of 10 back-to-back requests issued")
+
+    if failures:
+        print(f"FAILED ({len(failures)} checks), first: {failures[:5]}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Login latency (p50 / p99) with scrypt hashing at several work factors,
+cold (KDF every time) and warm (verification cache), plus bulk rehash
+throughput for legacy plaintext rows.
+
+Run from the project root:
+    python -m benchmarks.bench_passwords [--logins 200] [--log-n 12 13 14 15]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from services.auth import AuthService
+from services.db import ConnectionPool
+from services.passwords import PasswordHasher, VerificationCache, calibrate
+from services.users import UserRepository
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed_logins(auth, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        ok, _role = auth.login("000000000001", "secret", "Patient")
+        samples.append((time.perf_counter() - start) * 1000)
+        assert ok
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--log-n", type=int, nargs="+", default=[12, 13, 14, 15])
+    parser.add_argument("--legacy", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"calibrated work factor for 100 ms: log2 N = {calibrate(100)}")
+    with tempfile.TemporaryDirectory() as tmp:
+        users = UserRepository(ConnectionPool(os.path.join(tmp, "bench.db")))
+        users.create_tables()
+
+        print(f"{'log2 N':>6} {'cold p50':>9} {'cold p99':>9} {'warm p50':>9} {'warm p99':>9}  (ms)")
+        for log_n in args.log_n:
+            users.delete_by_aadhaar("000000000001")
+            hasher = PasswordHasher(log_n=log_n, cache=VerificationCache(ttl=0))
+            auth = AuthService(users, hasher)
+            auth.signup("Bench", "b@example.com", "000000000001", "9000000000", "secret", "Patient")
+            cold = timed_logins(auth, args.logins)
+            hasher.cache = VerificationCache()
+            warm = timed_logins(auth, args.logins)
+            auth.shutdown()
+            print(f"{log_n:>6} {statistics.median(cold):>9.2f} {percentile(cold, 99):>9.2f} "
+                  f"{statistics.median(warm):>9.3f} {percentile(warm, 99):>9.3f}")
+
+        with users.pool.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (name, aadhaar, password, role) VALUES (?, ?, ?, ?)",
+                ((f"legacy{i}", f"1{i:011d}", f"pw{i}", "Patient") for i in range(args.legacy)),
+            )
+        hasher = PasswordHasher(log_n=12)
+        start = time.perf_counter()
+        count = hasher.rehash_legacy(users)
+        elapsed = time.perf_counter() - start
+        hasher.shutdown()
+        print(f"rehashed {count} legacy rows on {hasher.processes} processes "
+              f"in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s)")
+        users.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Doctor dashboard patient list: the old GridLayout of per-patient widgets vs
+the RecycleView-backed PatientListView, at 10, 1k and 10k patients.
+Reports build time (through the first layout), Python memory held by the
+list, and mean / worst frame time while scrolling.
+
+Needs a Kivy window (a display or SDL's offscreen driver). Run from the
+project root:
+    python -m benchmarks.bench_patient_list [--sizes 10 1000 10000]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.label import Label
+from kivy.uix.scrollview import ScrollView
+from kivy.utils import get_color_from_hex
+
+from screens.doctor import PatientListView
+from services.patient_list import PatientListModel, STATUS_COLORS
+
+STATUSES = tuple(STATUS_COLORS)
+
+
+def patients(n):
+    return [{"id": i, "name": f"Patient {i:05d}", "status": STATUSES[i % 3], "room": f"{100 + i % 400}{'ABCD'[i % 4]}"}
+            for i in range(n)]
+
+
+def build_old(records):
+    # The previous DoctorDashboardApp list: a BoxLayout + 3 Labels + canvas per patient
+    scroll_view = ScrollView(do_scroll_x=False)
+    grid = GridLayout(cols=1, spacing=dp(5), size_hint_y=None, height=Window.height)
+    grid.bind(minimum_height=grid.setter('height'))
+    for patient in records:
+        entry = BoxLayout(size_hint_y=None, height=dp(50), padding=dp(5), spacing=dp(10))
+        with entry.canvas.before:
+            Color(1, 1, 1, 1)
+            entry.rect = Rectangle(pos=entry.pos, size=entry.size)
+
+        def update_entry_rect(instance, value):
+            instance.rect.pos = instance.pos
+            instance.rect.size = instance.size
+        entry.bind(pos=update_entry_rect, size=update_entry_rect)
+        entry.add_widget(Label(text=patient["name"], font_size='18sp', bold=True, size_hint_x=0.5))
+        entry.add_widget(Label(text=f'Room: {patient["room"]}', font_size='16sp', size_hint_x=0.25))
+        entry.add_widget(Label(text=patient["status"], font_size='16sp', bold=True, size_hint_x=0.25,
+                               color=get_color_from_hex(STATUS_COLORS[patient["status"]])))
+        grid.add_widget(entry)
+    scroll_view.add_widget(grid)
+    return scroll_view
+
+
+def build_new(records):
+    return PatientListView(PatientListModel(records), do_scroll_x=False)
+
+
+def frame():
+    Clock.tick()
+    EventLoop.idle()
+
+
+def traced_memory(build, records):
+    # Separate pass: tracemalloc slows allocation down too much to time builds under it
+    gc.collect()
+    tracemalloc.start()
+    widget = build(records)
+    Window.add_widget(widget)
+    frame()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    Window.remove_widget(widget)
+    frame()
+    return memory
+
+
+def measure(build, records, scroll_frames=60):
+    memory = traced_memory(build, records)
+    gc.collect()
+    start = time.perf_counter()
+    widget = build(records)
+    Window.add_widget(widget)
+    frame()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    times = []
+    for i in range(scroll_frames):
+        widget.scroll_y = 1 - i / (scroll_frames - 1)
+        start = time.perf_counter()
+        frame()
+        times.append((time.perf_counter() - start) * 1000)
+    Window.remove_widget(widget)
+    frame()
+    return build_ms, memory, sum(times) / len(times), max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    args = parser.parse_args()
+
+    EventLoop.ensure_window()
+    Window.size = (250, 540)
+    print(f"{'patients':>8} {'list':<12} {'build ms':>9} {'memory MB':>10} {'scroll avg ms':>14} {'worst ms':>9}")
+    for n in args.sizes:
+        records = patients(n)
+        for name, build in (("GridLayout", build_old), ("RecycleView", build_new)):
+            build_ms, memory, avg, worst = measure(build, records)
+            print(f"{n:>8} {name:<12} {build_ms:>9.1f} {memory / 1e6:>10.2f} {avg:>14.2f} {worst:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
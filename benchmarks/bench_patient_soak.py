@@ -0,0 +1,133 @@
+"""
+Soak test for PatientScreen navigation: timers, plots and memory per visit.
+
+Builds the screen from the shipped kv/patient.kv and checks it has every
+id it looks up. Then navigates away from and back to it N times and checks
+that the Clock holds one redraw interval for the screen while it is shown
+and none while hidden, that the total number of Clock events stays flat, that the graph keeps
+exactly its two plots, and that traced Python memory stops growing after
+warm-up.
+Exits non-zero on any failure. Runs in a scratch directory so vitals.db is
+not touched. Run from the project root:
+    python -m benchmarks.bench_patient_soak [--navigations 1000]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+from kivy.config import Config
+Config.set("graphics", "maxfps", "0")
+
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.uix.screenmanager import NoTransition, Screen, ScreenManager
+
+from screens.patient import PatientScreen, VITAL_FORMATS
+
+#! The shipped layout, so the screen is tested with the ids it really has
+PATIENT_KV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kv", "patient.kv")
+
+WARMUP = 50
+MEMORY_SLACK = 256 * 1024
+
+
+def settle(predicate, limit=2.0):
+    deadline = time.perf_counter() + limit
+    while not predicate() and time.perf_counter() < deadline:
+        Clock.tick()
+        time.sleep(0.001)
+    return predicate()
+
+
+def screen_events(screen):
+    """Clock events, of any origin, whose callback is a method of `screen`."""
+    return sum(1 for event in Clock.get_events()
+               if getattr(event.get_callback(), "__self__", None) is screen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--navigations", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="patient-soak-"))
+    Builder.load_file(PATIENT_KV)
+    sm = ScreenManager(transition=NoTransition())
+    sm.add_widget(Screen(name="other"))
+    patient = PatientScreen(name="patient")
+    sm.add_widget(patient)
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    # Every id the screen looks up must come from kv/patient.kv
+    missing = [name for name in ("vitals_graph", "name_value", "room_value", "condition_value")
+               + tuple(f"{metric}_box" for metric in VITAL_FORMATS) if name not in patient.ids]
+    check(not missing, f"kv/patient.kv gives PatientScreen no {missing}")
+    if missing:
+        for failure in failures:
+            print("FAIL", failure)
+        sys.exit(1)
+    graph = patient.ids.vitals_graph
+
+    sm.current = "patient"
+    check(settle(lambda: "update_graph" in patient.clock._intervals and screen_events(patient) == 1),
+          "redraw interval never started")
+    total_events = None
+
+    tracemalloc.start()
+    baseline = None
+    start = time.perf_counter()
+    for i in range(args.navigations):
+        sm.current = "other"
+        Clock.tick()
+        hidden_events = screen_events(patient)
+        check(hidden_events == 0, f"visit {i}: {hidden_events} timers left while hidden")
+
+        sm.current = "patient"
+        Clock.tick()
+        shown_events = screen_events(patient)
+        check(shown_events == 1, f"visit {i}: {shown_events} timers while shown")
+        check(len(graph.plots) == 2, f"visit {i}: {len(graph.plots)} plots")
+
+        if i + 1 == WARMUP:
+            gc.collect()
+            baseline = tracemalloc.get_traced_memory()[0]
+            total_events = len(Clock.get_events())
+        elif total_events is not None:
+            check(len(Clock.get_events()) <= total_events,
+                  f"visit {i}: {len(Clock.get_events())} Clock events in total, {total_events} after warm-up")
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    final = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    if baseline is not None:
+        check(final - baseline < MEMORY_SLACK,
+              f"traced memory grew {(final - baseline) / 1024:.1f} KiB after warm-up")
+
+    patient.shutdown()
+    print(f"navigations:            {args.navigations} ({elapsed / args.navigations * 1e3:.2f} ms each)")
+    print(f"screen timers shown:    {shown_events}")
+    print(f"screen timers hidden:   {hidden_events}")
+    print(f"Clock events in total:  {len(Clock.get_events())}")
+    print(f"plots:                  {len(graph.plots)}")
+    if baseline is not None:
+        print(f"memory after warm-up:   {(final - baseline) / 1024:+.1f} KiB")
+    if failures:
+        print(f"FAILED ({len(failures)} checks), first: {failures[:5]}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
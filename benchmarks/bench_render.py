@@ -0,0 +1,211 @@
+"""
+Frame time of the patient screen at 1, 10 and 60 Hz data rates, per-reading redraws vs RenderScheduler.
+
+Runs the screen in the (hidden) window at 60 frames a second for
+--seconds per data rate, with a 3600-sample graph and four VitalBoxes,
+two ways:
+
+  per-reading  every reading appends, asks both plots to redraw (the old
+               list-building mesh fill) and assigns every readout
+  scheduled    readings go through the ingest queue; PatientScreen drains
+               them at redraw_hz and RenderScheduler flushes plots and
+               changed readouts at most max_fps times a second
+
+and reports the median / p95 / worst work per frame (Clock, layout and
+GL drawing; the wait for the next frame excluded), the total of it per
+second, and plot draws and label re-renders per second. Then checks
+the in-place mesh matches the old one, that unchanged rounded values
+are skipped and that the FPS cap holds. Exits non-zero on failure. Runs in a scratch directory so
+vitals.db is not touched. Run from the project root:
+    python -m benchmarks.bench_render [--seconds 2] [--max-fps 30]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+from kivy.config import Config
+Config.set("graphics", "window_state", "hidden")
+Config.set("graphics", "maxfps", "0")
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.lang import Builder
+from kivy.utils import get_color_from_hex
+
+from screens.patient import PatientScreen, VITAL_FORMATS
+from vitals.ingest import Reading
+from vitals.plot import RingLinePlot
+
+FRAME = 1 / 60.0
+WINDOW = 3600
+
+
+class LegacyRingLinePlot(RingLinePlot):
+    """RingLinePlot's mesh fill before this change: Python float lists, two uploads."""
+
+    def plot_mesh(self):
+        from vitals.decimate import minmax
+        import numpy as np
+        params = self.params
+        x0, y0, x1, y1 = params['size']
+        values = np.frombuffer(self.buffer.view(), dtype=np.float64)
+        xs, ys = minmax(values, max(1, int(x1 - x0)))
+        mesh, vert, _ = self.set_mesh_size(len(ys))
+        if not len(ys):
+            return
+        xmin, xmax = params['xmin'], params['xmax']
+        ymin, ymax = params['ymin'], params['ymax']
+        ratiox = (x1 - x0) / float(xmax - xmin)
+        ratioy = (y1 - y0) / float(ymax - ymin)
+        vert[0::4] = ((xs - xmin) * ratiox + x0).tolist()
+        vert[1::4] = ((ys - ymin) * ratioy + y0).tolist()
+        mesh.vertices = vert
+
+
+def make_screen(name, legacy, max_fps):
+    screen = PatientScreen(name=name, window=WINDOW, max_fps=max_fps)
+    Window.add_widget(screen)
+    screen.setup_graph(0)
+    deadline = time.perf_counter() + 5
+    while "update_graph" not in screen.clock._intervals and time.perf_counter() < deadline:
+        Clock.tick()          # stored history loads, then the updates start
+    screen.ingest.stop()      # readings come from the benchmark instead of the simulator
+    if legacy:
+        graph = screen.ids.vitals_graph
+        for attr, metric, color in (("hr_plot", "hr", "#E74C3C"), ("bp_plot", "bp", "#3498DB")):
+            graph.remove_plot(getattr(screen, attr))
+            plot = LegacyRingLinePlot(screen.vitals[metric], color=get_color_from_hex(color))
+            graph.add_plot(plot)
+            setattr(screen, attr, plot)
+    for i in range(WINDOW):
+        screen.vitals.append(hr=70 + i % 20, bp=120)
+    screen.renders = 0
+    for metric in VITAL_FORMATS:
+        screen.ids[f"{metric}_box"].bind(value=lambda *a, s=screen: setattr(s, "renders", s.renders + 1))
+    counted_draws = []
+    for plot in (screen.hr_plot, screen.bp_plot):
+        original = plot.draw
+        plot.draw = lambda *a, original=original: (counted_draws.append(1), original(*a))
+    screen.counted_draws = counted_draws
+    return screen
+
+
+def run(screen, legacy, rate, seconds, rng):
+    if legacy:
+        screen.clock.pause()
+    else:
+        screen.clock.resume()
+    for _ in range(5):
+        EventLoop.idle()
+    screen.renders = 0
+    screen.counted_draws.clear()
+    frames = []
+    start = time.perf_counter()
+    next_reading = start
+    while time.perf_counter() - start < seconds:
+        frame_start = time.perf_counter()
+        due = []
+        while next_reading <= frame_start:
+            due.append(Reading(0, next_reading, rng.uniform(70, 90), rng.uniform(115, 135),
+                               rng.uniform(94, 99), rng.uniform(97.5, 99.5)))
+            next_reading += 1.0 / rate
+        if legacy:
+            for reading in due:
+                screen.vitals.append(hr=reading.hr, bp=reading.bp)
+                screen.hr_plot.ask_draw()
+                screen.bp_plot.ask_draw()
+                for metric, fmt in VITAL_FORMATS.items():
+                    screen.ids[f"{metric}_box"].value = fmt.format(getattr(reading, metric))
+        elif due:
+            screen.ingest.offer(due)
+        EventLoop.idle()
+        frames.append((time.perf_counter() - frame_start) * 1000)
+        rest = FRAME - (time.perf_counter() - frame_start)
+        if rest > 0:
+            time.sleep(rest)
+    elapsed = time.perf_counter() - start
+    screen.clock.pause()
+    busy = sum(frames) / elapsed
+    frames.sort()
+    return {"median": statistics.median(frames), "p95": frames[int(len(frames) * 0.95)], "worst": frames[-1],
+            "busy": busy, "draws": len(screen.counted_draws) / elapsed, "renders": screen.renders / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0, help="per data rate and mode")
+    parser.add_argument("--max-fps", type=float, default=30)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench-render-"))
+    Builder.load_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kv", "patient.kv"))
+    EventLoop.ensure_window()
+    Window.size = (800, 600)
+
+    rng = random.Random(0)
+    screens = {False: make_screen("scheduled", False, args.max_fps), True: make_screen("legacy", True, args.max_fps)}
+    print(f"{WINDOW}-sample graph, 60 frames/s, scheduler capped at {args.max_fps:g} fps")
+    print(f"{'data rate':<10} {'mode':<12} {'median ms':>10} {'p95 ms':>8} {'worst ms':>9} "
+          f"{'busy ms/s':>10} {'draws/s':>8} {'renders/s':>10}")
+    results = {}
+    for rate in (1, 10, 60):
+        for legacy in (True, False):
+            for screen in screens.values():
+                screen.opacity = 1 if screen is screens[legacy] else 0
+            r = results[rate, legacy] = run(screens[legacy], legacy, rate, args.seconds, rng)
+            print(f"{rate:>4} Hz    {'per-reading' if legacy else 'scheduled':<12} {r['median']:>10.2f} "
+                  f"{r['p95']:>8.2f} {r['worst']:>9.2f} {r['busy']:>10.0f} {r['draws']:>8.1f} {r['renders']:>10.1f}")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    new = screens[False]
+    graph = new.ids.vitals_graph
+    for metric, plot in (("hr", new.hr_plot), ("bp", new.bp_plot)):
+        reference = LegacyRingLinePlot(new.vitals[metric])
+        graph.add_plot(reference)
+        EventLoop.idle()                          # the graph sizes the new plot
+        plot.draw()
+        reference.draw()
+        got, want = list(plot._mesh.vertices), list(reference._mesh.vertices)
+        graph.remove_plot(reference)
+        # The GPU gets float32 either way
+        check(len(got) == len(want) and all(abs(a - b) < 1e-3 for a, b in zip(got, want)),
+              f"{metric}: in-place mesh differs from the list-built one")
+        check(list(plot._mesh.indices) == list(range(len(got) // 4)), f"{metric}: indices out of step")
+
+    render = new.render
+    new.show_vitals(Reading(0, 0, 81.0, 120, 97.2, 98.6))
+    render.flush()
+    renders, skipped = new.renders, render.skipped
+    for value in (80.6, 81.2, 81.4):
+        new.show_vitals(Reading(0, 0, value, 120, 97.2, 98.6))
+    render.flush()
+    check(new.renders == renders, f"{new.renders - renders} re-renders for readings that all show as 81")
+    check(render.skipped > skipped, "unchanged readouts were not counted as skipped")
+
+    check(results[60, False]["draws"] <= 2 * args.max_fps * 1.1,
+          f"{results[60, False]['draws']:.0f} plot draws/s over the {args.max_fps:g} fps cap")
+
+    for screen in screens.values():
+        screen.shutdown()
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: in-place mesh matches, unchanged readouts skipped, redraws capped")
+
+
+if __name__ == "__main__":
+    main()
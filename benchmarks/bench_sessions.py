@@ -0,0 +1,187 @@
+"""
+Authorization checks per second: a users.db lookup per check vs SessionManager's cached profiles.
+
+Fills a scratch users.db with --users accounts, signs --sessions of them
+in and runs --checks authorize(token, role) calls over those tokens
+four ways:
+
+  per-check DB  the role is read from users.db every time (what a screen
+                would do without sessions)
+  cold          clear() first, so each user's profile loads once
+  warm          every profile already cached
+  N threads     warm checks from --threads job threads at once
+
+Then checks that a password reset and check_db's delete end the user's
+sessions, in this process and (through users.db) in another one, that
+protected screens refuse a missing or revoked session, that a wrong role
+is refused and that the profile LRU and the session table stay bounded.
+Exits non-zero on failure. Runs in a scratch directory so users.db is
+not touched. Run from the project root:
+    python -m benchmarks.bench_sessions [--users 10000] [--checks 200000] [--threads 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from kivy.uix.screenmanager import NoTransition, Screen
+
+from screens.registry import LazyScreenManager
+from services.auth import AuthService
+from services.passwords import PasswordHasher
+from services.schema import HOT_QUERIES
+from services.sessions import PermissionDenied, SessionManager, get_sessions
+from services.users import UserRepository
+
+HASH = "scrypt$14$8$1$c2FsdA$aGFzaA"
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench-sessions-"))
+    import check_db                                  # its UserRepository opens the scratch users.db
+    users = UserRepository()
+    users.create_tables()
+    users.import_chunk([(f"User {i}", f"user{i}@example.com", f"{100000000000 + i:012d}",
+                         f"9{i:09d}", HASH, ("Patient", "Doctor")[i % 2]) for i in range(args.users)])
+    sessions = get_sessions()
+    auth = AuthService(users, PasswordHasher(log_n=10, processes=0), sessions=sessions)
+
+    rng = random.Random(0)
+    signed_in = rng.sample(range(args.users), min(args.sessions, args.users))
+    tokens = [(sessions.create(f"{100000000000 + i:012d}"), ("Patient", "Doctor")[i % 2]) for i in signed_in]
+    order = [tokens[rng.randrange(len(tokens))] for _ in range(args.checks)]
+    db_checks = order[:min(len(order), 20_000)]
+    aadhaar_of = {token: f"{100000000000 + i:012d}" for (token, _), i in zip(tokens, signed_in)}
+    select_role = HOT_QUERIES["profile"][0]
+
+    def per_check_db():
+        with users.pool.connection() as conn:
+            for token, role in db_checks:
+                row = conn.execute(select_role, (aadhaar_of[token],)).fetchone()
+                assert row is not None and row[5].lower() == role.lower()
+
+    def check_all(part=order):
+        for token, role in part:
+            assert sessions.authorize(token, role)
+
+    def cold():
+        sessions.clear()
+        check_all()
+
+    def threaded():
+        size = len(order) // args.threads
+        workers = [threading.Thread(target=check_all, args=(order[i * size:(i + 1) * size],))
+                   for i in range(args.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    rows = [("per-check DB", timed(per_check_db, len(db_checks))), ("cold", timed(cold, len(order)))]
+    misses = sessions.misses
+    rows.append(("warm", timed(check_all, len(order))))
+    rows.append((f"{args.threads} threads", timed(threaded, len(order) // args.threads * args.threads)))
+    print(f"{args.users} users, {len(tokens)} sessions, {len(order)} checks")
+    print(f"{'mode':<14} {'checks/s':>12} {'vs DB':>8}")
+    for label, rate in rows:
+        print(f"{label:<14} {rate:>12,.0f} {rate / rows[0][1]:>7.1f}x")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    check(misses == len(set(aadhaar_of.values())), f"cold run loaded {misses} profiles for {len(tokens)} users")
+    check(rows[2][1] > rows[0][1] * 3, "warm checks are not clearly faster than a DB lookup")
+
+    token, role = tokens[0]
+    wrong = "Doctor" if role == "Patient" else "Patient"
+    check(not sessions.authorize(token, wrong), "a session passed a check for another role")
+    try:
+        sessions.require(token, wrong)
+        check(False, "require() let the wrong role through")
+    except PermissionDenied:
+        pass
+
+    reset_token = auth.verify_otp(aadhaar_of[token], auth.request_otp(aadhaar_of[token]))
+    auth.reset_password(aadhaar_of[token], "new secret", reset_token)
+    check(not sessions.authorize(token), "password reset left the old session working")
+    ok, _role, fresh = auth.sign_in(aadhaar_of[token], "new secret", role)
+    check(ok and sessions.authorize(fresh, role), "could not sign in again after the reset")
+
+    token, role = tokens[1]
+    check_db.delete_user_by_aadhaar(aadhaar_of[token])
+    check(not sessions.authorize(token), "deleted user's session still authorized")
+
+    # Another process sharing users.db: its sessions end on the next profile load
+    other = SessionManager(users.find_profile, profile_ttl=0, revoked=users.sessions_revoked)
+    token, role = tokens[2]
+    remote = other.create(aadhaar_of[token])
+    check(other.authorize(remote, role), "second process could not check its own session")
+    reset_token = auth.verify_otp(aadhaar_of[token], auth.request_otp(aadhaar_of[token]))
+    auth.reset_password(aadhaar_of[token], "other secret", reset_token)
+    check(not other.authorize(remote), "reset in one process left the session working in another")
+    token, role = tokens[3]
+    remote = other.create(aadhaar_of[token])
+    users.delete_by_aadhaar(aadhaar_of[token])
+    other.create(f"{100000000000 + signed_in[4]:012d}")   # a later sign-in is not affected
+    check(not other.authorize(remote), "deletion left the session working in another process")
+
+    # Protected screens: only a live session of the right role gets through
+    sm = LazyScreenManager(registry={}, transition=NoTransition())
+    sm.add_widget(Screen(name="login"))
+    sm.add_widget(Screen(name="patient"))
+    sm.current = "patient"
+    check(sm.current == "login", "patient screen opened without a session")
+    patient = next(i for i in signed_in[5:] if i % 2 == 0)
+    sm.session = sessions.create(f"{100000000000 + patient:012d}")
+    sm.current = "patient"
+    check(sm.current == "patient", "patient screen refused a live Patient session")
+    sm.current = "login"
+    users.delete_by_aadhaar(f"{100000000000 + patient:012d}")
+    sessions.clear()                                 # as if profile_ttl had passed
+    sm.current = "patient"
+    check(sm.current == "login" and not sm.session, "patient screen opened with a revoked session")
+
+    small = SessionManager(users.find_profile, size=100)
+    for i in range(500):
+        small.create(f"{100000000000 + i:012d}")
+    check(len(small._profiles) <= 100, f"profile cache grew to {len(small._profiles)} past its size")
+
+    capped = SessionManager(users.find_profile, max_sessions=200)
+    first = capped.create("100000000000")
+    kept = capped.create("100000000001")
+    for i in range(2, 1000):
+        capped.authorize(kept)
+        capped.create(f"{100000000000 + i:012d}")
+    check(len(capped) <= 200, f"session table grew to {len(capped)} past max_sessions")
+    check(not capped.authorize(first) and capped.authorize(kept),
+          "eviction did not end the least recently used session")
+
+    auth.shutdown()
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: cached checks, reset and delete end sessions across processes, screens gated, wrong roles refused")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Time to a populated doctor dashboard and its memory, loading from SQLite into dicts vs the mapped ward snapshot.
+
+Builds a scratch ward of --patients patients with up to --window recent
+readings each, stored twice: a patients table plus vitals.db (VitalsStore
+raw rows) and a vitals.snapshot file. Each way of opening is timed in a
+fresh process (best of --runs), from nothing loaded to the dashboard's
+data being ready: the PatientListModel rows, the AlertEngine windows
+filled and a first evaluate() done. Widgets are left out; the recycled
+list builds the same handful of rows either way.
+
+  SQLite -> dicts  every patient and recent reading fetched and kept as
+                   dicts (what opening the dashboard against the database
+                   would do), then copied into the engine
+  mmap snapshot    WardSnapshot maps the file; rows come from its columns
+                   and restore() reads the vitals columns directly
+
+RSS growth is reported for each (file-backed snapshot pages included).
+Then checks that both give the same rows and alert state, that a reader
+keeps its snapshot while a new one replaces the file, and that truncated
+or foreign files are refused. Exits non-zero on failure. Runs in a
+scratch directory. Run from the project root:
+    python -m benchmarks.bench_snapshot [--patients 10000] [--window 60] [--runs 3]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from operator import itemgetter
+
+import numpy as np
+
+from services.db import ConnectionPool
+from services.patient_list import PatientListModel
+from vitals.alerts import METRICS, AlertEngine
+from vitals.snapshot import SNAPSHOT_FILE, WardSnapshot, load_snapshot, write_snapshot
+from vitals.store import VitalsStore
+
+NOW = 1_700_000_000.0
+STATUSES = ("Stable", "Monitoring", "Critical")
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_ward(n, window):
+    rng = np.random.default_rng(0)
+    patients = [{"id": 1000 + i, "name": f"Patient {i}", "room": f"{100 + i % 400}{'ABCD'[i % 4]}",
+                 "status": STATUSES[i % 3]} for i in range(n)]
+    # Some patients joined recently and have fewer readings
+    count = window - np.arange(n) % 7
+    values = np.zeros((len(METRICS), n, window), dtype=np.float32)
+    for m, (mean, spread) in enumerate(((80, 8), (120, 10), (97, 1.5), (98.6, 0.5))):
+        values[m] = rng.normal(mean, spread, (n, window))
+    values[:, np.arange(window) < (window - count)[:, None]] = 0
+    return patients, values, count
+
+
+def store_ward(patients, values, count):
+    window = values.shape[2]
+    with sqlite3.connect("patients.db") as conn:
+        conn.execute("CREATE TABLE patients (id INTEGER PRIMARY KEY, name TEXT, room TEXT, status TEXT)")
+        conn.executemany("INSERT INTO patients VALUES (:id, :name, :room, :status)", patients)
+    store = VitalsStore(ConnectionPool("vitals.db"))
+    rows = []
+    for i, patient in enumerate(patients):
+        for j in range(window - int(count[i]), window):
+            rows.append((patient["id"], NOW - window + j, *values[:, i, j].tolist()))
+    store.insert_many(rows)
+    store.close()
+    write_snapshot(SNAPSHOT_FILE, patients, values, count, written=NOW)
+
+
+def open_sqlite(window):
+    with sqlite3.connect("patients.db") as conn:
+        conn.row_factory = sqlite3.Row
+        patients = [dict(row, vitals=[]) for row in conn.execute("SELECT id, name, room, status FROM patients")]
+    by_id = {patient["id"]: patient for patient in patients}
+    store = VitalsStore(ConnectionPool("vitals.db"))
+    with store.pool.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        for table in sorted(store._partitions_between(NOW - window, NOW)):
+            sql = f"SELECT patient, ts, hr, bp, spo2, temp FROM {table} WHERE ts>=? ORDER BY patient, ts"
+            for row in conn.execute(sql, (NOW - window,)):
+                by_id[row["patient"]]["vitals"].append(dict(row))
+    model = PatientListModel(patients)
+    engine = AlertEngine(model.ids(), window=window)
+    values = np.zeros((len(METRICS), len(patients), window))
+    count = np.zeros(len(patients), dtype=np.int64)
+    for i, patient in enumerate(patients):
+        recent = patient["vitals"][-window:]
+        count[i] = len(recent)
+        for j, reading in enumerate(recent, start=window - len(recent)):
+            values[:, i, j] = [reading[metric] for metric in METRICS]
+    engine.restore(values, count)
+    return model, engine, (patients, store)
+
+
+def open_snapshot(window):
+    snapshot = WardSnapshot(SNAPSHOT_FILE)
+    model = PatientListModel(snapshot.rows())
+    engine = AlertEngine(model.ids(), window=window)
+    engine.restore(*snapshot.windows())
+    return model, engine, snapshot
+
+
+def child(mode, window):
+    """One timed open in this (fresh) process; prints the result as JSON."""
+    base = rss_mb()
+    start = time.perf_counter()
+    model, engine, keep = (open_sqlite if mode == "sqlite" else open_snapshot)(window)
+    engine.evaluate()
+    engine.status_changes()
+    ms = (time.perf_counter() - start) * 1000
+    print(json.dumps({"ms": ms, "rss": rss_mb() - base, "rows": model.rows,
+                      "latest": np.nan_to_num(engine.latest("hr")).round(3).tolist(),
+                      "slope": np.nan_to_num(engine.slope("hr")).round(3).tolist(),
+                      "status": engine.status_codes.tolist()}))
+
+
+def run_child(mode, window, root):
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_snapshot", "--child", mode,
+                          "--window", str(window)], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--window", type=int, default=60, help="recent readings kept per patient")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=("sqlite", "snapshot"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.window)
+        return
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="bench-snapshot-"))
+    patients, values, count = make_ward(args.patients, args.window)
+    store_ward(patients, values, count)
+    size = os.path.getsize(SNAPSHOT_FILE)
+    start = time.perf_counter()
+    write_snapshot(SNAPSHOT_FILE, patients, values, count, written=NOW)
+    write_ms = (time.perf_counter() - start) * 1000
+
+    results = {}
+    for mode in ("sqlite", "snapshot"):
+        runs = [run_child(mode, args.window, root) for _ in range(args.runs)]
+        results[mode] = runs[0] | {"ms": min(r["ms"] for r in runs), "rss": statistics.median(r["rss"] for r in runs)}
+    print(f"{args.patients} patients x {args.window} readings; snapshot {size / 2 ** 20:.1f} MB, "
+          f"written in {write_ms:.0f} ms")
+    print(f"{'open':<18} {'populated ms':>13} {'RSS +MB':>9}")
+    for mode, label in (("sqlite", "SQLite -> dicts"), ("snapshot", "mmap snapshot")):
+        print(f"{label:<18} {results[mode]['ms']:>13.1f} {results[mode]['rss']:>9.1f}")
+    sqlite, snap = results["sqlite"], results["snapshot"]
+    print(f"snapshot: {sqlite['ms'] / snap['ms']:.1f}x faster, {sqlite['rss'] - snap['rss']:.0f} MB less")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    check(sorted(sqlite["rows"], key=itemgetter("id")) == sorted(snap["rows"], key=itemgetter("id")),
+          "snapshot rows differ from the database")
+    for key in ("latest", "slope", "status"):
+        check(sqlite[key] == snap[key], f"alert {key} differs between the two loads")
+    check(snap["ms"] < sqlite["ms"], "the snapshot was not faster to open")
+
+    # A reader keeps the snapshot it opened while a new one replaces the file
+    old = WardSnapshot(SNAPSHOT_FILE)
+    first = old.rows()[0]["name"]
+    write_snapshot(SNAPSHOT_FILE, [dict(p, name="Renamed") for p in patients[:10]], values[:, :10], count[:10])
+    check(old.rows()[0]["name"] == first and len(old) == len(patients), "open snapshot changed under its reader")
+    new = load_snapshot(SNAPSHOT_FILE)
+    check(new is not None and len(new) == 10 and new.row(0)["name"] == "Renamed", "new snapshot not picked up")
+    check(new.recent(patients[3]["id"])["hr"].tolist() == values[0, 3, args.window - int(count[3]):].tolist(),
+          "recent() returned the wrong samples")
+
+    with open(SNAPSHOT_FILE, "rb") as f:
+        data = f.read()
+    for name, blob in (("truncated", data[:len(data) // 2]), ("foreign", b"SQLite format 3\0" + data[16:]),
+                       ("empty", b"")):
+        with open("bad.bin", "wb") as f:
+            f.write(blob)
+        check(load_snapshot("bad.bin") is None, f"{name} snapshot was accepted")
+    check(load_snapshot("missing.bin") is None, "missing snapshot did not give None")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: same rows and alert state from both, readers isolated from rewrites, bad files refused")
+
+
+if __name__ == "__main__":
+    main()
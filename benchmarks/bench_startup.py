@@ -0,0 +1,113 @@
+"""
+Cold-start time: time-to-first-frame and time-to-interactive-login for the
+old eager startup (import every screen, load every KV file, fixed 3 s
+splash) vs LazyScreenManager (preload during the splash, switch on ready).
+
+Each mode runs in a fresh process, in a scratch directory with links to
+kv/ and assets/ and a copy of users.db, so the real database is untouched.
+Needs a Kivy window. Run from the project root:
+    python -m benchmarks.bench_startup [--runs 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(mode):
+    start = time.perf_counter()
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+
+    if mode == "lazy":
+        import main
+        app = main.HealthcareApp()
+    else:
+        # The startup as it was before the lazy registry
+        from kivy.app import App
+        from kivy.lang import Builder
+        from kivy.uix.screenmanager import ScreenManager, FadeTransition
+        from screens.splash import SplashScreen
+        from screens.login import LoginSignupScreen
+        from screens.patient import PatientScreen
+        Window.size = (250, 540)
+        Builder.load_file("kv/splash.kv")
+        Builder.load_file("kv/login.kv")
+        Builder.load_file("kv/patient.kv")
+
+        class EagerApp(App):
+            def build(self):
+                sm = ScreenManager(transition=FadeTransition())
+                sm.add_widget(SplashScreen(name="splash"))
+                sm.add_widget(LoginSignupScreen(name="login"))
+                sm.add_widget(PatientScreen(name="patient"))
+                return sm
+
+            def on_stop(self):
+                from services.jobs import get_executor
+                get_executor().shutdown()
+                self.root.get_screen("patient").shutdown()
+
+        app = EagerApp()
+
+    marks = {}
+
+    def on_flip(*args):
+        if "first_frame" not in marks:
+            marks["first_frame"] = time.perf_counter() - start
+
+    def poll(dt):
+        sm = app.root
+        if sm is not None and sm.current == "login" and not sm.transition.is_active:
+            marks["interactive_login"] = time.perf_counter() - start
+            app.stop()
+            return False
+
+    Window.bind(on_flip=on_flip)
+    Clock.schedule_interval(poll, 0)
+    Clock.schedule_once(lambda dt: app.stop(), 30)
+    app.run()
+    print(json.dumps(marks))
+
+
+def run(mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("kv", "assets"):
+            os.symlink(os.path.join(ROOT, name), os.path.join(tmp, name))
+        shutil.copy(os.path.join(ROOT, "users.db"), tmp)
+        env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+                             cwd=tmp, env=env, capture_output=True, text=True, timeout=120)
+        lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+        if not lines:
+            raise RuntimeError(f"{mode} run failed:\n{out.stderr[-2000:]}")
+        return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=("eager", "lazy"))
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'mode':<6} {'first frame s':>14} {'interactive login s':>20}")
+    for mode in ("eager", "lazy"):
+        for _ in range(args.runs):
+            marks = run(mode)
+            print(f"{mode:<6} {marks.get('first_frame', float('nan')):>14.3f} "
+                  f"{marks.get('interactive_login', float('nan')):>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
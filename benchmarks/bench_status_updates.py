@@ -0,0 +1,90 @@
+"""
+Widget updates per batch of status changes on the doctor dashboard.
+
+Builds the real DoctorDashboardApp UI, loads N patients, then pushes
+batches of random status changes (with repeats and no-op changes) through
+PatientStatusStore within a single frame. Counts the list edits the
+RecycleView receives and the header text changes, checks them against the
+number of patients whose status really changed, and reports flush time.
+
+Run from the project root:
+    python -m benchmarks.bench_status_updates [--patients 10000] [--changes 1000]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import random
+import sys
+import time
+
+from kivy.clock import Clock
+
+from screens.doctor import DoctorDashboardApp
+from services.patient_list import STATUS_COLORS
+
+STATUSES = tuple(STATUS_COLORS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--changes", type=int, default=1000)
+    parser.add_argument("--batches", type=int, default=5)
+    args = parser.parse_args()
+
+    app = DoctorDashboardApp()
+    app.build()
+    app.load_patients({"id": i, "name": f"Patient {i:05d}", "status": STATUSES[i % 3], "room": str(i)}
+                              for i in range(args.patients))
+    Clock.tick()
+
+    list_edits = []
+    app.patients.bind(list_edits.append)
+    header_updates = []
+    app.alert_button.bind(text=lambda *a: header_updates.append("alerts"))
+    app.info_values["Active Patients:"].bind(text=lambda *a: header_updates.append("active"))
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(f"batch {batch}: {message}")
+
+    rng = random.Random(0)
+    print(f"{'batch':>5} {'changes':>8} {'really changed':>15} {'list edits':>11} {'header updates':>15} {'flush ms':>9}")
+    for batch in range(args.batches):
+        list_edits.clear()
+        header_updates.clear()
+        before = {pid: app.patients.get(pid)["status"] for pid in range(args.patients)}
+        final = {}
+        for _ in range(args.changes):
+            pid = rng.randrange(args.patients)
+            final[pid] = rng.choice(STATUSES)
+            app.statuses.set_status(pid, final[pid])
+
+        start = time.perf_counter()
+        Clock.tick()        # the one coalesced flush for this frame
+        flush_ms = (time.perf_counter() - start) * 1000
+
+        really_changed = sum(1 for pid, status in final.items() if before[pid] != status)
+        print(f"{batch:>5} {args.changes:>8} {really_changed:>15} {len(list_edits):>11} "
+              f"{len(header_updates):>15} {flush_ms:>9.2f}")
+        # Sorted by name, a status change is an in-place row update
+        check(len(list_edits) == really_changed, f"{len(list_edits)} list edits for {really_changed} changes")
+        check(all(op[0] == "update" for op in list_edits), "status change caused a non-update list edit")
+        check(header_updates.count("alerts") <= 1 and "active" not in header_updates,
+              f"header updated {header_updates}")
+        critical = sum(1 for pid in range(args.patients) if app.patients.get(pid)["status"] == "Critical")
+        check(app.alert_button.text == f"New Alert ({critical})", f"alert count {app.alert_button.text!r} != {critical}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: one list edit per changed patient, at most one header update per batch")
+
+
+if __name__ == "__main__":
+    main()
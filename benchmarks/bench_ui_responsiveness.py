@@ -0,0 +1,108 @@
+"""
+Frame loop responsiveness while a slow query runs.
+
+Drives the Kivy Clock headlessly at 60 FPS and counts how many frames tick
+while a deliberately slow SQLite query runs (a) inline on the main thread,
+the way LoginSignupScreen used to call the DB, and (b) on the JobExecutor.
+
+Then checks that the background run kept the loop ticking: at least half
+the frames the query's duration allows and no gap over --max-gap-ms.
+Exits non-zero on failure. Run from the project root:
+    python -m benchmarks.bench_ui_responsiveness [--rows 3000000] [--max-gap-ms 100]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from kivy.clock import Clock
+
+from services.jobs import JobExecutor
+
+FRAME = 1 / 60.0
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+    SELECT sum(i % 7) FROM n
+"""
+
+
+def slow_query(rows):
+    conn = sqlite3.connect(":memory:")
+    try:
+        return conn.execute(SLOW_QUERY, (rows,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def pump(until):
+    """
+    Tick the clock at ~60 FPS until until() is true; return (frames, worst gap ms).
+    """
+    frames = 0
+    worst = 0.0
+    last = time.perf_counter()
+    while not until():
+        Clock.tick()
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        last = now
+        frames += 1
+        time.sleep(FRAME)
+    return frames, worst * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=3_000_000, help="size of the slow query")
+    parser.add_argument("--max-gap-ms", type=float, default=100.0, help="longest frame gap allowed in the background")
+    args = parser.parse_args()
+    rows = args.rows
+
+    start = time.perf_counter()
+    slow_query(rows)
+    query_time = time.perf_counter() - start
+    print(f"slow query takes {query_time * 1000:.0f} ms")
+
+    # (a) inline: the query runs inside a frame callback, like the old validate_login
+    state = {"done": False}
+
+    def inline(dt):
+        slow_query(rows)
+        state["done"] = True
+
+    Clock.schedule_once(inline)
+    inline_frames, inline_worst = pump(lambda: state["done"])
+    print(f"inline on main thread   frames={inline_frames:<4} worst frame gap={inline_worst:.0f} ms")
+
+    # (b) background: the frame loop keeps ticking while the worker runs
+    executor = JobExecutor()
+    state = {"done": False}
+    executor.submit(slow_query, rows, on_success=lambda result: state.update(done=True))
+    frames, worst = pump(lambda: state["done"])
+    executor.shutdown(wait=True)
+    print(f"JobExecutor background  frames={frames:<4} worst frame gap={worst:.0f} ms")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    expected = query_time / FRAME
+    check(frames >= expected / 2, f"only {frames} frames ticked during a query worth {expected:.0f}")
+    check(frames > inline_frames, "the background run ticked no more frames than the inline one")
+    check(worst <= args.max_gap_ms, f"worst frame gap {worst:.0f} ms is over {args.max_gap_ms:.0f} ms")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: the frame loop keeps ticking while the query runs in the background")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-tick CPU and allocation of the vitals window: the old list rebuild from
+PatientScreen.update_graph vs RingBuffer.append + view().
+
+Run from the project root:
+    python -m benchmarks.bench_vitals_buffer
+"""
+import random
+import time
+import tracemalloc
+
+from vitals.buffer import RingBuffer
+
+WINDOWS = (12, 720, 3600, 12 * 3600, 24 * 3600)
+
+
+def old_tick(points):
+    # Exactly what update_graph used to do for one plot
+    current_y = [point[1] for point in points]
+    new_y = current_y[1:] + [random.randint(70, 90)]
+    return [(i, y) for i, y in enumerate(new_y)]
+
+
+def ring_tick(buffer):
+    buffer.append(random.randint(70, 90))
+    buffer.view()       # what the plot reads on redraw
+    return buffer
+
+
+def measure(tick, state, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        state = tick(state)
+    cpu = (time.perf_counter() - start) / ticks
+
+    tracemalloc.start()
+    tick(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu * 1e6, peak
+
+
+def main():
+    print(f"{'window':>7} {'old us/tick':>12} {'old peak B':>11} {'ring us/tick':>13} {'ring peak B':>12}")
+    for window in WINDOWS:
+        ticks = max(20, 200_000 // window)
+        points = [(i, random.randint(70, 90)) for i in range(window)]
+        buffer = RingBuffer(window, fill=(y for _, y in points))
+        old_cpu, old_peak = measure(old_tick, points, ticks)
+        ring_cpu, ring_peak = measure(ring_tick, buffer, ticks * 10)
+        print(f"{window:>7} {old_cpu:>12.1f} {old_peak:>11,} {ring_cpu:>13.2f} {ring_peak:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Sustained vitals ingest into VitalsStore for 1,000 patients at 1 Hz, then
+roll-up time and history() latency at raw / minute / hour resolution.
+Then checks that rows arriving after their minute was rolled up are
+counted by the next roll-up, that a failed batch leaves no phantom
+partition behind and that BatchWriter survives failing writes and
+roll-ups, retrying the batch. Exits non-zero on failure.
+
+Run from the project root:
+    python -m benchmarks.bench_vitals_store [--patients 1000] [--seconds 600]
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from services.db import ConnectionPool
+from vitals.store import BatchWriter, VitalsStore
+
+
+class FlakyStore:
+    """The store, with its first `failures` writes and every roll-up failing."""
+
+    def __init__(self, store, failures):
+        self.store = store
+        self.failures = failures
+        self.apply_retention = store.apply_retention
+
+    def insert_many(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self.store.insert_many(rows)
+
+    def run_rollups(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=600, help="simulated seconds of 1 Hz data")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start_ts = time.time() - args.seconds
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VitalsStore(ConnectionPool(os.path.join(tmp, "vitals.db")))
+
+        # One batch per simulated second: every patient reports once
+        elapsed = 0.0
+        for second in range(args.seconds):
+            ts = start_ts + second
+            batch = [(p, ts, rng.randint(60, 100), rng.randint(110, 140), rng.randint(92, 100),
+                      round(rng.uniform(97, 100), 1)) for p in range(args.patients)]
+            begin = time.perf_counter()
+            store.insert_many(batch)
+            elapsed += time.perf_counter() - begin
+        total = args.patients * args.seconds
+        print(f"inserted {total:,} readings in {elapsed:.2f} s = {total / elapsed:,.0f} inserts/s "
+              f"({total / elapsed / args.patients:,.0f}x real time for {args.patients} patients at 1 Hz)")
+
+        begin = time.perf_counter()
+        store.run_rollups(start_ts + args.seconds + 3600)
+        print(f"roll-ups: {(time.perf_counter() - begin) * 1000:.1f} ms")
+
+        end_ts = start_ts + args.seconds
+        for resolution in ("raw", "minute", "hour"):
+            begin = time.perf_counter()
+            for patient in range(100):
+                rows = store.history(patient, start_ts, end_ts, resolution=resolution)
+            ms = (time.perf_counter() - begin) * 10
+            print(f"history {resolution:<7} whole range {ms:7.3f} ms/query  ({len(rows)} rows)")
+
+        failures = []
+
+        def check(ok, message):
+            if not ok:
+                failures.append(message)
+
+        def counts(patient, ts):
+            with store.pool.connection() as conn:
+                return [conn.execute(f"SELECT n FROM vitals_{name} WHERE patient=? AND bucket=?",
+                                     (patient, int(ts // size) * size)).fetchone()[0]
+                        for name, size in (("minute", 60), ("hour", 3600))]
+
+        # A reading for an already rolled-up minute (e.g. one that sat in
+        # BatchWriter's queue past the roll-up) is folded in by the next run
+        late = start_ts + 30.5
+        before = counts(0, late)
+        store.insert_many([(0, late, 80, 120, 97, 98.6)])
+        store.run_rollups(start_ts + args.seconds + 3600)
+        after = counts(0, late)
+        check(after == [n + 1 for n in before], f"late reading not rolled up: {before} -> {after}")
+
+        # A batch that fails must not leave its new partition cached (the
+        # first row opens the transaction the partition is created in)
+        future = start_ts + 30 * 86400
+        try:
+            store.insert_many([(0, start_ts + 1, 80, 120, 97, 98.6), (0, future, 80)])
+        except sqlite3.ProgrammingError:
+            pass
+        try:
+            store.insert_many([(0, future, 80, 120, 97, 98.6)])
+        except sqlite3.OperationalError as e:
+            check(False, f"insert after a rolled-back batch failed: {e}")
+
+        # Failing writes are retried and failing roll-ups skipped; the thread lives on
+        logging.getLogger("vitals.store").disabled = True
+        writer = BatchWriter(FlakyStore(store, failures=2), interval=0.05, rollup_interval=0).start()
+        writer.offer([(5000, start_ts + i, 80, 120, 97, 98.6) for i in range(10)])
+        time.sleep(0.5)
+        alive = writer._thread.is_alive()
+        writer.offer([(5000, start_ts + 10 + i, 80, 120, 97, 98.6) for i in range(10)])
+        writer.stop()
+        check(alive, "BatchWriter's thread died on a failed write")
+        check(writer.written == 20 and writer.dropped == 0,
+              f"BatchWriter wrote {writer.written} and dropped {writer.dropped} of 20 after failures")
+        check(writer.errors >= 3, f"only {writer.errors} writer errors counted")
+        store.close()
+
+        for failure in failures:
+            print("FAIL", failure)
+        if failures:
+            sys.exit(1)
+        print("ok: late rows are rolled up, rolled-back partitions are forgotten, the writer survives errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Streaming ward trend (WardAggregator) vs recomputing it from the raw window.
+
+Feeds one heart-rate reading per patient per second for --ticks seconds
+and, every tick, produces the per-bucket trend (count, mean, min, max,
+p10/p50/p90) three ways: WardAggregator updating its buckets as readings
+arrive, a NumPy recompute over a (window x patients) ring of the raw
+readings, and a plain-Python recompute over per-patient deques (timed on
+a few ticks only). Then checks the streamed buckets against the exact
+ones and that patients leaving or joining the ward update the ward-now
+statistics. Exits non-zero on failure.
+Run from the project root:
+    python -m benchmarks.bench_ward_trend [--patients 10000] [--ticks 60]
+"""
+import argparse
+import math
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from vitals.aggregate import WardAggregator
+from vitals.ingest import Reading
+
+PERCENTILES = (10, 50, 90)
+
+
+def exact_trend(times, values, newest, bucket_seconds, buckets):
+    """The trend recomputed from every reading in the window (NumPy)."""
+    bucket_of = np.floor(times / bucket_seconds).astype(np.int64)
+    out = []
+    for b in range(newest - buckets + 1, newest + 1):
+        mine = values[bucket_of == b]
+        row = {"count": len(mine)}
+        if len(mine):
+            row.update(mean=mine.mean(), min=mine.min(), max=mine.max())
+            for pct, v in zip(PERCENTILES, np.percentile(mine, PERCENTILES, method="inverted_cdf")):
+                row[f"p{pct}"] = v
+        out.append(row)
+    return out
+
+
+def python_trend(history, newest, bucket_seconds, buckets):
+    """The same, one reading at a time over per-patient deques."""
+    groups = {}
+    for readings in history:
+        for t, v in readings:
+            b = math.floor(t / bucket_seconds)
+            if b > newest - buckets:
+                groups.setdefault(b, []).append(v)
+    out = []
+    for b in range(newest - buckets + 1, newest + 1):
+        mine = sorted(groups.get(b, ()))
+        row = {"count": len(mine)}
+        if mine:
+            row.update(mean=sum(mine) / len(mine), min=mine[0], max=mine[-1])
+            for pct in PERCENTILES:
+                row[f"p{pct}"] = mine[max(1, math.ceil(len(mine) * pct / 100)) - 1]
+        out.append(row)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--ticks", type=int, default=60, help="seconds of readings (one per patient each)")
+    parser.add_argument("--bucket-seconds", type=float, default=5.0)
+    parser.add_argument("--buckets", type=int, default=12)
+    parser.add_argument("--python-ticks", type=int, default=3, help="ticks to time the plain-Python recompute on")
+    args = parser.parse_args()
+
+    n, seconds, buckets = args.patients, args.bucket_seconds, args.buckets
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, n + 1) * 7          # sparse ids, like database keys
+    id_list = ids.tolist()
+    base = rng.normal(78, 8, n)
+    t0 = 1_700_000_000.0
+    window = int(seconds * buckets)
+
+    ward = WardAggregator(id_list, bucket_seconds=seconds, buckets=buckets)
+    ring_t = np.zeros((window, n))      # time 0 is far outside the window
+    ring_v = np.zeros((window, n))
+    history = [deque(maxlen=window) for _ in range(n)]
+    stream_ms, numpy_ms, python_ms, reading_ms = [], [], [], []
+
+    for tick in range(args.ticks):
+        now = t0 + tick
+        values = base + rng.normal(0, 3, n)
+        times = np.full(n, now)
+        newest = math.floor(now / seconds)
+
+        start = time.perf_counter()
+        ward.add_many(id_list, times, values)
+        trend = ward.trend(PERCENTILES)
+        stream_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        ring_t[tick % window], ring_v[tick % window] = times, values
+        exact = exact_trend(ring_t.ravel(), ring_v.ravel(), newest, seconds, buckets)
+        numpy_ms.append((time.perf_counter() - start) * 1000)
+
+        for readings, v in zip(history, values.tolist()):
+            readings.append((now, v))
+        if tick >= args.ticks - args.python_ticks:
+            start = time.perf_counter()
+            python_trend(history, newest, seconds, buckets)
+            python_ms.append((time.perf_counter() - start) * 1000)
+
+    # The dashboard path: Reading tuples from the ingest pipeline
+    probe = WardAggregator(id_list, bucket_seconds=seconds, buckets=buckets)
+    for tick in range(5):
+        batch = [Reading(p, t0 + tick, hr, 120, 98, 98.6) for p, hr in zip(id_list, base.tolist())]
+        start = time.perf_counter()
+        probe.add_readings(batch)
+        reading_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"{n} patients, {window}s window in {buckets} buckets of {seconds:g}s, "
+          f"{n * min(args.ticks, window)} readings held by the recomputes")
+    print(f"{'per tick (ingest + trend)':<34} {'median ms':>10}")
+    print(f"{'WardAggregator (streaming)':<34} {np.median(stream_ms):>10.2f}")
+    print(f"{'  add_readings(Reading) alone':<34} {np.median(reading_ms):>10.2f}")
+    print(f"{'NumPy recompute over the window':<34} {np.median(numpy_ms):>10.2f}")
+    print(f"{'Python recompute over the window':<34} {np.median(python_ms):>10.2f}")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    for i, (got, want) in enumerate(zip(trend, exact)):
+        check(got["count"] == want["count"], f"bucket {i}: count {got['count']} != {want['count']}")
+        if not want["count"]:
+            continue
+        check(abs(got["mean"] - want["mean"]) < 1e-6, f"bucket {i}: mean {got['mean']} != {want['mean']}")
+        check(got["min"] == want["min"] and got["max"] == want["max"], f"bucket {i}: min/max differ")
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            check(abs(got[key] - want[key]) <= ward.bin_width, f"bucket {i}: {key} {got[key]} vs {want[key]}")
+
+    # Membership: half the ward leaves, a newcomer joins and reports
+    latest = dict(zip(id_list, values.tolist()))
+    leaving = id_list[::2]
+    for patient in leaving:
+        ward.remove_patient(patient)
+    stayed = [latest[p] for p in id_list[1::2]]
+    now_stats = ward.now()
+    check(now_stats["count"] == len(stayed), f"ward-now count {now_stats['count']} after leaves, want {len(stayed)}")
+    check(abs(now_stats["mean"] - np.mean(stayed)) < 1e-6, "ward-now mean still counts patients who left")
+    before = ward.trend()[-1]["count"]
+    ward.add_many([leaving[0]], [t0 + args.ticks - 1], [80.0])
+    check(ward.trend()[-1]["count"] == before, "a reading from a patient who left was counted")
+    ward.add_patient(-1)
+    ward.add_many([-1], [t0 + args.ticks - 1], [200.0])
+    check(ward.now()["count"] == len(stayed) + 1 and ward.now()["max"] >= 200, "a joining patient was not counted")
+    check(ward.trend()[-1]["max"] == 200.0, "the joiner's reading is missing from the newest bucket")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: streamed buckets match the recompute; leaves and joins update the ward")
+
+
+if __name__ == "__main__":
+    main()
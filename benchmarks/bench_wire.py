@@ -0,0 +1,192 @@
+"""
+Decode throughput of the binary vitals frames vs JSON lines and the text line protocol.
+
+Encodes the same simulated readings as JSON lines (one object per
+reading), as the existing text line protocol and as vitals.wire frames,
+then times decoding each stream fed in socket-sized chunks: JSON lines
+and text into Reading tuples, frames into structured arrays (zero-copy)
+and, for IngestPipeline, on into Reading tuples. Then checks round-trip
+values, that corrupt, unknown-version and garbage bytes are skipped
+without losing the frames around them, and a simulator -> socket ->
+BinaryFrameSource -> IngestPipeline run whose reader must not raise,
+also when its socket is closed under it. Exits non-zero on failure.
+Run from the project root:
+    python -m benchmarks.bench_wire [--readings 200000] [--frame 1000]
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from vitals.ingest import IngestPipeline, Reading, SimulatedSource, format_line, parse_line
+from vitals.wire import HEADER, RECORD, BinaryFrameSource, FrameDecoder, FrameEncoder, to_readings
+
+CHUNK = 65536
+
+
+def chunks(blob):
+    return [blob[i:i + CHUNK] for i in range(0, len(blob), CHUNK)]
+
+
+def decode_json_lines(parts):
+    readings, tail = [], b""
+    for part in parts:
+        complete, _, tail = (tail + part).rpartition(b"\n")
+        for line in complete.split(b"\n"):
+            d = json.loads(line)
+            readings.append(Reading(d["patient"], d["ts"], d["hr"], d["bp"], d["spo2"], d["temp"]))
+    return readings
+
+
+def decode_text_lines(parts):
+    readings, tail = [], b""
+    for part in parts:
+        complete, _, tail = (tail + part).rpartition(b"\n")
+        readings.extend(parse_line(line) for line in complete.split(b"\n"))
+    return readings
+
+
+def decode_frames(parts):
+    decoder = FrameDecoder()
+    return [records for part in parts for records in decoder.feed(part)]
+
+
+def decode_frames_to_readings(parts):
+    return [r for records in decode_frames(parts) for r in to_readings(records)]
+
+
+def best_of(fn, parts, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = fn(parts)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def pipeline_run(readings, frame):
+    reader, writer = socket.socketpair()
+    encoder = FrameEncoder()
+
+    def produce():
+        try:
+            for i in range(0, len(readings), frame):
+                writer.sendall(encoder.encode(readings[i:i + frame]))
+        finally:
+            writer.close()
+
+    source = BinaryFrameSource(reader)
+    pipeline = IngestPipeline(source, max_pending=len(readings))
+    pipeline.start()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    producer.join(timeout=30)
+    deadline = time.monotonic() + 10
+    while pipeline.received < len(readings) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    delivered = pipeline.drain()
+    pipeline.stop()
+    return delivered, source.malformed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readings", type=int, default=200_000)
+    parser.add_argument("--frame", type=int, default=1000, help="readings per binary frame")
+    args = parser.parse_args()
+
+    source = SimulatedSource(1000, rate_hz=None, seed=3)
+    readings = []
+    while len(readings) < args.readings:
+        readings.extend(source.read_batch(min(1000, args.readings - len(readings))))
+
+    json_blob = b"".join((json.dumps({"patient": r.patient, "ts": r.timestamp, "hr": r.hr, "bp": r.bp,
+                                      "spo2": r.spo2, "temp": r.temp}) + "\n").encode() for r in readings)
+    text_blob = b"".join(format_line(r) for r in readings)
+    encoder = FrameEncoder()
+    start = time.perf_counter()
+    frame_blob = b"".join(encoder.encode(readings[i:i + args.frame]) for i in range(0, len(readings), args.frame))
+    encode_s = time.perf_counter() - start
+
+    n = len(readings)
+    rows = []
+    for label, fn, blob in (("JSON lines -> Reading", decode_json_lines, json_blob),
+                            ("text lines -> Reading", decode_text_lines, text_blob),
+                            ("frames -> structured array", decode_frames, frame_blob),
+                            ("frames -> Reading", decode_frames_to_readings, frame_blob)):
+        seconds, out = best_of(fn, chunks(blob))
+        rows.append((label, seconds, len(blob), out))
+    print(f"{n} readings; binary frames of {args.frame} encoded at {n / encode_s:,.0f} readings/s")
+    print(f"{'decode':<28} {'bytes/rd':>9} {'readings/s':>13} {'MB/s':>8} {'vs JSON':>8}")
+    json_seconds = rows[0][1]
+    for label, seconds, size, _ in rows:
+        print(f"{label:<28} {size / n:>9.1f} {n / seconds:>13,.0f} {size / seconds / 1e6:>8.1f} "
+              f"{json_seconds / seconds:>7.1f}x")
+
+    failures = []
+
+    def check(ok, message):
+        if not ok:
+            failures.append(message)
+
+    crashed = []
+
+    def excepthook(hook):
+        crashed.append(f"{hook.thread.name}: {hook.exc_type.__name__}: {hook.exc_value}")
+    threading.excepthook = excepthook
+
+    records = np.concatenate(rows[2][3])
+    expected = np.array(readings, dtype=RECORD)
+    check(len(records) == n, f"decoded {len(records)} records, want {n}")
+    check(np.array_equal(records, expected), "binary round trip changed the values")
+    check(not rows[2][3][0].flags.owndata, "frames were copied instead of viewed")
+    check(rows[3][3][5] == Reading._make(expected[5].tolist()), "to_readings gave a different Reading")
+
+    # Damage: garbage in front, a flipped payload byte, a future version, a
+    # header whose count grew or shrank (it must not swallow the frames after
+    # it or stall the stream), split headers
+    good = [encoder.encode(readings[i:i + 10]) for i in range(0, 90, 10)]
+    bad_crc = bytearray(good[1])
+    bad_crc[HEADER.size + 3] ^= 0xFF
+    future = bytearray(good[3])
+    future[4] = 99
+    more, fewer = bytearray(good[5]), bytearray(good[7])
+    more[8] ^= 0x20                               # count 10 -> 42
+    fewer[8] ^= 0x08                              # count 10 -> 2
+    stream = (b"\x00garbage VIT" + good[0] + bytes(bad_crc) + good[2] + bytes(future) + good[4]
+              + bytes(more) + good[6] + bytes(fewer) + good[8])
+    decoder = FrameDecoder()
+    frames = []
+    for i in range(0, len(stream), 7):           # arbitrary chunk boundaries
+        frames.extend(decoder.feed(stream[i:i + 7]))
+    got = np.concatenate(frames)["patient"].tolist() if frames else []
+    want = [r.patient for k in (0, 2, 4, 6, 8) for r in readings[k * 10:k * 10 + 10]]
+    check(got == want, "damaged stream lost or mangled the good frames")
+    check(decoder.malformed >= 5, f"only {decoder.malformed} malformed frames counted")
+
+    delivered, malformed = pipeline_run(readings[:20_000], args.frame)
+    check(len(delivered) == 20_000 and malformed == 0, f"pipeline delivered {len(delivered)}, {malformed} malformed")
+    check(delivered[-1].patient == readings[19_999].patient, "pipeline reordered readings")
+    reader, writer = socket.socketpair()
+    source = BinaryFrameSource(reader)
+    reader.close()
+    try:
+        check(source.read_records() == [] and source.read_records() is None, "closed socket did not read as EOF")
+    except OSError as e:
+        check(False, f"closed socket raised {e!r}")
+    writer.close()
+    check(not crashed, f"reader thread raised: {crashed}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+    print("ok: frames round-trip, damage is skipped, the socket feed reaches the pipeline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Headless benchmark suite for UI, storage and auth hot paths, with JSON baselines.
+
+Runs each case --repeat times and keeps the median of every metric
+(milliseconds, lower is better):
+
+  aadhaar_input  AadhaarInput.insert_text: typing, and pasting 1k / 100k chars
+  auth           signup and login round-trips on a scratch users.db
+  update_graph   PatientScreen.update_graph plus plot redraw, 12 and 3600 samples
+  doctor_build   DoctorDashboardApp.build() and load_patients() by patient count
+
+The Kivy window is hidden and the clipboard stubbed, so it runs on CI
+without a desktop. With --save the results become the baseline; otherwise
+they are compared with it and the run fails (exit 1) when a metric is more
+than --threshold slower and by more than --min-delta ms; the absolute
+floor keeps timer and scheduler jitter on sub-millisecond metrics from
+failing the run. Re-record the whole baseline in one run (no --only) so
+every number comes from the same tree. Baselines only mean something on
+the machine that recorded them.
+Run from the project root:
+    python -m benchmarks.suite [--only auth doctor_build] [--repeat 5] [--save] [--threshold 0.25]
+"""
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+os.environ.setdefault("KIVY_CLIPBOARD", "dummy")
+
+from kivy.config import Config
+Config.set("graphics", "window_state", "hidden")
+Config.set("graphics", "maxfps", "0")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+#! Default --min-delta (ms): run-to-run jitter on the sub-millisecond update_graph
+#! ticks reaches ~0.1 ms on an idle VM
+MIN_DELTA = 0.25
+
+CASES = {}
+
+
+def case(name):
+    """Register fn() -> {metric: ms} as a suite case."""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+@case("aadhaar_input")
+def aadhaar_input():
+    from screens.login import AadhaarInput
+
+    field = AadhaarInput()
+    rng = random.Random(0)
+    junk = "0123456789 -abc"
+
+    def paste(size):
+        text = "".join(rng.choice(junk) for _ in range(size))
+
+        def run():
+            field.text = ""
+            field.insert_text(text)
+        return run
+
+    def type_digits():
+        field.text = ""
+        for digit in "123456789012":
+            field.insert_text(digit)
+
+    return {
+        "type_12_digits": median_ms(type_digits, 20),
+        "paste_1k": median_ms(paste(1_000), 20),
+        "paste_100k": median_ms(paste(100_000), 5),
+    }
+
+
+@case("auth")
+def auth():
+    from services.auth import AuthService
+    from services.db import ConnectionPool
+    from services.passwords import PasswordHasher, hash_password
+    from services.users import UserRepository
+
+    #! A low work factor keeps the KDF from drowning out the DB round-trip
+    log_n = 10
+    with tempfile.TemporaryDirectory() as tmp:
+        users = UserRepository(ConnectionPool(os.path.join(tmp, "users.db")))
+        service = AuthService(users, PasswordHasher(log_n=log_n, processes=0))
+        service.create_tables()
+        # Distinct hashes for the users that log in, so the verification
+        # cache can't answer for them; the rest just fill the table
+        shared = hash_password("secret", log_n)
+        users.import_chunk([(f"User {i}", f"u{i}@example.com", f"{i:012d}", f"9{i:09d}",
+                             hash_password(f"secret{i}", log_n) if i < 50 else shared, "Patient")
+                            for i in range(5000)])
+        ids = iter(range(10 ** 11, 10 ** 12))
+        known = iter(range(50))
+
+        def login():
+            i = next(known)
+            service.login(f"{i:012d}", f"secret{i}", "Patient")
+
+        try:
+            return {
+                "signup": median_ms(lambda: service.signup("New", "n@example.com", f"{next(ids):012d}",
+                                                           "9000000000", "secret", "Patient"), 50),
+                "login": median_ms(login, 50),
+                "login_repeat": median_ms(lambda: service.login("000000000001", "secret1", "Patient"), 50),
+                "login_unknown": median_ms(lambda: service.login("999999999999", "secret", "Patient"), 200),
+            }
+        finally:
+            service.shutdown()
+            users.pool.close()
+
+
+#! The shipped layout, so the screen is measured with the widgets it really has
+PATIENT_KV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kv", "patient.kv")
+
+
+@case("update_graph")
+def update_graph():
+    from kivy.clock import Clock
+    from kivy.lang import Builder
+    from screens.patient import PatientScreen
+    from vitals.ingest import Reading
+
+    if PATIENT_KV not in Builder.files:
+        Builder.load_file(PATIENT_KV)
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)      # the screen opens vitals.db in the working directory
+        try:
+            for window in (12, 3600):
+                screen = PatientScreen(name=f"patient{window}", window=window, size=(400, 300))
+                screen.ids.vitals_graph.size = (400, 300)
+                screen.setup_graph(0)
+                plots = (screen.hr_plot, screen.bp_plot)
+                for i in range(window):
+                    screen.vitals.append(hr=70 + i % 20, bp=120)
+                for _ in range(3):
+                    Clock.tick()      # let the graph lay out and size its plots
+                now = time.time()
+
+                def tick(batch):
+                    def run():
+                        screen.ingest.offer([Reading(0, now, 80, 120, 98, 98.6)] * batch)
+                        screen.update_graph(0)
+                        for plot in plots:
+                            plot.draw()
+                    return run
+
+                results[f"tick_{window}_samples"] = median_ms(tick(1), 200)
+                results[f"tick_{window}_samples_100_readings"] = median_ms(tick(100), 50)
+                screen.shutdown()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+@case("doctor_build")
+def doctor_build():
+    from screens.doctor import DoctorDashboardApp
+
+    results = {}
+    DoctorDashboardApp().build().clear_widgets()      # warm Kivy's caches up first
+    for count in (10, 1_000, 10_000):
+        patients = [{"id": i, "name": f"Patient {i:05d}", "status": ("Stable", "Critical", "Monitoring")[i % 3],
+                     "room": str(i)} for i in range(count)]
+
+        def build():
+            app = DoctorDashboardApp()
+            app.build()
+            app.load_patients(patients)
+            app.profiler.stop()
+        results[f"build_{count}_patients"] = median_ms(build, 3 if count > 1000 else 10)
+    return results
+
+
+def run(names, repeat):
+    results = {}
+    for name in names:
+        runs = [CASES[name]() for _ in range(repeat)]
+        for metric in runs[0]:
+            results[f"{name}.{metric}"] = round(statistics.median(r[metric] for r in runs), 4)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Print the comparison; returns the names of regressed metrics."""
+    regressed = []
+    print(f"{'metric':<48} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>10} {value:>10.3f} {'new':>8}")
+            continue
+        change = (value - base) / base if base else 0.0
+        slow = value > base * (1 + threshold) and value - base > min_delta
+        if slow:
+            regressed.append(name)
+        print(f"{name:<48} {base:>10.3f} {value:>10.3f} {change:>+7.0%} {'REGRESSED' if slow else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), help="cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="record the results as the baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="ignore slowdowns smaller than this many ms (timer noise)")
+    args = parser.parse_args()
+
+    results = run(args.only or list(CASES), args.repeat)
+    report = {"machine": platform.node(), "platform": platform.platform(),
+              "python": platform.python_version(), "recorded": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "metrics": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        if args.only and os.path.exists(args.baseline):
+            # Keep the other cases' numbers when re-recording a subset
+            with open(args.baseline, encoding="utf-8") as f:
+                report["metrics"] = {**json.load(f)["metrics"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        for name, value in results.items():
+            print(f"{name:<48} {value:>10.3f}")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save first")
+        sys.exit(1)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressed = compare(results, baseline["metrics"], args.threshold, args.min_delta)
+    if baseline.get("machine") != platform.node():
+        print(f"note: baseline recorded on {baseline.get('machine')!r}, this is {platform.node()!r}")
+    if regressed:
+        print(f"FAIL: {len(regressed)} metric(s) regressed more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("ok: no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,115 @@
-import sqlite3
+import argparse
+import sys
+
+from services.users import UserRepository, normalize_aadhaar
+from services.passwords import LOG_N_SETTING, PasswordHasher, configured_log_n
+from services.db import ConnectionPool, DB_FILE
+from services.sessions import get_sessions
+from services import bulk
+
+users = UserRepository()
 
 def delete_user_by_aadhaar(aadhaar):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM users WHERE aadhaar = ?", (aadhaar,))
-    conn.commit()
-    conn.close()
+    # Also revokes the user's sessions in users.db: other processes (the app,
+    # the server) end them on their next profile load, within sessions.PROFILE_TTL
+    users.delete_by_aadhaar(aadhaar)
+    # ... and this process's sessions end at once
+    get_sessions().invalidate_user(aadhaar)
     print(f"User with Aadhaar {aadhaar} deleted.")
 
-# Example usage: delete user with aadhaar '123456789012'
-delete_user_by_aadhaar("")
-
 def print_all_users():
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, aadhaar, phone, role FROM users")
-    all_rows = cursor.fetchall()
-    conn.close()
-
+    # Streams rows instead of loading the whole table
     print("Users in the database:")
-    for row in all_rows:
-        print(row)
+    for row in users.iter_users():
+        print(row[:5])
+
+def rehash_legacy_passwords():
+    # Hash any plaintext passwords left from before hashing was added (uses all cores)
+    hasher = PasswordHasher(log_n=configured_log_n(users))
+    try:
+        count = hasher.rehash_legacy(users)
+    finally:
+        hasher.shutdown()
+    print(f"Upgraded {count} plaintext passwords.")
+
+def calibrate_work_factor(target_ms=100.0):
+    # Pick the scrypt work factor for this machine; the app, server and
+    # imports use it for new hashes from then on
+    users.create_tables()
+    hasher = PasswordHasher()
+    try:
+        log_n = hasher.calibrate(target_ms)
+    finally:
+        hasher.shutdown()
+    users.set_setting(LOG_N_SETTING, log_n)
+    print(f"Password work factor set to log2 N = {log_n} (~{target_ms:g} ms per hash).")
+    return log_n
+
+def import_users(path, fmt=None, chunk_size=bulk.CHUNK_SIZE, update=False, conflicts=None):
+    fmt = bulk.detect_format(path, fmt)
+    users.create_tables()
+    report = bulk.ConflictReport(conflicts)
+    try:
+        with bulk.open_text(path, "r") as f:
+            stats = bulk.import_users(users, bulk.read_records(f, fmt), chunk_size, update, report)
+    finally:
+        report.close()
+    print(f"Import: {stats}", file=sys.stderr)
+    return stats
+
+def export_users(path, fmt=None, with_passwords=False):
+    fmt = bulk.detect_format(path, fmt)
+    with bulk.open_text(path, "w") as f:
+        count = bulk.export_users(users, f, fmt, with_passwords)
+    print(f"Exported {count} users.", file=sys.stderr)
+    return count
+
+
+def main(argv=None):
+    global users
+    parser = argparse.ArgumentParser(description="users.db admin tool.")
+    parser.add_argument("--db", default=DB_FILE, help="database file (default: users.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="print every user")
+
+    delete = commands.add_parser("delete", help="delete one user")
+    delete.add_argument("aadhaar")
+
+    commands.add_parser("rehash-legacy", help="hash plaintext passwords")
+
+    tune = commands.add_parser("calibrate", help="pick and store the password work factor for this machine")
+    tune.add_argument("--target-ms", type=float, default=100.0, help="time per hash to aim for")
+
+    load = commands.add_parser("import", help="import users from CSV or JSONL ('-' for stdin)")
+    load.add_argument("path")
+    load.add_argument("--format", choices=bulk.FORMATS, help="default: from the file extension")
+    load.add_argument("--chunk-size", type=int, default=bulk.CHUNK_SIZE, help="rows per transaction")
+    load.add_argument("--update", action="store_true", help="update users that already exist instead of skipping")
+    load.add_argument("--conflicts", help="write skipped / invalid records to this CSV")
+
+    dump = commands.add_parser("export", help="export users to CSV or JSONL ('-' for stdout)")
+    dump.add_argument("path")
+    dump.add_argument("--format", choices=bulk.FORMATS, help="default: from the file extension")
+    dump.add_argument("--with-passwords", action="store_true", help="include password hashes")
+
+    args = parser.parse_args(argv)
+    if args.db != DB_FILE:
+        users = UserRepository(ConnectionPool(args.db))
+
+    if args.command == "list":
+        print_all_users()
+    elif args.command == "delete":
+        delete_user_by_aadhaar(normalize_aadhaar(args.aadhaar))
+    elif args.command == "rehash-legacy":
+        rehash_legacy_passwords()
+    elif args.command == "calibrate":
+        calibrate_work_factor(args.target_ms)
+    elif args.command == "import":
+        import_users(args.path, args.format, args.chunk_size, args.update, args.conflicts)
+    elif args.command == "export":
+        export_users(args.path, args.format, args.with_passwords)
+
 
-# Check users after deletion
-print_all_users()
+if __name__ == "__main__":
+    main()
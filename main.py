@@ -1,23 +1,22 @@
 from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager, FadeTransition
+from kivy.uix.screenmanager import FadeTransition
 from kivy.core.window import Window
 from kivy.utils import get_color_from_hex
 from kivy.lang import Builder
 
-#! Import Screens to manage navigation between them 
+#! Only the splash screen is imported up front; every other screen is
+#! registered in screens/registry.py and loaded on demand / during the splash
 from screens.splash import SplashScreen          #todo: animation code for splash screen
-from screens.login import LoginSignupScreen      #todo: login and signup functionality
-from screens.patient import PatientScreen
-#from screens.doctor import DoctorScreen
+from screens.registry import LazyScreenManager
+from services.jobs import get_executor
+from screens import profiler
 
 #! Output Screen Example: Mobile screen size (iPhone 14 approx)
 Window.size = (250, 540)  #! Width x Height in pixels
 
 #! Load KV files (make sure they are inside kv/ folder)
 Builder.load_file("kv/splash.kv")
-Builder.load_file("kv/login.kv")
-Builder.load_file("kv/patient.kv")
-#Builder.load_file("kv/doctor.kv")
+#! login.kv / patient.kv are loaded by LazyScreenManager with their screens
 
 #! Global background color (white)
 Window.clearcolor = get_color_from_hex("#ffffff")
@@ -25,13 +24,27 @@ Window.clearcolor = get_color_from_hex("#ffffff")
 #! Screen Manager
 class HealthcareApp(App):
     def build(self):
-        sm = ScreenManager(transition=FadeTransition())
+        sm = LazyScreenManager(transition=FadeTransition())
         sm.add_widget(SplashScreen(name="splash"))
-        sm.add_widget(LoginSignupScreen(name="login"))
-        sm.add_widget(PatientScreen(name="patient"))
-        #sm.add_widget(DoctorScreen(name="doctor"))
+        #! Build the remaining screens while the splash animation runs
+        sm.preload()
+        #! F12 toggles the profiler overlay (or start with HEALTHCARE_PROFILE=1)
+        self.profiler = profiler.install()
         return sm
 
+    def on_stop(self):
+        self.profiler.stop()
+        #! Drop queued DB/auth jobs and stop the hashing processes so the app can exit
+        get_executor().shutdown()
+        #! Imported here so the auth / scrypt stack stays off the startup path;
+        #! only shut it down if the login screen actually started it
+        from services.auth import current_auth
+        auth = current_auth()
+        if auth is not None:
+            auth.shutdown()
+        if self.root.is_loaded("patient"):
+            self.root.get_screen("patient").shutdown()
+
 
 if __name__ == "__main__":
     HealthcareApp().run()
@@ -1,15 +1,25 @@
+import math
+from collections import deque
+
 import kivy
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.logger import Logger
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
 from kivy.uix.button import Button
+from kivy.uix.popup import Popup
 from kivy.uix.anchorlayout import AnchorLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.spinner import Spinner
+from kivy.uix.textinput import TextInput
+from kivy.properties import StringProperty
 from kivy.graphics import Color, Rectangle
 from kivy.utils import get_color_from_hex
 from kivy.metrics import dp # For density-independent pixels
-from kivy.core.window import Window # <<< FIX 1: Import the Window object
 
 # We need to import the Graph and MeshLinePlot from the garden package
 # Make sure you have installed it first using:
@@ -24,8 +34,106 @@ except ImportError:
     print("kivy garden install graph")
     exit(1)
 
+from services.jobs import get_executor
+from services.patient_list import PatientListModel, SORT_FIELDS
+from services.patient_status import PatientStatusStore
+from services.profiling import profiled, section
+from screens import profiler
+from vitals.aggregate import WardAggregator
+from vitals.alerts import AlertEngine
+from vitals.ingest import IngestPipeline, SimulatedSource
+from vitals.snapshot import SNAPSHOT_FILE, load_snapshot, write_snapshot
+
+#! How many alerts the "New Alert" popup keeps
+RECENT_ALERTS = 50
+#! Ward trend graph: one point per bucket, TREND_BUCKETS of them
+TREND_BUCKET_SECONDS = 60
+TREND_BUCKETS = 12
+#! Seconds between ward snapshots (the list and alert windows the next start opens with)
+SNAPSHOT_INTERVAL = 60
+
 kivy.require('2.1.0') # Specify your Kivy version
 
+
+class PatientRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One recycled row of the patient list. RecycleView reuses a handful of
+    these and just rebinds name/room/status as the list scrolls.
+    """
+    name = StringProperty('')
+    room = StringProperty('')
+    status = StringProperty('')
+    status_color = StringProperty('#000000')
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint_y=None, height=dp(50), padding=dp(5), spacing=dp(10), **kwargs)
+
+        # Background for each patient entry
+        with self.canvas.before:
+            Color(1, 1, 1, 1) # Slightly lighter grey for entry background
+            self.rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_rect, size=self.update_rect)
+
+        self.name_label = Label(font_size='18sp', bold=True, halign='left', size_hint_x=0.5, color=get_color_from_hex("#000000"))
+        self.room_label = Label(font_size='16sp', halign='center', size_hint_x=0.25, color=get_color_from_hex("#000000"))
+        self.status_label = Label(font_size='16sp', bold=True, halign='right', size_hint_x=0.25)
+        self.add_widget(self.name_label)
+        self.add_widget(self.room_label)
+        self.add_widget(self.status_label)
+
+    def update_rect(self, instance, value):
+        self.rect.pos = self.pos
+        self.rect.size = self.size
+
+    def on_name(self, instance, value):
+        self.name_label.text = value
+
+    def on_room(self, instance, value):
+        self.room_label.text = f'Room: {value}'
+
+    def on_status(self, instance, value):
+        self.status_label.text = value
+
+    def on_status_color(self, instance, value):
+        self.status_label.color = get_color_from_hex(value)
+
+
+class PatientListLayout(RecycleBoxLayout):
+    def do_layout(self, *args):
+        with section("doctor.layout"):
+            super().do_layout(*args)
+
+
+class PatientListView(RecycleView):
+    """
+    RecycleView that mirrors a PatientListModel, applying its edit
+    operations to `data` so only the affected rows are refreshed.
+    """
+
+    def __init__(self, model, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = PatientRow
+        layout = PatientListLayout(orientation='vertical', spacing=dp(5),
+                                  default_size=(None, dp(50)), default_size_hint=(1, None),
+                                  size_hint_y=None)
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.model = model
+        self.data = list(model.rows)
+        model.bind(self.apply)
+
+    @profiled("doctor.list_apply")
+    def apply(self, op):
+        kind = op[0]
+        if kind == "reset":
+            self.data = list(op[1])
+        elif kind == "insert":
+            self.data.insert(op[1], op[2])
+        elif kind == "remove":
+            del self.data[op[1]]
+        elif kind == "update":
+            self.data[op[1]] = op[2]
+
 class DoctorDashboardApp(App):
     """
     A Kivy app that displays a Doctor Dashboard with patient overviews and quick actions.
@@ -75,13 +183,13 @@ class DoctorDashboardApp(App):
             "Shift Status:": "[color=2ECC71]Active[/color]" # Green for active
         }
         
+        self.info_values = {} # value labels by key, so counts can be updated in place
         for key, value in doctor_data.items():
             doctor_info_layout.add_widget(
                 Label(text=key, font_size='18sp', bold=True, halign='right', padding=[dp(20),0], color=get_color_from_hex("#000000")) # Lighter grey
             )
-            doctor_info_layout.add_widget(
-                Label(text=value, font_size='18sp', halign='left', padding=[dp(20),0], markup=True, color=get_color_from_hex("#262525")) # White or colored
-            )
+            self.info_values[key] = Label(text=value, font_size='18sp', halign='left', padding=[dp(20),0], markup=True, color=get_color_from_hex("#262525")) # White or colored
+            doctor_info_layout.add_widget(self.info_values[key])
             
         root_layout.add_widget(doctor_info_layout)
 
@@ -95,57 +203,65 @@ class DoctorDashboardApp(App):
         )
         root_layout.add_widget(patient_list_title)
 
-        # Scrollable list for patients
-        scroll_view = ScrollView(size_hint=(1, 0.4), do_scroll_x=False)
-        
-        # <<< FIX 2: Changed self.height to Window.height
-        patient_grid = GridLayout(cols=1, spacing=dp(5), size_hint_y=None, height=Window.height) 
-        
-        patient_grid.bind(minimum_height=patient_grid.setter('height')) # Allow grid to grow
+        # Filter / sort controls for the list
+        controls = BoxLayout(size_hint=(1, None), height=dp(40), spacing=dp(10))
+        status_filter = Spinner(text='All', values=('All', 'Critical', 'Monitoring', 'Stable'), size_hint_x=0.35)
+        room_filter = TextInput(hint_text='Room', multiline=False, size_hint_x=0.3)
+        sort_by = Spinner(text='Sort: Name', values=tuple(f'Sort: {f.title()}' for f in SORT_FIELDS), size_hint_x=0.35)
+        controls.add_widget(status_filter)
+        controls.add_widget(room_filter)
+        controls.add_widget(sort_by)
+        root_layout.add_widget(controls)
 
         mock_patients = [
-            {"name": "Jane Doe", "status": "Stable", "status_color": "#2ECC71", "room": "305B"},
-            {"name": "John Smith", "status": "Critical", "status_color": "#E74C3C", "room": "210A"},
-            {"name": "Emily White", "status": "Monitoring", "status_color": "#F39C12", "room": "412C"},
-            {"name": "Michael Brown", "status": "Stable", "status_color": "#2ECC71", "room": "101D"},
-            {"name": "Sophia Lee", "status": "Stable", "status_color": "#2ECC71", "room": "301E"},
-            {"name": "David Green", "status": "Monitoring", "status_color": "#F39C12", "room": "205F"},
-            {"name": "Olivia Black", "status": "Critical", "status_color": "#E74C3C", "room": "115G"},
-            {"name": "William Blue", "status": "Stable", "status_color": "#2ECC71", "room": "402H"},
-            {"name": "Ava Pink", "status": "Monitoring", "status_color": "#F39C12", "room": "310I"},
-            {"name": "Liam Grey", "status": "Stable", "status_color": "#2ECC71", "room": "208J"},
-            # Add more patients to test scrolling
+            {"id": 1, "name": "Jane Doe", "status": "Stable", "room": "305B"},
+            {"id": 2, "name": "John Smith", "status": "Critical", "room": "210A"},
+            {"id": 3, "name": "Emily White", "status": "Monitoring", "room": "412C"},
+            {"id": 4, "name": "Michael Brown", "status": "Stable", "room": "101D"},
+            {"id": 5, "name": "Sophia Lee", "status": "Stable", "room": "301E"},
+            {"id": 6, "name": "David Green", "status": "Monitoring", "room": "205F"},
+            {"id": 7, "name": "Olivia Black", "status": "Critical", "room": "115G"},
+            {"id": 8, "name": "William Blue", "status": "Stable", "room": "402H"},
+            {"id": 9, "name": "Ava Pink", "status": "Monitoring", "room": "310I"},
+            {"id": 10, "name": "Liam Grey", "status": "Stable", "room": "208J"},
         ]
 
-        # Helper function to create a patient entry
-        def create_patient_entry(name, status, status_color, room):
-            entry_box = BoxLayout(size_hint_y=None, height=dp(50), padding=dp(5), spacing=dp(10))
-            
-            # Background for each patient entry
-            with entry_box.canvas.before:
-                Color(1, 1, 1, 1) # Slightly lighter grey for entry background
-                entry_box.rect = Rectangle(pos=entry_box.pos, size=entry_box.size, radius=[dp(5)])
-            
-            # Update background on resize
-            def update_entry_rect(instance, value):
-                instance.rect.pos = instance.pos
-                instance.rect.size = instance.size
-            entry_box.bind(pos=update_entry_rect, size=update_entry_rect)
-
-            entry_box.add_widget(Label(text=name, font_size='18sp', bold=True, halign='left', size_hint_x=0.5, color=get_color_from_hex("#000000")))
-            entry_box.add_widget(Label(text=f'Room: {room}', font_size='16sp', halign='center', size_hint_x=0.25, color=get_color_from_hex("#000000")))
-            entry_box.add_widget(Label(text=status, font_size='16sp', bold=True, halign='right', size_hint_x=0.25, color=get_color_from_hex(status_color)))
-            return entry_box
-
-        for patient in mock_patients:
-            patient_grid.add_widget(
-                create_patient_entry(
-                    patient["name"], patient["status"], patient["status_color"], patient["room"]
-                )
-            )
-        
-        scroll_view.add_widget(patient_grid)
-        root_layout.add_widget(scroll_view)
+        # Open on the last ward snapshot when there is one: rows and alert
+        # windows come straight from the mapped file, and the live feed
+        # corrects statuses from the first alert tick on
+        snapshot = load_snapshot(SNAPSHOT_FILE)
+
+        # Recycled, data-bound list: only the visible rows exist as widgets,
+        # so thousands of patients cost the same to show as ten
+        self.patients = PatientListModel(snapshot.rows() if snapshot is not None else mock_patients)
+        patient_list = PatientListView(self.patients, size_hint=(1, 0.4), do_scroll_x=False)
+        self.info_values["Active Patients:"].text = str(len(self.patients))
+
+        # Live status changes go through the store: one list/header update per frame
+        self.statuses = PatientStatusStore(self.patients)
+        self.statuses.bind(self.on_status_changes)
+
+        # Statuses and alerts come from rules over each patient's vitals;
+        # the feed starts with the app (see on_start)
+        self.alerts = AlertEngine(self.patients.ids())
+        if snapshot is not None:
+            self.alerts.restore(*snapshot.windows())
+        self.recent_alerts = deque(maxlen=RECENT_ALERTS)
+        # Ward-wide heart rate per time bucket, kept up to date reading by reading
+        self.ward = WardAggregator(self.patients.ids(), bucket_seconds=TREND_BUCKET_SECONDS,
+                                   buckets=TREND_BUCKETS)
+        self.monitor = None
+        self._alert_event = None
+        self._snapshot_event = None
+
+        def apply_filter(*args):
+            status = None if status_filter.text == 'All' else status_filter.text
+            self.patients.set_filter(status=status, room=room_filter.text.strip())
+        status_filter.bind(text=apply_filter)
+        room_filter.bind(text=apply_filter)
+        sort_by.bind(text=lambda instance, value: self.patients.set_sort(value.split(': ')[1].lower()))
+
+        root_layout.add_widget(patient_list)
 
         # --- 4. Quick Actions / Notifications ---
         actions_title = Label(
@@ -172,7 +288,9 @@ class DoctorDashboardApp(App):
             )
             return btn
 
-        actions_layout.add_widget(create_action_button("New Alert (2)", "#E74C3C")) # Red for alerts
+        self.alert_button = create_action_button(f"New Alert ({self.patients.status_counts['Critical']})", "#E74C3C") # Red for alerts
+        self.alert_button.bind(on_release=self.show_alerts)
+        actions_layout.add_widget(self.alert_button)
         actions_layout.add_widget(create_action_button("Appointments (3)", "#3498DB")) # Blue for appointments
         actions_layout.add_widget(create_action_button("View Reports", "#2ECC71")) # Green for reports
         
@@ -188,16 +306,12 @@ class DoctorDashboardApp(App):
         )
         root_layout.add_widget(trend_graph_title)
 
-        # Mock data for an overall trend graph (e.g., average heart rate)
-        overall_trend_data = [
-            (0, 70), (1, 71), (2, 69), (3, 72), (4, 70), (5, 73),
-            (6, 71), (7, 74), (8, 72), (9, 75), (10, 73), (11, 76)
-        ]
-
         graph_layout = AnchorLayout(anchor_x='center', anchor_y='center', size_hint=(1, 0.4))
         
+        # Filled in by refresh_trend() from the ward aggregator: mean heart
+        # rate per minute, with the 10th-90th percentile band around it
         graph = Graph(
-            xlabel='Hour',
+            xlabel='Minute',
             ylabel='Avg. HR',
             x_ticks_minor=1,
             x_ticks_major=2,
@@ -208,7 +322,7 @@ class DoctorDashboardApp(App):
             x_grid=True,
             y_grid=True,
             xmin=0,
-            xmax=11,
+            xmax=TREND_BUCKETS - 1,
             ymin=60,
             ymax=80,
             # Customize colors for the graph background and labels
@@ -217,15 +331,126 @@ class DoctorDashboardApp(App):
             tick_color=[0.5, 0.5, 0.5, 1], # Grey ticks
         )
 
-        overall_plot = MeshLinePlot(color=get_color_from_hex("#F35212")) # Orange line
-        overall_plot.points = overall_trend_data
-        graph.add_plot(overall_plot)
+        self.trend_graph = graph
+        self.trend_band = [MeshLinePlot(color=get_color_from_hex("#F8B195")) for _ in range(2)] # Light orange p10/p90
+        self.trend_plot = MeshLinePlot(color=get_color_from_hex("#F35212")) # Orange line
+        for plot in self.trend_band + [self.trend_plot]:
+            graph.add_plot(plot)
 
         graph_layout.add_widget(graph)
         root_layout.add_widget(graph_layout)
 
+        self.profiler = profiler.install()
         return root_layout
 
+    def on_start(self):
+        self.start_monitoring()
+        self._snapshot_event = Clock.schedule_interval(self.save_snapshot, SNAPSHOT_INTERVAL)
+
+    def on_stop(self):
+        if self._snapshot_event is not None:
+            self._snapshot_event.cancel()
+        self.stop_monitoring()
+        self.save_snapshot(wait=True)
+        self.profiler.stop()
+
+    def start_monitoring(self, source=None, interval=1.0):
+        """
+        Feed the alert engine from `source` (simulated bedside devices by
+        default) and evaluate it every `interval` seconds.
+        """
+        self.stop_monitoring()
+        # (swap in vitals.ingest.LineProtocolSource or vitals.wire.BinaryFrameSource for a real feed)
+        source = source or SimulatedSource(ids=self.alerts.ids.tolist(), rate_hz=1.0 / interval)
+        self.monitor = IngestPipeline(source, max_pending=max(4096, 4 * len(self.alerts)))
+        self.monitor.start()
+        self._alert_event = Clock.schedule_interval(self.evaluate_alerts, interval)
+
+    def stop_monitoring(self):
+        if self._alert_event is not None:
+            self._alert_event.cancel()
+            self._alert_event = None
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor = None
+
+    @profiled("doctor.evaluate_alerts")
+    def evaluate_alerts(self, dt=None):
+        """
+        One alert tick: new readings in, rules over every patient at once,
+        changed statuses out through the status store (one list update per frame).
+        """
+        if self.monitor is not None:
+            readings = self.monitor.drain()
+            self.alerts.ingest_readings(readings)
+            self.ward.add_readings(readings)
+            self.refresh_trend()
+        new_alerts = self.alerts.evaluate()
+        self.recent_alerts.extend(new_alerts)
+        changes = self.alerts.status_changes()
+        if changes:
+            self.statuses.update_many(changes)
+        return new_alerts
+
+    @profiled("doctor.refresh_trend")
+    def refresh_trend(self):
+        """
+        Redraw the trend graph from the aggregator's buckets: reads
+        TREND_BUCKETS summaries, never the readings themselves.
+        """
+        self.trend_plot.points = self.ward.series("mean")
+        low, high = self.ward.series("p10"), self.ward.series("p90")
+        self.trend_band[0].points, self.trend_band[1].points = low, high
+        if low:
+            # Fit the y axis to the band, on multiples of the tick spacing
+            ymin = 5 * math.floor(min(y for x, y in low) / 5)
+            ymax = max(5 * math.ceil(max(y for x, y in high) / 5), ymin + 5)
+            if (self.trend_graph.ymin, self.trend_graph.ymax) != (ymin, ymax):
+                self.trend_graph.ymin, self.trend_graph.ymax = ymin, ymax
+
+    def save_snapshot(self, dt=None, wait=False):
+        """
+        Write the ward snapshot. The rows and alert windows are copied here;
+        the file is written on a job thread unless wait=True.
+        """
+        rows = [self.patients.get(pid) for pid in self.alerts.ids.tolist()]
+        values, count = self.alerts.windows()
+        if wait:
+            write_snapshot(SNAPSHOT_FILE, rows, values, count)
+        else:
+            get_executor().submit(write_snapshot, SNAPSHOT_FILE, rows, values, count,
+                                  on_error=lambda e: Logger.warning(f"Doctor: ward snapshot not saved: {e}"))
+
+    def show_alerts(self, *args):
+        lines = [f"[b]{a.severity}[/b]  patient {a.patient}: {a.rule} ({a.value:.1f})"
+                 for a in reversed(self.recent_alerts)]
+        content = Label(text='\n'.join(lines) or 'No alerts yet', markup=True, halign='left', valign='top')
+        content.bind(size=lambda label, size: setattr(label, 'text_size', size))
+        Popup(title='Recent Alerts', size_hint=(0.8, 0.6), content=content).open()
+
+    def load_patients(self, patients):
+        """
+        Replace the whole patient list (e.g. on ward change) and refresh the header.
+        """
+        self.patients.set_patients(patients)
+        self.alerts.set_patients(self.patients.ids())
+        self.ward.set_patients(self.patients.ids())
+        if self.monitor is not None:
+            self.start_monitoring()
+        self.on_status_changes({}, self.patients.status_counts)
+
+    def on_status_changes(self, changed, counts):
+        """
+        Called once per frame with the coalesced status diff; only touches the
+        header widgets whose numbers actually moved.
+        """
+        active = str(len(self.patients))
+        if self.info_values["Active Patients:"].text != active:
+            self.info_values["Active Patients:"].text = active
+        alerts = f"New Alert ({counts['Critical']})"
+        if self.alert_button.text != alerts:
+            self.alert_button.text = alerts
+
 
 if __name__ == '__main__':
     DoctorDashboardApp().run()
\ No newline at end of file
@@ -0,0 +1,84 @@
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+
+class ScreenScheduler:
+    """
+    Owns the Clock callbacks of one screen.
+
+    Each callback is registered once under a name and backed by a single
+    reusable Clock trigger, so registering the same name again replaces the
+    callback instead of stacking another timer. pause() cancels every
+    trigger (intervals are kept and rescheduled by resume(); pending
+    one-shots are dropped), so a hidden screen costs nothing per frame.
+    """
+
+    def __init__(self):
+        self.active = False
+        self._intervals = {}
+        self._once = {}
+
+    def interval(self, name, callback, timeout):
+        """Call `callback(dt)` every `timeout` seconds while the screen is shown."""
+        self.cancel(name)
+        event = Clock.create_trigger(callback, timeout, interval=True)
+        self._intervals[name] = event
+        if self.active:
+            event()
+        return event
+
+    def once(self, name, callback, timeout=0):
+        """Call `callback(dt)` once after `timeout`, unless paused first."""
+        event = self._once.get(name)
+        if event is None or event.get_callback() != callback or event.timeout != timeout:
+            self.cancel(name)
+            event = self._once[name] = Clock.create_trigger(callback, timeout)
+        event()
+        return event
+
+    def cancel(self, name):
+        for events in (self._intervals, self._once):
+            event = events.pop(name, None)
+            if event is not None:
+                event.cancel()
+
+    def pause(self):
+        self.active = False
+        for event in self._intervals.values():
+            event.cancel()
+        for event in self._once.values():
+            event.cancel()
+
+    def resume(self):
+        self.active = True
+        for event in self._intervals.values():
+            event()
+
+    def clear(self):
+        self.pause()
+        self._intervals.clear()
+        self._once.clear()
+
+    @property
+    def scheduled(self):
+        """Number of this screen's callbacks currently queued on the Clock."""
+        return sum(1 for events in (self._intervals, self._once)
+                   for event in events.values() if event.is_triggered)
+
+
+class ManagedScreen(Screen):
+    """
+    Screen whose Clock callbacks run only while it is shown. Schedule through
+    `self.clock` instead of the global Clock; subclasses overriding
+    on_enter / on_leave must call super().
+    """
+
+    def __init__(self, **kwargs):
+        self.clock = ScreenScheduler()
+        super().__init__(**kwargs)
+
+    def on_enter(self):
+        self.clock.resume()
+
+    def on_leave(self):
+        self.clock.pause()
@@ -1,73 +1,84 @@
 import sqlite3
-import random
 from kivy.uix.screenmanager import Screen
 from kivy.uix.popup import Popup
 from kivy.uix.label import Label
-from kivy.properties import StringProperty
-from kivy.uix.textinput import TextInput
+from kivy.uix.button import Button
+from kivy.uix.boxlayout import BoxLayout
+from kivy.properties import BooleanProperty
+from kivy.clock import Clock
 
+from services.auth import get_auth
+from services.jobs import get_executor
+from services import profiling
+from services.otp import RateLimited
+from services.users import normalize_aadhaar
+#! Imported so login.kv can use them
+from screens.masked_input import AadhaarInput, OtpDigitInput, PhoneInput
 
-class AadhaarInput(TextInput):
-    def insert_text(self, substring, from_undo=False):
-        # Only digits allowed, combine existing and new input
-        s = ''.join(filter(str.isdigit, self.text + substring))
-
-        # Restrict max 12 digits
-        if len(s) > 12:
-            s = s[:12]
-
-        # Insert dash after every 4 digits
-        groups = [s[i:i+4] for i in range(0, len(s), 4)]
-        s = '-'.join(groups)
-
-        # Update text and cursor position
-        self.text = s
-        self.cursor = (len(self.text), 0)
+#! Only show the busy popup if a job takes longer than this (seconds),
+#! so fast queries don't flash a dialog
+BUSY_POPUP_DELAY = 0.15
 
 
 class LoginSignupScreen(Screen):
-    temp_otp = StringProperty('')
+    busy = BooleanProperty(False)
     current_reset_adhar = ''  # Track Aadhaar for resetting password
+    current_reset_token = None  # Proof of the verified OTP, used up by the reset
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.auth = get_auth()
+        self.jobs = get_executor()
+        self._job = None
+        self._busy_popup = None
+        self._busy_event = None
         self.create_users_table()
 
     def create_users_table(self):
-        conn = sqlite3.connect("users.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                email TEXT,
-                aadhaar TEXT UNIQUE,
-                phone TEXT,
-                password TEXT,
-                role TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
-
-    def on_otp_text(self, instance, value):
-        if len(value) > 1:
-            instance.text = value[:1]
-
-        if len(instance.text) == 1:
-            try:
-                current_id = instance.id  # eg otp1
-                next_index = int(current_id[-1]) + 1
-                next_id = f'otp{next_index}'
-                if next_id in self.ids:
-                    self.ids[next_id].focus = True
-            except Exception:
-                pass
+        self.auth.create_tables()
+
+    # Background work: DB / auth calls run off the UI thread and the
+    # callbacks are delivered back on the main thread
+    def run_in_background(self, fn, *args, on_success=None, on_error=None, message="Please wait..."):
+        if self.busy:
+            return None
+        self.busy = True
+        self._busy_event = Clock.schedule_once(lambda dt: self.show_busy(message), BUSY_POPUP_DELAY)
+        fn = profiling.wrap(f"db.{getattr(fn, '__name__', 'job')}", fn)
+        self._job = job = self.jobs.submit(fn, *args, on_success=on_success, on_error=on_error,
+                                           on_finish=lambda: self.hide_busy(job))
+        return job
+
+    def cancel_job(self, *args):
+        if self._job is not None:
+            self._job.cancel()
+        self.hide_busy()
+
+    def show_busy(self, message):
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        content.add_widget(Label(text=message))
+        content.add_widget(Button(text="Cancel", size_hint_y=None, height=40, on_release=self.cancel_job))
+        self._busy_popup = Popup(title="Working", content=content,
+                                 size_hint=(0.6, 0.4), auto_dismiss=False)
+        self._busy_popup.open()
+
+    def hide_busy(self, job=None):
+        # A job that is no longer the current one must not end the busy state
+        if job is not None and job is not self._job:
+            return
+        if self._busy_event is not None:
+            self._busy_event.cancel()
+            self._busy_event = None
+        if self._busy_popup is not None:
+            self._busy_popup.dismiss()
+            self._busy_popup = None
+        self._job = None
+        self.busy = False
 
     # Login
     def validate_login(self):
         # Remove dashes and spaces from Aadhaar number before validation
-        adhar = self.ids.adhar_input.text.strip().replace("-", "").replace(" ", "")
+        adhar = normalize_aadhaar(self.ids.adhar_input.text)
         password = self.ids.password_input.text.strip()
         role = self.ids.role_spinner.text.strip()
 
@@ -75,16 +86,19 @@ class LoginSignupScreen(Screen):
             self.show_popup("Error", "Please fill all details and select a valid role.")
             return
 
-        conn = sqlite3.connect("users.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE aadhaar=? AND password=? AND role=?", (adhar, password, role))
-        result = cursor.fetchone()
-        
+        self.run_in_background(self.auth.sign_in, adhar, password, role,
+                               on_success=self.on_login_result,
+                               on_error=lambda e: self.show_popup("Error", f"Login failed: {e}"),
+                               message="Logging in...")
+
+    def on_login_result(self, result):
         if result is None:
             self.show_popup("Error", "User not found.")
         else:
-            stored_password, stored_role = result
-            if stored_password == password:
+            password_ok, stored_role, token = result
+            if password_ok:
+                # Later screens check permissions against the session, not users.db
+                self.manager.session = token or ''
             # Role based screen redirection with typical permissions
                 stored_role_lower = stored_role.lower()
                 if stored_role_lower == 'patient':
@@ -100,14 +114,12 @@ class LoginSignupScreen(Screen):
             else:
                 self.show_popup("Error", "Incorrect password.")
 
-        conn.close()
-
     # Signup
     def validate_signup(self):
         name = self.ids.name_input.text.strip()
         email = self.ids.email_input.text.strip()
-        adhar = self.ids.signup_adhar_input.text.strip().replace("-", "").replace(" ", "")
-        phone = self.ids.phone_input.text.strip()
+        adhar = normalize_aadhaar(self.ids.signup_adhar_input.text)
+        phone = self.ids.phone_input.digits
         password = self.ids.signup_password_input.text.strip()
         role = self.ids.signup_role_spinner.text.strip()
 
@@ -115,53 +127,69 @@ class LoginSignupScreen(Screen):
             self.show_popup("Error", "All fields are required, and a valid role must be selected.")
             return
 
-        try:
-            conn = sqlite3.connect("users.db")
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO users (name, email, aadhaar, phone, password, role)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (name, email, adhar, phone, password, role))
-            conn.commit()
-            conn.close()
-            self.show_popup("Success", "Signup successful! Please login.")
-            self.screen_switch('login_view')
-        except sqlite3.IntegrityError:
+        self.run_in_background(self.auth.signup, name, email, adhar, phone, password, role,
+                               on_success=self.on_signup_done,
+                               on_error=self.on_signup_error,
+                               message="Creating account...")
+
+    def on_signup_done(self, result):
+        self.show_popup("Success", "Signup successful! Please login.")
+        self.screen_switch('login_view')
+
+    def on_signup_error(self, e):
+        if isinstance(e, sqlite3.IntegrityError):
             self.show_popup("Error", "Aadhaar already registered.")
-        except Exception as e:
+        else:
             self.show_popup("Error", f"Signup failed: {e}")
 
     # Send OTP for forgot password with Aadhaar existence check
     def send_otp(self):
-        adhar = self.ids.forgot_adhar_input.text.strip().replace("-", "").replace(" ", "")
+        adhar = normalize_aadhaar(self.ids.forgot_adhar_input.text)
         if not adhar:
             self.show_popup("Error", "Please enter Aadhaar number.")
             return
 
-        # Check if Aadhaar exists in database before sending OTP
-        conn = sqlite3.connect("users.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE aadhaar=?", (adhar,))
-        user = cursor.fetchone()
-        conn.close()
+        # Issue a code only if the Aadhaar is registered (checked in the background)
+        self.run_in_background(self.auth.request_otp, adhar,
+                               on_success=self.on_otp_sent,
+                               on_error=self.on_otp_error,
+                               message="Checking Aadhaar...")
 
-        if not user:
+    def on_otp_sent(self, code):
+        if code is None:
             self.show_popup("Error", "Aadhaar not found. Please check and try again.")
             return
 
-        self.temp_otp = str(random.randint(1000, 9999))
-        self.ids.otp_notice.text = f"(Test OTP: {self.temp_otp})"
-        self.show_popup("OTP Generated", "Check OTP displayed below and enter to verify.")
+        if code:
+            self.ids.otp_notice.text = f"(Test OTP: {code})"
+            self.show_popup("OTP Generated", "Check OTP displayed below and enter to verify.")
+        else:
+            self.ids.otp_notice.text = ""
+            self.show_popup("OTP Sent", "Enter the OTP sent to your registered phone.")
+
+    def on_otp_error(self, e):
+        if isinstance(e, RateLimited):
+            self.show_popup("Error", str(e))
+        else:
+            self.show_popup("Error", f"Failed to send OTP: {e}")
 
     # Verify OTP and go to reset password
     def verify_otp(self):
+        adhar = normalize_aadhaar(self.ids.forgot_adhar_input.text)
         entered_otp = ''.join([self.ids[f'otp{i}'].text for i in range(1, 5)])
-        if entered_otp == self.temp_otp:
+        self.run_in_background(self.auth.verify_otp, adhar, entered_otp,
+                               on_success=lambda token: self.on_otp_verified(adhar, token),
+                               on_error=lambda e: self.show_popup("Error", f"Failed to verify OTP: {e}"),
+                               message="Verifying OTP...")
+
+    def on_otp_verified(self, adhar, token):
+        if token:
             self.show_popup("Success", "OTP verified. Please reset your password.")
-            self.current_reset_adhar = self.ids.forgot_adhar_input.text.strip().replace("-", "").replace(" ", "")
+            self.current_reset_adhar = adhar
+            self.current_reset_token = token
             self.screen_switch("reset_password_view")
         else:
-            self.show_popup("Error", "Incorrect OTP.")
+            self.show_popup("Error", "Incorrect or expired OTP.")
 
     # Reset password logic
     def reset_password(self):
@@ -176,19 +204,19 @@ class LoginSignupScreen(Screen):
             self.show_popup("Error", "Passwords do not match.")
             return
 
-        try:
-            conn = sqlite3.connect("users.db")
-            cursor = conn.cursor()
-            cursor.execute("UPDATE users SET password=? WHERE aadhaar=?", (new_password, self.current_reset_adhar))
-            conn.commit()
-            conn.close()
-            self.show_popup("Success", "Password reset successfully. Please login.")
-            self.screen_switch("login_view")
-            # Clear password fields after reset
-            self.ids.new_password_input.text = ""
-            self.ids.confirm_password_input.text = ""
-        except Exception as e:
-            self.show_popup("Error", f"Failed to reset password: {e}")
+        self.run_in_background(self.auth.reset_password, self.current_reset_adhar, new_password,
+                               self.current_reset_token,
+                               on_success=self.on_password_reset,
+                               on_error=lambda e: self.show_popup("Error", f"Failed to reset password: {e}"),
+                               message="Resetting password...")
+
+    def on_password_reset(self, result):
+        self.current_reset_token = None
+        self.show_popup("Success", "Password reset successfully. Please login.")
+        self.screen_switch("login_view")
+        # Clear password fields after reset
+        self.ids.new_password_input.text = ""
+        self.ids.confirm_password_input.text = ""
 
     # Screen switch helper
     def screen_switch(self, target):
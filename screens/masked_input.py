@@ -0,0 +1,146 @@
+"""
+Digit-only TextInputs with a fixed-group mask (Aadhaar, phone, OTP).
+
+Edits are applied where the cursor is rather than at the end: the digits
+either side of the cursor are kept, the new ones are spliced in and the
+result is regrouped. A field never holds more than max_digits digits, so
+each keystroke does a bounded amount of work, and a paste stops reading
+as soon as the field is full. Every edit assigns `text` once, so a paste
+costs one reflow however long it is.
+
+Backspace and Delete step over separators, and deleting a selection
+regroups what is left.
+"""
+from kivy.properties import NumericProperty, StringProperty
+from kivy.uix.textinput import TextInput
+
+
+def take_digits(substring, room):
+    """
+    Up to `room` ASCII digits from substring, and the index just past the
+    last one used, so callers can hand the rest on.
+    """
+    if room <= 0:
+        return "", 0
+    taken = []
+    for index, ch in enumerate(substring):
+        if "0" <= ch <= "9":
+            taken.append(ch)
+            if len(taken) == room:
+                return "".join(taken), index + 1
+    return "".join(taken), len(substring)
+
+
+def _only_digits(text):
+    return "".join(ch for ch in text if "0" <= ch <= "9")
+
+
+class MaskedInput(TextInput):
+    max_digits = NumericProperty(12)
+    #! Digits per group; 0 means no separators
+    group = NumericProperty(0)
+    separator = StringProperty("-")
+
+    @property
+    def digits(self):
+        return _only_digits(self.text)
+
+    def format(self, digits):
+        group = int(self.group)
+        if not group:
+            return digits
+        return self.separator.join(digits[i:i + group] for i in range(0, len(digits), group))
+
+    def _text_index(self, digit_index, count):
+        """Text position of the slot before digit `digit_index` of `count`."""
+        group = int(self.group)
+        if not group or not digit_index:
+            return digit_index
+        # Inside the text the cursor goes after a separator, at the end before none
+        return digit_index + (digit_index // group if digit_index < count else (digit_index - 1) // group)
+
+    def _state(self):
+        """(text, its digits, digits before the cursor); TextInput rebuilds text on every read."""
+        text = self.text
+        return text, _only_digits(text), len(_only_digits(text[:self.cursor_index()]))
+
+    def _apply(self, old_text, digits, digit_index):
+        text = self.format(digits)
+        if text != old_text:
+            self.text = text
+        self.cursor = (self._text_index(digit_index, len(digits)), 0)
+
+    def insert_text(self, substring, from_undo=False):
+        """
+        Splice the digits of substring in at the cursor. Returns the part of
+        substring that didn't fit (after the last digit taken).
+        """
+        text, current, at = self._state()
+        added, used = take_digits(substring, int(self.max_digits) - len(current))
+        if added:
+            self._apply(text, current[:at] + added + current[at:], at + len(added))
+        return substring[used:]
+
+    def do_backspace(self, from_undo=False, mode='bkspc'):
+        if self.readonly:
+            return
+        text, current, at = self._state()
+        index = self.cursor_index()
+        if mode == 'del' and index and text[index - 1] == self.separator:
+            # Delete moved the cursor over a separator: remove the digit after it
+            if at < len(current):
+                self._apply(text, current[:at] + current[at + 1:], at)
+            return
+        if not at:
+            return
+        self._apply(text, current[:at - 1] + current[at:], at - 1)
+
+    def delete_selection(self, from_undo=False):
+        if not self._selection:
+            return
+        super().delete_selection(from_undo)
+        text, current, at = self._state()
+        self._apply(text, current, at)
+
+
+class AadhaarInput(MaskedInput):
+    """12 digits shown as 1234-5678-9012."""
+    max_digits = NumericProperty(12)
+    group = NumericProperty(4)
+    separator = StringProperty("-")
+
+
+class PhoneInput(MaskedInput):
+    """10-digit mobile number shown as 98765 43210; read it with .digits."""
+    max_digits = NumericProperty(10)
+    group = NumericProperty(5)
+    separator = StringProperty(" ")
+
+
+class OtpDigitInput(MaskedInput):
+    """
+    One box of a code entry row. Chain the boxes with focus_next /
+    focus_previous: a filled box moves focus on, digits that don't fit
+    (typed or pasted) go to the next box, and backspace in an empty box
+    goes back and clears the previous one.
+    """
+    max_digits = NumericProperty(1)
+    group = NumericProperty(0)
+
+    def insert_text(self, substring, from_undo=False):
+        rest = super().insert_text(substring, from_undo)
+        following = self.focus_next
+        if len(self.text) >= self.max_digits and isinstance(following, OtpDigitInput):
+            following.focus = True
+            if rest:
+                following.cursor = (len(following.text), 0)
+                return following.insert_text(rest, from_undo)
+        return rest
+
+    def do_backspace(self, from_undo=False, mode='bkspc'):
+        previous = self.focus_previous
+        if not self.text and mode == 'bkspc' and isinstance(previous, OtpDigitInput):
+            previous.focus = True
+            previous.text = ""
+            return
+        super().do_backspace(from_undo, mode)
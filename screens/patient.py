@@ -1,14 +1,14 @@
 import kivy
 import os
-import random  # Import random to simulate changing vitals
+import time
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.widget import Widget
-from kivy.properties import StringProperty, ColorProperty
+from kivy.uix.screenmanager import ScreenManager
+from kivy.properties import StringProperty, ColorProperty, NumericProperty
 from kivy.lang import Builder
+from kivy.logger import Logger
 from kivy.utils import get_color_from_hex
-from kivy.clock import Clock
-from kivy.uix.screenmanager import Screen
 
 # --- Import Kivy Garden Graph ---
 # Ensure these are installed: pip install kivy-garden && kivy garden install graph
@@ -19,8 +19,26 @@ except ImportError:
     print("Run: pip install kivy-garden && kivy garden install graph")
     exit(1)
 
+from vitals.buffer import VitalsBuffer
+from vitals.plot import RingLinePlot
+from vitals.ingest import IngestPipeline, Reading, SimulatedSource
+from vitals.snapshot import SNAPSHOT_FILE, load_snapshot
+from vitals.store import VitalsStore, BatchWriter
+from services.jobs import get_executor
+from services.profiling import profiled
+from services.api_client import RemoteVitals, api_url, get_client
+from screens.lifecycle import ManagedScreen
+from screens.render import RenderScheduler
+
 kivy.require('2.1.0')
 
+#! Readout text per metric (VitalBox ids are "<metric>_box"); a box is only
+#! re-rendered when this text changes. BP keeps its KV text: the feed carries systolic only.
+VITAL_FORMATS = {"hr": "{:.0f}", "spo2": "{:.0f}", "temp": "{:.1f}"}
+#! Seconds between re-checks of the signed-in session while the screen is shown,
+#! so a reset or deletion elsewhere signs the patient out
+SESSION_CHECK = 30.0
+
 class VitalBox(BoxLayout):
     """
     Custom Widget for the colored vital statistics boxes.
@@ -31,61 +49,165 @@ class VitalBox(BoxLayout):
     unit = StringProperty('')
     box_color = ColorProperty((0, 0, 0, 1))
 
-from kivy.clock import Clock
-class PatientScreen(Screen):
+class PatientScreen(ManagedScreen):
     """
     Root Widget for the Dashboard.
     """
+    # Number of samples kept per metric (12 up to a day at 1 Hz)
+    window = NumericProperty(12)
+    # How often queued readings are pulled into the graph, whatever the feed rate
+    redraw_hz = NumericProperty(10)
+    # Upper bound on graph / readout redraws per second, however fast data arrives
+    max_fps = NumericProperty(30)
+    patient_id = NumericProperty(0)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Every reading is also persisted in batches, to vitals.db or through
+        # the API server when one is configured
+        self.history = RemoteVitals(get_client()) if api_url() else VitalsStore()
+        self.writer = BatchWriter(self.history).start()
+        # Local simulator until a device gateway is configured
+        # (swap in vitals.ingest.LineProtocolSource or vitals.wire.BinaryFrameSource for a real feed)
+        self.ingest = IngestPipeline(SimulatedSource(patients=1, rate_hz=1.0),
+                                     sinks=[self.writer.offer])
+        # Plots are built on the first visit and reused on every later one
+        self.vitals = None
+        # Plot redraws and readout changes are batched into one flush per frame
+        self.render = RenderScheduler(self.max_fps)
+        self.bind(max_fps=lambda screen, fps: setattr(self.render, 'max_fps', fps))
+
     def on_enter(self):
-        # Wait until the screen is actually entered/visible
-        self.setup_graph()
-        # We delay graph setup slightly to ensure the KV layout is fully loaded
-        Clock.schedule_once(self.setup_graph, 0)
+        # Resumes the redraw interval if the graph was set up on an earlier visit
+        super().on_enter()
+        if getattr(self.manager, "session", ""):
+            self.clock.interval("check_session", self.check_session, SESSION_CHECK)
+        if self.vitals is None:
+            # We delay graph setup slightly to ensure the KV layout is fully loaded
+            self.clock.once("setup_graph", self.setup_graph, 0)
+
+    def check_session(self, dt):
+        """Re-check the session off the UI thread (a profile reload may hit users.db)."""
+        # Imported here: only needed when the manager tracks a session
+        from services.sessions import get_sessions
+        token = self.manager.session
+        get_executor().submit(get_sessions().authorize, token, "Patient",
+                              on_success=lambda ok: self.session_checked(token, ok))
+
+    def session_checked(self, token, ok):
+        manager = self.manager
+        if not ok and manager is not None and manager.session == token:
+            Logger.warning("PatientScreen: session ended, signing out")
+            manager.sign_out()
 
     def setup_graph(self, dt):
         """
-        Initializes the graph data and adds plots.
+        Initializes the graph data and adds plots. Runs once per screen.
         """
+        if self.vitals is not None:
+            return
         # Access the graph widget defined in KV using its ID
         graph = self.ids.vitals_graph
+        window = int(self.window)
+        graph.xmax = window - 1
+        graph.x_ticks_major = max(2, window // 6)   # keep ~6 labels whatever the window
+
+        # Ring buffers hold the samples; the plots read them without copying
+        self.vitals = VitalsBuffer(("hr", "bp"), window)
 
         # 1. Heart Rate Plot (Red)
         # We store it as 'self.hr_plot' so we can update it later
-        self.hr_plot = MeshLinePlot(color=get_color_from_hex("#E74C3C"))
-        self.hr_plot.points = [(i, random.randint(70, 85)) for i in range(12)]
-        
+        self.hr_plot = RingLinePlot(self.vitals["hr"], color=get_color_from_hex("#E74C3C"))
+
         # 2. Blood Pressure Plot (Blue)
         # We store it as 'self.bp_plot' so we can update it later
-        self.bp_plot = MeshLinePlot(color=get_color_from_hex("#3498DB"))
-        self.bp_plot.points = [(i, random.randint(110, 130)) for i in range(12)]
+        self.bp_plot = RingLinePlot(self.vitals["bp"], color=get_color_from_hex("#3498DB"))
 
         # Add plots to the graph
         graph.add_plot(self.hr_plot)
         graph.add_plot(self.bp_plot)
 
+        # Show the last ward snapshot at once; stored history (loaded off the
+        # UI thread) replaces it, then the screen goes live
+        self.load_snapshot()
+        now = time.time()
+        get_executor().submit(self.history.history, self.patient_id, now - window, now, window,
+                              on_success=self.load_history,
+                              on_finish=self.start_updates)
+
+    def load_snapshot(self):
+        """Patient details and recent vitals from the ward snapshot, if it has this patient."""
+        snapshot = load_snapshot(SNAPSHOT_FILE)
+        i = snapshot.index(self.patient_id) if snapshot is not None else -1
+        if i < 0:
+            return
+        patient = snapshot.row(i)
+        for key, field in (("name_value", "name"), ("room_value", "room"), ("condition_value", "status")):
+            label = self.ids.get(key)
+            if label is not None and patient[field]:
+                label.text = patient[field]
+        recent = snapshot.recent(self.patient_id)
+        for hr, bp in zip(recent["hr"].tolist(), recent["bp"].tolist()):
+            self.vitals.append(hr=hr, bp=bp)
+        if len(recent["hr"]):
+            self.show_vitals(Reading(self.patient_id, snapshot.written,
+                                     *(float(recent[metric][-1]) for metric in Reading._fields[2:])))
+            self.render.request_draw(self.hr_plot, self.bp_plot)
+
+    def load_history(self, rows):
+        if rows:
+            # History is the authority; drop what the snapshot filled in
+            for metric in ("hr", "bp"):
+                self.vitals[metric].clear()
+        for _ts, hr, bp, _spo2, _temp in rows[-int(self.window):]:
+            self.vitals.append(hr=hr, bp=bp)
+        self.render.request_draw(self.hr_plot, self.bp_plot)
+
+    def start_updates(self):
         # --- START DYNAMIC UPDATES ---
-        # Call self.update_graph every 1.0 second
-        Clock.schedule_interval(self.update_graph, 1.0)
+        # Readings arrive on a background thread; self.update_graph pulls them
+        # in at a fixed redraw rate while the screen is shown. The feed keeps
+        # running (and persisting) while it is hidden; the pipeline's bounded
+        # queue drops the oldest readings until the next visit drains it.
+        if not self.ingest.running:
+            self.ingest.start()
+        self.clock.interval("update_graph", self.update_graph, 1.0 / self.redraw_hz)
 
+    @profiled("patient.update_graph")
     def update_graph(self, dt):
         """
-        Called every second by the Clock.
-        It shifts data to the left and adds a new random point at the end.
+        Called redraw_hz times a second by the Clock.
+        Appends the readings that arrived since the last call; the ring buffer
+        drops the oldest.
         """
-        
-        # --- Update Heart Rate ---
-        # 1. Extract just the Y values (heart rates) from the current points
-        current_hr_y = [point[1] for point in self.hr_plot.points]
-        # 2. Remove the first (oldest) value and add a new random value at the end
-        new_hr_y = current_hr_y[1:] + [random.randint(70, 90)]
-        # 3. Rebuild the list of (x, y) tuples. 'i' is the X axis (0 to 11)
-        self.hr_plot.points = [(i, y) for i, y in enumerate(new_hr_y)]
-
-        # --- Update Blood Pressure ---
-        # Same logic as above
-        current_bp_y = [point[1] for point in self.bp_plot.points]
-        new_bp_y = current_bp_y[1:] + [random.randint(115, 135)]
-        self.bp_plot.points = [(i, y) for i, y in enumerate(new_bp_y)]
+        readings = self.ingest.drain()
+        latest = None
+        for reading in readings:
+            if reading.patient == self.patient_id:
+                self.vitals.append(hr=reading.hr, bp=reading.bp)
+                latest = reading
+        if latest is None:
+            return
+
+        # Redraw both plots from the buffers and update the readouts, all in
+        # the scheduler's next flush
+        self.render.request_draw(self.hr_plot, self.bp_plot)
+        self.show_vitals(latest)
+
+    def show_vitals(self, reading):
+        """Queue the VitalBox readouts for `reading`; unchanged (rounded) values are skipped."""
+        for metric, fmt in VITAL_FORMATS.items():
+            box = self.ids.get(f"{metric}_box")
+            if box is not None:
+                self.render.set_value(box, fmt.format(getattr(reading, metric)))
+
+    def shutdown(self):
+        # Stop the feed and flush pending readings to vitals.db
+        self.clock.clear()
+        self.render.cancel()
+        self.ingest.stop()
+        self.writer.stop()
+        self.history.close()
 
 class PatientDashboardApp(App):
     def build(self):
@@ -100,5 +222,7 @@ class PatientDashboardApp(App):
             print("Please create a folder named 'kv' and place 'patient.kv' inside it.\n")
             exit(1)
 
-        return PatientDashboard()
+        sm = ScreenManager()
+        sm.add_widget(PatientScreen(name="patient"))
+        return sm
 
@@ -0,0 +1,115 @@
+"""
+On-screen profiler overlay.
+
+F12 toggles profiling together with the overlay; Shift+F12 writes the
+metrics to HEALTHCARE_PROFILE_EXPORT (or profile-<time>.json in the working
+directory). Starting the app with HEALTHCARE_PROFILE=1 shows the overlay
+from the first frame, and with HEALTHCARE_PROFILE_EXPORT set the metrics
+are also written when the app stops.
+"""
+import time
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.logger import Logger
+from kivy.uix.label import Label
+
+from services import profiling
+
+TOGGLE_KEY = 293        # F12
+REFRESH_SECONDS = 0.5
+TOP_METRICS = 6
+
+
+class ProfilerOverlay(Label):
+    """Frame-time and hot-path summary drawn over whatever screen is shown."""
+
+    def __init__(self, **kwargs):
+        super().__init__(font_size='11sp', color=(1, 1, 1, 1), halign='left', valign='top',
+                         size_hint=(None, None), **kwargs)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.65)
+            self._background = Rectangle()
+        self.bind(texture_size=self._fit)
+
+    def _fit(self, *args):
+        self.size = self.texture_size
+        self.pos = (0, Window.height - self.height)
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def refresh(self, *args):
+        metrics = profiling.registry.snapshot()
+        frame = metrics.pop(profiling.FRAME, None)
+        lines = []
+        if frame and frame["mean_ms"]:
+            lines.append(f"fps {1000 / frame['mean_ms']:.1f}  frame p50 {frame['p50_ms']:.1f} "
+                         f"p95 {frame['p95_ms']:.1f} max {frame['max_ms']:.1f} ms")
+        top = sorted(metrics.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:TOP_METRICS]
+        for name, m in top:
+            lines.append(f"{name}  n={m['count']}  mean {m['mean_ms']:.2f}  p95 {m['p95_ms']:.2f} ms")
+        self.text = "\n".join(lines) or "profiling..."
+        self._fit()
+
+
+class Profiler:
+    """Keyboard toggle, overlay and frame monitor for one app."""
+
+    def __init__(self):
+        self.overlay = ProfilerOverlay()
+        self.frames = profiling.FrameMonitor()
+        self._refresh = None
+
+    @property
+    def visible(self):
+        return self._refresh is not None
+
+    def show(self):
+        profiling.enable()
+        self.frames.start()
+        if self._refresh is None:
+            Window.add_widget(self.overlay)
+            self._refresh = Clock.schedule_interval(self.overlay.refresh, REFRESH_SECONDS)
+
+    def hide(self):
+        profiling.disable()
+        self.frames.stop()
+        if self._refresh is not None:
+            self._refresh.cancel()
+            self._refresh = None
+            Window.remove_widget(self.overlay)
+
+    def toggle(self):
+        self.hide() if self.visible else self.show()
+
+    def export(self, path=None):
+        path = path or profiling.export_path() or f"profile-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        return profiling.export(path)
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key != TOGGLE_KEY:
+            return False
+        if "shift" in modifiers:
+            Logger.info(f"Profiler: profile written to {self.export()}")
+        else:
+            self.toggle()
+        return True
+
+    def stop(self):
+        """Call from App.on_stop."""
+        Window.unbind(on_key_down=self._on_key_down)
+        self.frames.stop()
+        if profiling.enabled() and profiling.export_path():
+            self.export()
+
+
+def install():
+    """
+    Hook the profiler into the running app's window. Call from App.build().
+    """
+    profiler = Profiler()
+    Window.bind(on_key_down=profiler._on_key_down)
+    if profiling.enabled():
+        profiler.show()
+    return profiler
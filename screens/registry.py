@@ -0,0 +1,128 @@
+import importlib
+import threading
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.logger import Logger
+from kivy.properties import BooleanProperty, StringProperty
+from kivy.uix.screenmanager import ScreenManager
+
+#! name -> (module, screen class, KV file). Nothing here is imported or parsed
+#! until the screen is first navigated to (or preloaded).
+SCREENS = {
+    "login": ("screens.login", "LoginSignupScreen", "kv/login.kv"),
+    "patient": ("screens.patient", "PatientScreen", "kv/patient.kv"),
+    #"doctor": ("screens.doctor", "DoctorScreen", "kv/doctor.kv"),
+}
+
+#! Screens that need a live session, and the roles allowed on each (as
+#! LoginSignupScreen redirects to them). Navigating to one without such a
+#! session goes back to the login screen.
+PROTECTED = {
+    "patient": ("Patient",),
+    "doctor": ("Doctor",),
+    "admin": ("Admin",),
+    "dashboard": ("User",),
+}
+
+
+class LazyScreenManager(ScreenManager):
+    """
+    ScreenManager that builds registered screens on first use.
+
+    preload() imports the screen modules on a background thread (the slow,
+    thread-safe part) and then loads each KV file and creates each screen on
+    the main thread, one per frame, so the splash animation keeps running.
+    `ready` turns True once every requested screen exists.
+
+    Screens in PROTECTED are only shown while `session` is a live token of
+    one of their roles (checked against services.sessions on every visit).
+    """
+    ready = BooleanProperty(False)
+    #! Token of the signed-in user (services.sessions); '' when signed out
+    session = StringProperty('')
+
+    def __init__(self, registry=None, **kwargs):
+        super().__init__(**kwargs)
+        self.registry = dict(SCREENS if registry is None else registry)
+        self._kv_loaded = set()
+
+    def authorized(self, *roles):
+        """True if the signed-in session is live and has one of roles (any role if none given)."""
+        if not self.session:
+            return False
+        # Imported here: the sessions / users.db stack stays off the startup path
+        from services.sessions import get_sessions
+        return get_sessions().authorize(self.session, *roles)
+
+    def sign_out(self):
+        """End the session (if any) and go back to the login screen."""
+        if self.session:
+            from services.sessions import get_sessions
+            get_sessions().end(self.session)
+            self.session = ''
+        if self.current != "login" and self.has_screen("login"):
+            self.current = "login"
+
+    def on_current(self, instance, value):
+        roles = PROTECTED.get(value)
+        if roles is not None and not self.authorized(*roles):
+            Logger.warning(f"LazyScreenManager: {value} needs a signed-in {'/'.join(roles)}")
+            self.sign_out()
+            return
+        super().on_current(instance, value)
+
+    def is_loaded(self, name):
+        return super().has_screen(name)
+
+    def has_screen(self, name):
+        return self.is_loaded(name) or name in self.registry
+
+    def get_screen(self, name):
+        # ScreenManager.on_current goes through here, so navigating to a
+        # registered screen that doesn't exist yet builds it on the spot
+        if not self.is_loaded(name) and name in self.registry:
+            self.load_screen(name)
+        return super().get_screen(name)
+
+    def load_screen(self, name):
+        module_name, class_name, kv_file = self.registry[name]
+        module = importlib.import_module(module_name)
+        if kv_file and kv_file not in self._kv_loaded:
+            Builder.load_file(kv_file)
+            self._kv_loaded.add(kv_file)
+        screen = getattr(module, class_name)(name=name)
+        self.add_widget(screen)
+        return screen
+
+    def preload(self, names=None):
+        """
+        Build the given screens (all registered ones by default) in the background.
+        """
+        names = [name for name in (names or self.registry) if not self.is_loaded(name)]
+        if not names:
+            self.ready = True
+            return
+
+        def import_modules():
+            for name in names:
+                try:
+                    importlib.import_module(self.registry[name][0])
+                except Exception as e:
+                    # Surfaces again (on the main thread) when the screen is built
+                    Logger.warning(f"LazyScreenManager: preloading {name} failed: {e}")
+            Clock.schedule_once(lambda dt: build_next(list(names)))
+
+        def build_next(remaining):
+            name = remaining.pop(0)
+            if not self.is_loaded(name):
+                try:
+                    self.load_screen(name)
+                except Exception as e:
+                    Logger.exception(f"LazyScreenManager: building {name} failed: {e}")
+            if remaining:
+                Clock.schedule_once(lambda dt: build_next(remaining))
+            else:
+                self.ready = True
+
+        threading.Thread(target=import_modules, name="screen-preload", daemon=True).start()
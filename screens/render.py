@@ -0,0 +1,73 @@
+"""
+Frame-coalesced redraws for graph plots and vital readouts.
+
+Producers call request_draw(plot) and set_value(box, text) as often as
+data arrives; RenderScheduler applies everything pending in a single
+flush, at most max_fps times a second. A plot is drawn once per flush
+however many samples arrived in between, and a widget's `value` is only
+assigned when the text it would show changes, so a reading that rounds
+to what is already on screen costs no label re-layout or texture.
+"""
+from kivy.clock import Clock
+
+from services.profiling import section
+
+
+class RenderScheduler:
+    def __init__(self, max_fps=30):
+        #! 0 means no cap: flush on the next frame
+        self.max_fps = max_fps
+        self._plots = {}        # insertion-ordered set
+        self._values = {}
+        self._event = None
+        self._last = None
+        self.flushes = 0
+        self.draws = 0
+        self.skipped = 0        # value updates that didn't change the text
+
+    def request_draw(self, *plots):
+        for plot in plots:
+            self._plots[plot] = None
+        self._schedule()
+
+    def set_value(self, widget, text):
+        if widget not in self._values and widget.value == text:
+            self.skipped += 1
+            return
+        self._values[widget] = text
+        self._schedule()
+
+    def _schedule(self):
+        if self._event is not None:
+            return
+        wait = 0
+        if self.max_fps and self._last is not None:
+            wait = max(0, self._last + 1.0 / self.max_fps - Clock.time())
+        self._event = Clock.schedule_once(self.flush, wait)
+
+    def flush(self, dt=None):
+        """Draw the requested plots and apply changed values; safe to call directly."""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._last = Clock.time()
+        plots, self._plots = self._plots, {}
+        values, self._values = self._values, {}
+        with section("render.flush"):
+            for plot in plots:
+                plot.draw()
+            for widget, text in values.items():
+                if widget.value != text:
+                    widget.value = text
+                else:
+                    self.skipped += 1
+        self.flushes += 1
+        self.draws += len(plots)
+
+    def cancel(self):
+        """Drop whatever is pending (e.g. the screen is going away)."""
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._plots.clear()
+        self._values.clear()
@@ -4,17 +4,20 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.animation import Animation
 from kivy.clock import Clock
 
+from services.assets import get_texture
+
 LOGO_FILE = "assets/logo.png"
 
 class SplashScreen(Screen):
-    def on_enter(self):
-        # FloatLayout for free positioning
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # FloatLayout for free positioning; built once and reused on re-enter
         self.layout = FloatLayout()
         self.add_widget(self.layout)
 
-        # Logo - bigger initial size
+        # Logo - bigger initial size, texture from the shared asset cache
         self.logo = Image(
-            source=LOGO_FILE,
+            texture=get_texture(LOGO_FILE),
             size_hint=(None, None),
             size=(250, 250),         # bigger starting size
             opacity=0,
@@ -22,6 +25,12 @@ class SplashScreen(Screen):
         )
         self.layout.add_widget(self.logo)
 
+    def on_enter(self):
+        # Restart from the initial state in case the splash was shown before
+        Animation.cancel_all(self.logo)
+        self.logo.opacity = 0
+        self.logo.size = (250, 250)
+
         # Animation: fade + zoom + move up
         anim = Animation(
             opacity=1,
@@ -32,8 +41,24 @@ class SplashScreen(Screen):
         )
         anim.start(self.logo)
 
-        # Switch to login after animation
-        Clock.schedule_once(self.switch_to_next, 3)
+        # Switch to login as soon as the other screens are built (preloading
+        # runs while the animation plays); plain managers fall back to a timer
+        if hasattr(self.manager, 'ready'):
+            if self.manager.ready:
+                Clock.schedule_once(self.switch_to_next)
+            else:
+                self.manager.unbind(ready=self.on_manager_ready)
+                self.manager.bind(ready=self.on_manager_ready)
+        else:
+            Clock.schedule_once(self.switch_to_next, 3)
+
+    def on_leave(self):
+        Animation.cancel_all(self.logo)
+
+    def on_manager_ready(self, manager, ready):
+        if ready:
+            manager.unbind(ready=self.on_manager_ready)
+            self.switch_to_next()
 
     def switch_to_next(self, *args):
         self.manager.transition.direction = 'up'
@@ -0,0 +1,212 @@
+"""
+Thin clients for services/api_server.py.
+
+RemoteAuth and RemoteVitals have the same methods as AuthService and
+VitalsStore, so screens work unchanged against either. Each thread keeps
+one keep-alive HTTP connection; these calls block like the local ones and
+run on the job executor.
+
+The app talks to a server when HEALTHCARE_API_URL is set (for example
+http://127.0.0.1:8765), otherwise it opens users.db / vitals.db itself.
+"""
+import http.client
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import urlencode, urlsplit
+
+from services.otp import RateLimited
+
+API_URL_ENV = "HEALTHCARE_API_URL"
+
+
+def api_url():
+    return os.environ.get(API_URL_ENV) or None
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class ApiClient:
+    """
+    JSON over HTTP/1.1 with one persistent connection per calling thread.
+    A request on a connection the server has since closed is retried once
+    on a fresh one.
+    """
+
+    def __init__(self, base_url, timeout=10.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def request(self, method, path, payload=None, query=None):
+        """Returns (status, decoded JSON body)."""
+        if query:
+            path = f"{path}?{urlencode(query)}"
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in (0, 1):
+            conn = self._connection()
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if attempt or not reused:
+                    raise
+        if response.getheader("Connection", "").lower() == "close":
+            conn.close()
+        return response.status, json.loads(data) if data else None
+
+    def call(self, method, path, payload=None, query=None):
+        status, body = self.request(method, path, payload, query)
+        if status >= 400:
+            raise ApiError(status, (body or {}).get("error", ""))
+        return body
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class RemoteAuth:
+    """
+    AuthService over the API. Errors come back as the exceptions the local
+    service raises (sqlite3.IntegrityError, RateLimited, PermissionDenied).
+    """
+
+    def __init__(self, client, sessions=None):
+        self.client = client
+        if sessions is None:
+            from services.sessions import SessionManager   # sessions imports this module
+            sessions = SessionManager()
+        # No profile lookups over the API: sessions keep what login returned
+        self.sessions = sessions
+
+    def create_tables(self):
+        # The server owns the schema
+        return []
+
+    def login(self, aadhaar, password, role):
+        body = self.client.call("POST", "/auth/login",
+                                {"aadhaar": aadhaar, "password": password, "role": role})
+        if not body["found"]:
+            return None
+        return body["ok"], body["role"]
+
+    def sign_in(self, aadhaar, password, role):
+        result = self.login(aadhaar, password, role)
+        if result is None:
+            return None
+        ok, stored_role = result
+        if not ok:
+            return ok, stored_role, None
+        # Only the role is known here; the rest of the profile stays empty
+        return ok, stored_role, self.sessions.create(aadhaar, (None, None, None, aadhaar, None, stored_role))
+
+    def signup(self, name, email, aadhaar, phone, password, role):
+        try:
+            self.client.call("POST", "/auth/signup", {"name": name, "email": email, "aadhaar": aadhaar,
+                                                      "phone": phone, "password": password, "role": role})
+        except ApiError as e:
+            if e.status == 409:
+                raise sqlite3.IntegrityError("Aadhaar already registered") from e
+            raise
+
+    def user_exists(self, aadhaar):
+        return self.client.call("GET", "/auth/exists", query={"aadhaar": aadhaar})["exists"]
+
+    def request_otp(self, aadhaar):
+        status, body = self.client.request("POST", "/auth/otp", {"aadhaar": aadhaar})
+        if status == 404:
+            return None
+        if status == 429:
+            raise RateLimited("server", body.get("retry_after", 1) if body else 1)
+        if status >= 400:
+            raise ApiError(status, (body or {}).get("error", ""))
+        # The code only comes back from a test server; a real one sends it by SMS
+        return body.get("code") or ""
+
+    def verify_otp(self, aadhaar, code):
+        return self.client.call("POST", "/auth/otp/verify", {"aadhaar": aadhaar, "code": code})["reset_token"]
+
+    def reset_password(self, aadhaar, password, reset_token):
+        try:
+            updated = self.client.call("POST", "/auth/reset", {"aadhaar": aadhaar, "password": password,
+                                                              "reset_token": reset_token})["updated"]
+        except ApiError as e:
+            if e.status == 403:
+                from services.sessions import PermissionDenied   # sessions imports this module
+                raise PermissionDenied(str(e)) from e
+            raise
+        self.sessions.invalidate_user(aadhaar)
+        return updated
+
+    def shutdown(self):
+        self.client.close()
+
+
+class RemoteVitals:
+    """
+    VitalsStore over the API. Works as the store behind a BatchWriter; the
+    server runs roll-ups and retention itself, so those are no-ops here.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert_many(self, readings):
+        self.client.call("POST", "/vitals", {"readings": [list(reading) for reading in readings]})
+        return len(readings)
+
+    def history(self, patient, t0, t1, max_points=500, resolution=None):
+        query = {"patient": patient, "t0": t0, "t1": t1, "max_points": max_points}
+        if resolution is not None:
+            query["resolution"] = resolution
+        return [tuple(row) for row in self.client.call("GET", "/vitals/history", query=query)["rows"]]
+
+    def run_rollups(self, now=None):
+        return None
+
+    def apply_retention(self, now=None, **kwargs):
+        return None
+
+    def close(self):
+        self.client.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Process-wide client for HEALTHCARE_API_URL, or None when it isn't set.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None and api_url():
+            _default_client = ApiClient(api_url())
+        return _default_client
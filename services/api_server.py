@@ -0,0 +1,399 @@
+"""
+Headless HTTP API in front of users.db and vitals.db, so many devices can
+share one database instead of each opening the files directly.
+
+asyncio HTTP/1.1 with keep-alive and JSON bodies, stdlib only. Reads run on
+a small thread pool over pooled connections. Every write to users.db goes
+through one WriteQueue, whose single writer thread applies whatever has
+queued up in one transaction (a savepoint per request, so one failing
+request doesn't undo the others). Vitals are batched by vitals.store.BatchWriter.
+
+    POST /auth/login        {aadhaar, password, role} -> {found, ok, role}
+    POST /auth/signup       {name, email, aadhaar, phone, password, role}   409 if taken
+    GET  /auth/exists       ?aadhaar=                 -> {exists}
+    POST /auth/otp          {aadhaar} -> {sent}       404 unknown, 429 rate limited
+                            ({sent, code} with --expose-codes, for tests)
+    POST /auth/otp/verify   {aadhaar, code}           -> {ok, reset_token}
+    POST /auth/reset        {aadhaar, password, reset_token} -> {updated}
+                            403 unless reset_token came from a verify (single use)
+    GET  /vitals/history    ?patient=&t0=&t1=[&max_points=&resolution=] -> {rows}
+    POST /vitals            {readings: [[patient, ts, hr, bp, spo2, temp], ...]} -> 202
+    GET  /health
+
+Run from the project root (the Kivy app uses it when HEALTHCARE_API_URL
+is set, see services/api_client.py):
+    python -m services.api_server [--host 127.0.0.1] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import signal
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from services.db import ConnectionPool, DB_FILE
+from services.otp import OtpService, RateLimited
+from services.passwords import PasswordHasher, configured_log_n
+from services.users import UserRepository
+from vitals.ingest import Reading
+from vitals.store import VitalsStore, BatchWriter, VITALS_DB_FILE
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1024 * 1024
+MAX_HEADERS = 100
+#! Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 30.0
+OTP_FLUSH_INTERVAL = 0.5
+
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class WriteQueue:
+    """
+    The only writer of one SQLite database. Coroutines submit write
+    functions; a dedicated thread runs everything queued so far in a single
+    transaction (up to max_batch), so concurrent writes share one commit
+    instead of queueing on SQLite's lock.
+    """
+
+    def __init__(self, pool, max_batch=256):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._queue = None
+        self._task = None
+        self._thread = ThreadPoolExecutor(1, thread_name_prefix="sqlite-writer")
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, fn, *args):
+        """Run fn(*args) on the writer thread inside the current batch's transaction."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._thread, self._apply, batch)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            for (_fn, _args, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _apply(self, batch):
+        results = []
+        # Repository calls made by the write functions join this transaction
+        with self.pool.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, _future in batch:
+                conn.execute("SAVEPOINT request")
+                try:
+                    results.append((True, fn(*args)))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO request")
+                    results.append((False, e))
+                conn.execute("RELEASE request")
+        self.batches += 1
+        self.writes += len(batch)
+        return results
+
+    async def close(self):
+        if self._task is not None:
+            while not self._queue.empty():
+                await asyncio.sleep(0.01)
+            self._task.cancel()
+        self._thread.shutdown(wait=True)
+
+
+def fields(body, *names):
+    try:
+        return [body[name] for name in names]
+    except (KeyError, TypeError) as e:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"missing field {e}")
+
+
+class ApiServer:
+    """
+    Routes requests to the repositories. The password KDF runs on the
+    default executor so DB reads don't wait behind it.
+    """
+
+    def __init__(self, db_path=DB_FILE, vitals_path=VITALS_DB_FILE, readers=4, max_batch=256,
+                 hasher=None, otp_limits=None, expose_codes=False):
+        # One connection per reader thread plus the writer
+        self.users = UserRepository(ConnectionPool(db_path, size=readers + 1))
+        self.users.create_tables()
+        self.hasher = hasher or PasswordHasher(log_n=configured_log_n(self.users))
+        self.otps = OtpService(self.users.pool, background=False, **(otp_limits or {}))
+        self.vitals = VitalsStore(ConnectionPool(vitals_path, size=readers + 1))
+        self.vitals_writer = BatchWriter(self.vitals)
+        self.writes = WriteQueue(self.users.pool, max_batch=max_batch)
+        #! Codes only go back in the response for test and benchmark runs
+        #! (the app then shows them as "Test OTP"); otherwise an SMS gateway delivers them
+        self.expose_codes = expose_codes
+        self.requests = 0
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="api-read")
+        self._server = None
+        self._otp_task = None
+        self.routes = {
+            ("POST", "/auth/login"): self.login,
+            ("POST", "/auth/signup"): self.signup,
+            ("GET", "/auth/exists"): self.exists,
+            ("POST", "/auth/otp"): self.request_otp,
+            ("POST", "/auth/otp/verify"): self.verify_otp,
+            ("POST", "/auth/reset"): self.reset_password,
+            ("GET", "/vitals/history"): self.vitals_history,
+            ("POST", "/vitals"): self.vitals_ingest,
+            ("GET", "/health"): self.health,
+        }
+
+    # --- lifecycle ---
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.writes.start()
+        self.vitals_writer.start()
+        self._otp_task = asyncio.get_running_loop().create_task(self._flush_otps())
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def _flush_otps(self):
+        while True:
+            await asyncio.sleep(OTP_FLUSH_INTERVAL)
+            await self.writes.submit(self.otps.flush)
+            self.otps.purge()
+
+    async def close(self):
+        if self._server is not None:
+            #! Not wait_closed(): idle keep-alive clients would hold it open
+            self._server.close()
+        if self._otp_task is not None:
+            self._otp_task.cancel()
+        await self.writes.submit(self.otps.flush)
+        await self.writes.close()
+        self.vitals_writer.stop()
+        self._readers.shutdown(wait=True)
+        self.hasher.shutdown()
+        self.users.pool.close()
+        self.vitals.close()
+
+    def read(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._readers, fn, *args)
+
+    def kdf(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # --- HTTP ---
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if len(headers) >= MAX_HEADERS:
+                        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too many headers")
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+                if length > MAX_BODY:
+                    raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "body too large")
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, payload, extra = await self.dispatch(method, target, body)
+                self.write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            self.write_response(writer, e.status, {"error": str(e)}, e.headers, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        self.requests += 1
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        try:
+            if handler is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, f"no route for {method} {url.path}")
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "body is not JSON")
+            result = await handler(data, query)
+            status, payload = result if isinstance(result, tuple) else (HTTPStatus.OK, result)
+            return status, payload, {}
+        except HttpError as e:
+            return e.status, {"error": str(e)}, e.headers
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}, {}
+
+    @staticmethod
+    def write_response(writer, status, payload, extra, keep_alive):
+        data = json.dumps(payload).encode()
+        status = HTTPStatus(status)
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(data)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head.extend(f"{name}: {value}" for name, value in extra.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+
+    # --- auth ---
+
+    async def login(self, body, query):
+        aadhaar, password, role = fields(body, "aadhaar", "password", "role")
+        row = await self.read(self.users.find_login, aadhaar, role)
+        if row is None:
+            return {"found": False}
+        stored_password, stored_role = row
+        ok, needs_rehash = await self.kdf(self.hasher.verify, password, stored_password)
+        if ok and needs_rehash:
+            upgraded = await self.kdf(self.hasher.hash, password)
+            await self.writes.submit(self.users.set_passwords, [(upgraded, aadhaar, stored_password)])
+        return {"found": True, "ok": ok, "role": stored_role}
+
+    async def signup(self, body, query):
+        name, email, aadhaar, phone, password, role = fields(
+            body, "name", "email", "aadhaar", "phone", "password", "role")
+        hashed = await self.kdf(self.hasher.hash, password)
+        try:
+            await self.writes.submit(self.users.add_user, name, email, aadhaar, phone, hashed, role)
+        except sqlite3.IntegrityError:
+            raise HttpError(HTTPStatus.CONFLICT, "Aadhaar already registered")
+        return HTTPStatus.CREATED, {"created": True}
+
+    async def exists(self, body, query):
+        aadhaar, = fields(query, "aadhaar")
+        return {"exists": await self.read(self.users.exists, aadhaar)}
+
+    async def request_otp(self, body, query):
+        aadhaar, = fields(body, "aadhaar")
+        if not await self.read(self.users.exists, aadhaar):
+            raise HttpError(HTTPStatus.NOT_FOUND, "Aadhaar not found")
+        try:
+            code = self.otps.request_code(aadhaar)
+        except RateLimited as e:
+            return HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e), "retry_after": e.retry_after}
+        return {"sent": True, "code": code} if self.expose_codes else {"sent": True}
+
+    async def verify_otp(self, body, query):
+        aadhaar, code = fields(body, "aadhaar", "code")
+        ok = self.otps.verify_code(aadhaar, code)
+        return {"ok": ok, "reset_token": self.otps.issue_reset_token(aadhaar) if ok else None}
+
+    async def reset_password(self, body, query):
+        aadhaar, password, reset_token = fields(body, "aadhaar", "password", "reset_token")
+        if not self.otps.use_reset_token(aadhaar, reset_token):
+            raise HttpError(HTTPStatus.FORBIDDEN, "OTP not verified or the reset has expired")
+        hashed = await self.kdf(self.hasher.hash, password)
+        return {"updated": await self.writes.submit(self.users.update_password, aadhaar, hashed)}
+
+    # --- vitals ---
+
+    async def vitals_history(self, body, query):
+        try:
+            patient = int(query["patient"])
+            t0 = float(query["t0"])
+            t1 = float(query["t1"])
+            max_points = int(query.get("max_points", 500))
+        except (KeyError, ValueError) as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"bad query: {e}")
+        rows = await self.read(self.vitals.history, patient, t0, t1, max_points, query.get("resolution"))
+        return {"rows": rows}
+
+    async def vitals_ingest(self, body, query):
+        readings, = fields(body, "readings")
+        try:
+            batch = [Reading(*row) for row in readings]
+        except TypeError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "each reading is [patient, ts, hr, bp, spo2, temp]")
+        self.vitals_writer.offer(batch)
+        return HTTPStatus.ACCEPTED, {"accepted": len(batch)}
+
+    async def health(self, body, query):
+        return {"ok": True, "requests": self.requests, "write_batches": self.writes.batches,
+                "writes": self.writes.writes, "live_otps": self.otps.live}
+
+
+async def serve(args):
+    server = ApiServer(args.db, args.vitals_db, readers=args.readers, max_batch=args.max_batch,
+                       hasher=PasswordHasher(log_n=args.log_n) if args.log_n else None,
+                       otp_limits={"global_limit": (args.otp_rate, args.otp_rate * 5)},
+                       expose_codes=args.expose_codes)
+    host, port = await server.start(args.host, args.port)
+    print(f"listening on http://{host}:{port}", flush=True)
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        except NotImplementedError:   # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the auth and vitals API over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--vitals-db", default=VITALS_DB_FILE)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--max-batch", type=int, default=256, help="writes per transaction")
+    parser.add_argument("--log-n", type=int,
+                        help="scrypt work factor for new hashes (default: the database's calibrated one, else 14)")
+    parser.add_argument("--otp-rate", type=float, default=20.0, help="OTPs issued per second, all users")
+    parser.add_argument("--expose-codes", action="store_true",
+                        help="return OTPs in the response (tests and benchmarks only)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Image assets: pre-scaled density variants and a bounded texture cache.
+
+The source PNGs in assets/ are much larger than anything the app draws, so
+`build_variants()` writes copies sized for each screen density into
+assets/generated/ (run `python -m services.assets build` after changing an
+image). At runtime `get_texture()` picks the variant for the current
+density, decodes it once and keeps the texture in an LRU cache with a
+memory budget, so re-entering a screen never decodes or uploads again.
+"""
+import argparse
+import math
+import os
+import threading
+from collections import OrderedDict
+
+GENERATED_DIR = "assets/generated"
+DENSITIES = (1, 2, 3)
+
+#! source -> widest on-screen size in dp at density 1 (variants keep the
+#! source aspect ratio)
+ASSETS = {
+    "assets/logo.png": 400,                 #! splash zooms the logo to 400 px
+    "assets/logo2.png": 220,                #! login header, 84dp high
+    "assets/login-illustration.png": 400,   #! login background, ~0.8 x window
+}
+
+#! Decoded RGBA bytes kept alive by the cache; the least recently used
+#! textures are dropped past this
+TEXTURE_BUDGET = 16 * 1024 * 1024
+
+
+def variant_path(source, density):
+    name, ext = os.path.splitext(os.path.basename(source))
+    return os.path.join(GENERATED_DIR, f"{name}@{density}x{ext}")
+
+
+def pick_density(density=None):
+    """Smallest generated density that is at least the screen density."""
+    if density is None:
+        from kivy.metrics import Metrics
+        density = Metrics.density
+    for d in DENSITIES:
+        if d >= density:
+            return d
+    return DENSITIES[-1]
+
+
+def best_source(source, density=None):
+    """
+    Path to load for `source`: its variant for this density if one was
+    generated, else the original file.
+    """
+    if source in ASSETS:
+        path = variant_path(source, pick_density(density))
+        if os.path.exists(path):
+            return path
+    return source
+
+
+def variant_size(source_size, width):
+    w, h = source_size
+    if w <= width:
+        return w, h
+    return width, max(1, round(h * width / w))
+
+
+def scale_image(source, size, dest):
+    """
+    Downscale `source` to `size` on the GPU and save it as `dest`.
+    Sampling a mipmapped texture with trilinear filtering averages the
+    source pixels instead of skipping them, so small variants don't alias.
+    """
+    from kivy.core.image import Image as CoreImage
+    from kivy.graphics import Callback, Color, Fbo, Rectangle, ClearColor, ClearBuffers
+    from kivy.graphics.opengl import glBlendFunc, GL_ONE, GL_ZERO, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA
+
+    texture = CoreImage(source, mipmap=True, nocache=True).texture
+    texture.min_filter = "linear_mipmap_linear"
+    texture.mag_filter = "linear"
+    fbo = Fbo(size=size, with_stencilbuffer=False)
+    with fbo:
+        ClearColor(0, 0, 0, 0)
+        ClearBuffers()
+        #! Copy instead of alpha-blending onto the cleared buffer, which
+        #! would square the alpha of every translucent edge pixel
+        Callback(lambda instr: glBlendFunc(GL_ONE, GL_ZERO))
+        Color(1, 1, 1, 1)
+        Rectangle(texture=texture, pos=(0, 0), size=size)
+        Callback(lambda instr: glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA))
+    fbo.draw()
+    CoreImage(fbo.texture).save(dest, flipped=True)
+
+
+def build_variants(assets=None, densities=DENSITIES, force=False):
+    """
+    Generate assets/generated/<name>@<d>x.png for every asset and density.
+    Needs a GL context (a Kivy window). Returns the paths written.
+    """
+    from kivy.core.image import Image as CoreImage
+    from kivy.logger import Logger
+
+    os.makedirs(GENERATED_DIR, exist_ok=True)
+    written = []
+    for source, width in (ASSETS if assets is None else assets).items():
+        source_size = CoreImage(source, nocache=True).size
+        for density in densities:
+            dest = variant_path(source, density)
+            if not force and os.path.exists(dest) and os.path.getmtime(dest) >= os.path.getmtime(source):
+                continue
+            size = variant_size(source_size, math.ceil(width * density))
+            scale_image(source, size, dest)
+            written.append(dest)
+            Logger.info(f"Assets: {source} -> {dest} {size[0]}x{size[1]}")
+    return written
+
+
+def texture_bytes(texture):
+    return texture.width * texture.height * 4
+
+
+class TextureCache:
+    """
+    LRU cache of decoded textures keyed by file path, bounded by the RGBA
+    bytes they hold. Evicting only drops the cache's reference; a texture
+    still drawn by a widget stays alive until that widget lets go of it.
+    The most recent texture is always kept, even if it alone is over budget.
+    """
+
+    def __init__(self, budget=TEXTURE_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._textures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            texture = self._textures.get(path)
+            if texture is not None:
+                self._textures.move_to_end(path)
+                self.hits += 1
+                return texture
+
+        from kivy.core.image import Image as CoreImage
+        #! nocache: Kivy's own image cache would hold a second reference
+        #! outside our budget
+        texture = CoreImage(path, nocache=True).texture
+        with self._lock:
+            self.misses += 1
+            if path not in self._textures:
+                self._textures[path] = texture
+                self.used += texture_bytes(texture)
+                self._evict()
+            return self._textures[path]
+
+    def _evict(self):
+        while self.used > self.budget and len(self._textures) > 1:
+            _, texture = self._textures.popitem(last=False)
+            self.used -= texture_bytes(texture)
+
+    def clear(self):
+        with self._lock:
+            self._textures.clear()
+            self.used = 0
+
+    def __contains__(self, path):
+        return path in self._textures
+
+    def __len__(self):
+        return len(self._textures)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide texture cache, created on first use.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TextureCache()
+        return _default_cache
+
+
+def get_texture(source):
+    """
+    Texture for an asset path, from its density variant when available.
+    Must be called on the main (GL) thread.
+    """
+    return get_cache().get(best_source(source))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate density variants of the image assets.")
+    parser.add_argument("command", choices=("build",))
+    parser.add_argument("--force", action="store_true", help="rebuild variants that are up to date")
+    args = parser.parse_args()
+
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    from kivy.core.window import Window  # noqa: F401 - creates the GL context
+    written = build_variants(force=args.force)
+    print(f"{len(written)} variant(s) written to {GENERATED_DIR}")
+
+
+if __name__ == "__main__":
+    main()
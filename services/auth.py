@@ -0,0 +1,108 @@
+import threading
+
+from services.users import UserRepository
+from services.passwords import PasswordHasher, configured_log_n
+from services.otp import OtpService
+from services.api_client import RemoteAuth, api_url, get_client
+from services.sessions import PermissionDenied, SessionManager, get_sessions
+
+
+class AuthService:
+    """
+    Login / signup / reset on top of UserRepository with hashed passwords.
+    Every method blocks on DB and KDF work, so call them from the job executor.
+    """
+
+    def __init__(self, users=None, hasher=None, otps=None, sessions=None):
+        self.users = users or UserRepository()
+        self.hasher = hasher or PasswordHasher(log_n=configured_log_n(self.users))
+        self.otps = otps or OtpService(self.users.pool)
+        self.sessions = sessions if sessions is not None else SessionManager(self.users.find_profile,
+                                                                            revoked=self.users.sessions_revoked)
+
+    def login(self, aadhaar, password, role):
+        """
+        Returns None if no such account, otherwise (password_ok, stored_role).
+        Legacy plaintext or weaker hashes are upgraded on a successful login.
+        """
+        result = self.users.find_login(aadhaar, role)
+        if result is None:
+            return None
+        stored_password, stored_role = result
+        ok, needs_rehash = self.hasher.verify(password, stored_password)
+        if ok and needs_rehash:
+            self.users.set_passwords([(self.hasher.hash(password), aadhaar, stored_password)])
+        return ok, stored_role
+
+    def sign_in(self, aadhaar, password, role):
+        """
+        login() that also opens a session: None if no such account, otherwise
+        (password_ok, stored_role, token); token is None unless the password matched.
+        """
+        result = self.login(aadhaar, password, role)
+        if result is None:
+            return None
+        ok, stored_role = result
+        return ok, stored_role, self.sessions.create(aadhaar) if ok else None
+
+    def create_tables(self):
+        return self.users.create_tables()
+
+    def signup(self, name, email, aadhaar, phone, password, role):
+        self.users.add_user(name, email, aadhaar, phone, self.hasher.hash(password), role)
+
+    def user_exists(self, aadhaar):
+        return self.users.exists(aadhaar)
+
+    def request_otp(self, aadhaar):
+        """
+        Returns a new reset code, or None if no account has this Aadhaar.
+        Raises services.otp.RateLimited when codes are requested too often.
+        """
+        if not self.users.exists(aadhaar):
+            return None
+        return self.otps.request_code(aadhaar)
+
+    def verify_otp(self, aadhaar, code):
+        """A reset token for reset_password() if the code is right, otherwise None."""
+        if not self.otps.verify_code(aadhaar, code):
+            return None
+        return self.otps.issue_reset_token(aadhaar)
+
+    def reset_password(self, aadhaar, password, reset_token):
+        """Raises PermissionDenied unless reset_token came from verify_otp() for this Aadhaar."""
+        if not self.otps.use_reset_token(aadhaar, reset_token):
+            raise PermissionDenied("OTP not verified or the reset has expired")
+        updated = self.users.update_password(aadhaar, self.hasher.hash(password))
+        # Sessions opened with the old password end here
+        self.sessions.invalidate_user(aadhaar)
+        return updated
+
+    def shutdown(self):
+        self.hasher.shutdown()
+        self.otps.close()
+
+
+_default_auth = None
+_default_lock = threading.Lock()
+
+
+def get_auth():
+    """
+    Process-wide auth service, created on first use: a client of the API
+    server when HEALTHCARE_API_URL is set, else local on users.db.
+    """
+    global _default_auth
+    with _default_lock:
+        if _default_auth is None:
+            if api_url():
+                _default_auth = RemoteAuth(get_client(), get_sessions())
+            else:
+                _default_auth = AuthService(sessions=get_sessions())
+        return _default_auth
+
+
+def current_auth():
+    """The process-wide auth service if get_auth() has created it, else None (never creates one)."""
+    with _default_lock:
+        return _default_auth
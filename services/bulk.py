@@ -0,0 +1,203 @@
+"""
+Streaming bulk import / export of users as CSV or JSON Lines.
+
+Imports read one record at a time, normalize Aadhaar numbers the way the
+signup form does, and insert in chunked transactions. Invalid records and
+Aadhaars that are duplicated or already registered are reported (to a CSV
+file if given) instead of aborting the run. Exports iterate a cursor, so
+memory stays flat whatever the table size. Plaintext passwords are hashed
+(PasswordHasher, across all cores) before each chunk is written, so none
+reach the database. Used by check_db.py.
+"""
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from services.passwords import PasswordHasher, configured_log_n, is_hashed
+from services.users import AADHAAR_DIGITS, normalize_aadhaar
+
+FORMATS = ("csv", "jsonl")
+EXPORT_FIELDS = ("name", "email", "aadhaar", "phone", "role", "password")
+ROLES = {role.lower(): role for role in ("User", "Admin", "Doctor", "Patient")}
+CHUNK_SIZE = 5000
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    return "csv"
+
+
+@contextmanager
+def open_text(path, mode):
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        yield f
+
+
+def read_records(f, fmt):
+    """
+    Yield (line number, dict) for each record of a CSV (with header) or
+    JSONL stream. Malformed JSON lines come through as (line, None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+def to_row(record):
+    """
+    (name, email, aadhaar, phone, password, role) from a record, or raise
+    ValueError with the reason it can't be imported.
+    """
+    if record is None:
+        raise ValueError("unreadable record")
+    aadhaar = normalize_aadhaar(record.get("aadhaar") or "")
+    if len(aadhaar) != AADHAAR_DIGITS:
+        raise ValueError(f"Aadhaar must have {AADHAAR_DIGITS} digits")
+    role = ROLES.get(str(record.get("role") or "").strip().lower())
+    if role is None:
+        raise ValueError(f"unknown role {record.get('role')!r}")
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("missing name")
+    password = record.get("password") or None
+    if password is not None and not isinstance(password, str):
+        raise ValueError("password must be a string")
+    return (name, str(record.get("email") or "").strip(), aadhaar,
+            str(record.get("phone") or "").strip(), password, role)
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.hashed = 0
+
+    def __str__(self):
+        return (f"{self.read} read, {self.inserted} inserted, {self.updated} updated, "
+                f"{self.existing} already registered, {self.duplicates} duplicated in file, "
+                f"{self.invalid} invalid, {self.hashed} passwords hashed")
+
+
+class ConflictReport:
+    """Writes (line, aadhaar, reason) rows as they happen; a no-op without a path."""
+
+    def __init__(self, path=None):
+        self._file = open(path, "w", newline="", encoding="utf-8") if path else None
+        self._writer = csv.writer(self._file) if self._file else None
+        if self._writer:
+            self._writer.writerow(("line", "aadhaar", "reason"))
+
+    def add(self, line, aadhaar, reason):
+        if self._writer:
+            self._writer.writerow((line, aadhaar, reason))
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def import_users(users, records, chunk_size=CHUNK_SIZE, update=False, report=None, hasher=None):
+    """
+    Import (line, record) pairs into a UserRepository, chunk_size rows per
+    transaction. Plaintext passwords are hashed with `hasher` (by default
+    one at the database's configured work factor) before the chunk is written.
+    Returns ImportStats.
+    """
+    stats = ImportStats()
+    report = report or ConflictReport()
+    own_hasher = hasher is None
+    hasher = PasswordHasher(log_n=configured_log_n(users)) if own_hasher else hasher
+    #! Memory is bounded by one chunk: a repeat within the chunk is reported
+    #! as a duplicate, one in a later chunk meets the committed row and is
+    #! reported as already registered (or updates it with update=True)
+    chunk, lines = [], {}
+
+    def flush():
+        # Hash outside the write transaction so the KDF doesn't hold the lock
+        plain = [i for i, row in enumerate(chunk) if row[4] is not None and not is_hashed(row[4])]
+        if plain:
+            hashes = hasher.hash_many(chunk[i][4] for i in plain)
+            for i, hashed in zip(plain, hashes):
+                chunk[i] = chunk[i][:4] + (hashed,) + chunk[i][5:]
+            stats.hashed += len(plain)
+        # Sorted inserts touch the aadhaar index in order, which is cheaper
+        chunk.sort(key=lambda row: row[2])
+        existing = users.import_chunk(chunk, update=update)
+        stats.inserted += len(chunk) - len(existing)
+        if update:
+            stats.updated += len(existing)
+        else:
+            stats.existing += len(existing)
+            for aadhaar in sorted(existing, key=lines.get):
+                report.add(lines[aadhaar], aadhaar, "already registered")
+        chunk.clear()
+        lines.clear()
+
+    try:
+        for line, record in records:
+            stats.read += 1
+            try:
+                row = to_row(record)
+            except ValueError as e:
+                stats.invalid += 1
+                report.add(line, (record or {}).get("aadhaar", ""), str(e))
+                continue
+            aadhaar = row[2]
+            if aadhaar in lines:
+                stats.duplicates += 1
+                report.add(line, aadhaar, f"duplicate of line {lines[aadhaar]}")
+                continue
+            chunk.append(row)
+            lines[aadhaar] = line
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        if own_hasher:
+            hasher.shutdown()
+    return stats
+
+
+def export_users(users, f, fmt, with_passwords=False, batch_size=1000):
+    """
+    Stream every user to f as CSV or JSONL. Password hashes are left out
+    unless with_passwords. Returns the number of users written.
+    """
+    fields = EXPORT_FIELDS if with_passwords else EXPORT_FIELDS[:-1]
+    width = len(fields)
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for row in users.iter_users(batch_size):
+            writer.writerow(row[:width])
+            count += 1
+    else:
+        for row in users.iter_users(batch_size):
+            f.write(json.dumps(dict(zip(fields, row))) + "\n")
+            count += 1
+    return count
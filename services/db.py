@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+DB_FILE = "users.db"
+
+#! Applied to every new connection. WAL lets readers run while a writer
+#! commits and synchronous=NORMAL drops the per-commit fsync of the WAL.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",      # ~8 MB page cache per connection
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+#! sqlite3 keeps a per-connection LRU of compiled statements keyed by SQL
+#! text, so keeping SQL in module constants and reusing connections means
+#! hot queries are only prepared once.
+STATEMENT_CACHE = 128
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by every screen.
+    A thread that already holds a connection gets the same one back when it
+    asks again, so nested repository calls don't check out a second one.
+    """
+
+    def __init__(self, path=DB_FILE, size=4, timeout=10.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,     # connections move between threads via the pool
+            cached_statements=STATEMENT_CACHE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed.")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection.")
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the current thread.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Borrow a connection and commit on success / roll back on error.
+        Nested transactions join the outer one.
+        """
+        with self.connection() as conn:
+            if self._local.depth > 1:
+                yield conn
+                return
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_pool(path=DB_FILE):
+    """
+    Process-wide pool for the app database, created on first use.
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None or _default_pool.path != path:
+            if _default_pool is not None:
+                _default_pool.close()
+            _default_pool = ConnectionPool(path)
+        return _default_pool
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from kivy.clock import Clock
+
+
+class Job:
+    """
+    Handle for a piece of work running on the background executor.
+    Cancelling a job that has not started stops it from running; cancelling
+    one that is already running drops its result so no callback fires,
+    on_finish included.
+    Long-running work can also poll `job.cancelled` and bail out early.
+    """
+
+    def __init__(self):
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class JobExecutor:
+    """
+    Runs DB / auth work on worker threads and posts the outcome back to the
+    Kivy main thread through the Clock, so callbacks may touch widgets.
+    """
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    def submit(self, fn, *args, on_success=None, on_error=None, on_finish=None, **kwargs):
+        job = Job()
+
+        def run():
+            if job.cancelled:
+                raise CancelledError()
+            return fn(*args, **kwargs)
+
+        def deliver(future):
+            # Runs on the worker thread; hop to the main thread before calling back
+            Clock.schedule_once(lambda dt: self._dispatch(job, future, on_success, on_error, on_finish))
+
+        job.future = self._pool.submit(run)
+        job.future.add_done_callback(deliver)
+        return job
+
+    @staticmethod
+    def _dispatch(job, future, on_success, on_error, on_finish):
+        # A cancelled job is finished as far as its owner is concerned: whoever
+        # cancelled it already cleaned up, and may have started another job
+        if job.cancelled or future.cancelled():
+            return
+        try:
+            error = future.exception()
+            if error is not None:
+                if isinstance(error, CancelledError):
+                    return
+                if on_error is not None:
+                    on_error(error)
+            elif on_success is not None:
+                on_success(future.result())
+        finally:
+            if on_finish is not None:
+                on_finish()
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Process-wide executor shared by all screens, created on first use.
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = JobExecutor()
+        return _default_executor
@@ -0,0 +1,327 @@
+"""
+One-time codes for password resets.
+
+Live codes are kept in memory, keyed by Aadhaar and indexed by expiry, so
+issuing and checking a code never waits on the database and expired codes
+are evicted as time passes. Requests are rate limited per Aadhaar and
+globally with token buckets. Changes are written behind to the `otps`
+table in batches from a background thread, and unexpired codes are loaded
+back on start, so a pending reset survives a restart.
+
+With a global limit of `rate` codes/s and a TTL of `ttl` s, at most about
+rate * ttl + burst codes are ever live, which bounds memory.
+
+A verified code is traded for a reset token (issue_reset_token()): random,
+single-use, one per Aadhaar and valid for `reset_ttl` s. Password resets
+must present it, so knowing an Aadhaar is never enough to reset it.
+Tokens live in memory only; after a restart the user asks for a new code.
+"""
+import heapq
+import hmac
+import logging
+import math
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from services.db import get_pool
+from services.schema import migrate, HOT_QUERIES
+
+SELECT_LIVE_OTPS = HOT_QUERIES["otp_load"][0]
+PURGE_OTPS = HOT_QUERIES["otp_purge"][0]
+DELETE_OTP = "DELETE FROM otps WHERE aadhaar=?"
+INSERT_OTP = "INSERT INTO otps (aadhaar, otp, expiry) VALUES (?, ?, ?)"
+
+logger = logging.getLogger(__name__)
+
+
+#! otps.expiry holds local-time ISO 8601 text, which sorts by time as a string
+def to_db_time(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+def from_db_time(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+class RateLimited(Exception):
+    """
+    Raised when a code is requested too often. `scope` is "aadhaar" or
+    "global"; `retry_after` is the number of seconds until a request would pass.
+    """
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Too many OTP requests, try again in {math.ceil(retry_after)} s.")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    `burst` tokens, refilled at `rate` per second. Times are passed in so
+    the caller decides which clock to use.
+    """
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = now
+
+    def refill(self, now):
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def wait(self, now):
+        """Seconds until one token is available (0 if one is now)."""
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def full(self, now):
+        return self.tokens + (now - self.last) * self.rate >= self.burst
+
+
+class KeyedRateLimiter:
+    """
+    One TokenBucket per key, kept in least-recently-used order. Buckets that
+    have refilled completely carry no state and are dropped, so only keys
+    active within the last burst / rate seconds take memory; past `max_keys`
+    the oldest buckets are dropped even if not yet full.
+    """
+
+    def __init__(self, rate, burst, max_keys=100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+        else:
+            self._buckets.move_to_end(key)
+        self._prune(now)
+        return bucket
+
+    def _prune(self, now):
+        buckets = self._buckets
+        while len(buckets) > 1:
+            key, oldest = next(iter(buckets.items()))
+            if not oldest.full(now) and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class OtpService:
+    """
+    Issue and check reset codes. Thread-safe; request_code() and
+    verify_code() only touch memory, the database is written behind.
+    """
+
+    def __init__(self, pool=None, ttl=300.0, digits=4, max_attempts=5,
+                 per_aadhaar=(1 / 30, 3), global_limit=(20.0, 100),
+                 write_interval=0.5, clock=time.time, background=True, reset_ttl=300.0):
+        self.pool = pool or get_pool()
+        self.ttl = ttl
+        self.reset_ttl = reset_ttl
+        self.digits = digits
+        self.max_attempts = max_attempts
+        self.write_interval = write_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._codes = {}        # aadhaar -> [code, expiry, failed attempts]
+        self._expiries = []     # heap of (expiry, aadhaar); stale entries skipped
+        self._pending = {}      # aadhaar -> (code, expiry) or None to delete
+        self._reset_tokens = {}  # aadhaar -> (token, expiry)
+        self._per_aadhaar = KeyedRateLimiter(*per_aadhaar)
+        self._global = TokenBucket(global_limit[0], global_limit[1], clock())
+        self._dummy = "0" * digits
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        with self.pool.connection() as conn:
+            migrate(conn)
+        self.load()
+        #! background=False leaves flush() / purge() to the caller (the API
+        #! server runs them on its single SQLite writer)
+        self._thread = threading.Thread(target=self._run, name="otp-writer", daemon=True)
+        if background:
+            self._thread.start()
+
+    def load(self):
+        """
+        Restore the unexpired codes from the otps table. Returns how many.
+        """
+        now = self.clock()
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_LIVE_OTPS, (to_db_time(now),)).fetchall()
+        with self._lock:
+            for aadhaar, code, expiry in rows:
+                expiry = from_db_time(expiry)
+                current = self._codes.get(aadhaar)
+                if current is None or current[1] < expiry:
+                    self._codes[aadhaar] = [code, expiry, 0]
+                    heapq.heappush(self._expiries, (expiry, aadhaar))
+        return len(rows)
+
+    def request_code(self, aadhaar):
+        """
+        Issue a new code for aadhaar, replacing any earlier one.
+        Raises RateLimited when the per-Aadhaar or global limit is hit.
+        """
+        with self._lock:
+            now = self.clock()
+            self._evict(now)
+            bucket = self._per_aadhaar.bucket(aadhaar, now)
+            wait = bucket.wait(now)
+            if wait:
+                raise RateLimited("aadhaar", wait)
+            wait = self._global.wait(now)
+            if wait:
+                raise RateLimited("global", wait)
+            bucket.take()
+            self._global.take()
+
+            code = f"{secrets.randbelow(10 ** self.digits):0{self.digits}d}"
+            expiry = now + self.ttl
+            self._codes[aadhaar] = [code, expiry, 0]
+            heapq.heappush(self._expiries, (expiry, aadhaar))
+            self._pending[aadhaar] = (code, expiry)
+        self._wake.set()
+        return code
+
+    def verify_code(self, aadhaar, code):
+        """
+        True if code is the live code for aadhaar, which is then used up.
+        The comparison takes the same time whether or not a code exists or
+        matches; max_attempts wrong guesses invalidate the code.
+        """
+        code = str(code).encode()
+        with self._lock:
+            now = self.clock()
+            entry = self._codes.get(aadhaar)
+            live = entry is not None and entry[1] > now
+            expected = entry[0] if live else self._dummy
+            ok = hmac.compare_digest(expected.encode(), code) and live
+            if entry is None:
+                return False
+            if ok or not live:
+                self._discard(aadhaar)
+            else:
+                entry[2] += 1
+                if entry[2] >= self.max_attempts:
+                    self._discard(aadhaar)
+        if entry is not None:
+            self._wake.set()
+        return ok
+
+    def issue_reset_token(self, aadhaar):
+        """
+        A single-use token allowing one password reset for aadhaar. Call it
+        only once verify_code() returned True; replaces any earlier token.
+        """
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._reset_tokens[aadhaar] = (token, self.clock() + self.reset_ttl)
+        return token
+
+    def use_reset_token(self, aadhaar, token):
+        """
+        True if token is aadhaar's live reset token, which is then used up.
+        A wrong token leaves the real one in place.
+        """
+        with self._lock:
+            entry = self._reset_tokens.get(aadhaar)
+            if entry is None:
+                return False
+            live = entry[1] > self.clock()
+            ok = live and isinstance(token, str) and hmac.compare_digest(entry[0].encode(), token.encode())
+            if ok or not live:
+                del self._reset_tokens[aadhaar]
+            return ok
+
+    def _discard(self, aadhaar):
+        del self._codes[aadhaar]
+        self._pending[aadhaar] = None
+
+    def _evict(self, now):
+        expiries = self._expiries
+        codes = self._codes
+        while expiries and expiries[0][0] <= now:
+            expiry, aadhaar = heapq.heappop(expiries)
+            entry = codes.get(aadhaar)
+            if entry is not None and entry[1] == expiry:
+                del codes[aadhaar]
+        #! Re-issued codes leave stale heap entries behind; rebuild once
+        #! they outnumber the live ones
+        if len(expiries) > 2 * len(codes) + 1024:
+            self._expiries = [(entry[1], aadhaar) for aadhaar, entry in codes.items()]
+            heapq.heapify(self._expiries)
+
+    def purge(self):
+        """Drop expired codes and reset tokens from memory now. Returns how many codes are live."""
+        with self._lock:
+            now = self.clock()
+            self._evict(now)
+            for aadhaar in [a for a, (_token, expiry) in self._reset_tokens.items() if expiry <= now]:
+                del self._reset_tokens[aadhaar]
+            return len(self._codes)
+
+    def flush(self):
+        """
+        Write pending changes to the otps table in one transaction and drop
+        expired rows. Returns the number of Aadhaars written. If the write
+        fails the changes stay pending (behind any newer ones) and the
+        error is raised.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        now = to_db_time(self.clock())
+        try:
+            with self.pool.transaction() as conn:
+                if pending:
+                    conn.executemany(DELETE_OTP, ((aadhaar,) for aadhaar in pending))
+                    conn.executemany(INSERT_OTP, ((aadhaar, value[0], to_db_time(value[1]))
+                                                  for aadhaar, value in pending.items() if value is not None))
+                conn.execute(PURGE_OTPS, (now,))
+        except Exception:
+            with self._lock:
+                for aadhaar, value in pending.items():
+                    self._pending.setdefault(aadhaar, value)
+            raise
+        return len(pending)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            # Let writes pile up for a moment so they share a transaction
+            self._stop.wait(self.write_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("OTP write-behind failed; retrying in %g s", self.write_interval)
+                # Kept pending, so try again after the next interval
+                self._wake.set()
+            self.purge()
+
+    @property
+    def live(self):
+        return len(self._codes)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
@@ -0,0 +1,223 @@
+"""
+Salted scrypt password hashing.
+
+Stored format:  scrypt$<log2 N>$<r>$<p>$<salt b64>$<hash b64>
+Anything else in users.password is treated as a legacy plaintext value; it
+still verifies (in constant time) but is flagged for rehashing.
+
+The work factor for new hashes is DEFAULT_LOG_N until an admin runs
+`python check_db.py calibrate`, which stores the calibrated value in the
+database's settings (see configured_log_n).
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PREFIX = "scrypt"
+DEFAULT_LOG_N = 14       # N = 16384, ~16 MB and tens of ms per hash on a laptop
+MIN_LOG_N = 10
+MAX_LOG_N = 20
+BLOCK_SIZE = 8           # scrypt r
+PARALLELISM = 1          # scrypt p
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+#! settings row holding the calibrated work factor
+LOG_N_SETTING = "password_log_n"
+
+CACHE_TTL = 60.0         # seconds a successful verification is remembered
+CACHE_SIZE = 1024
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _scrypt(password, salt, log_n, r, p):
+    n = 1 << log_n
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + (1 << 20), dklen=KEY_BYTES)
+
+
+def is_hashed(stored):
+    return stored is not None and stored.startswith(PREFIX + "$")
+
+
+def hash_password(password, log_n=DEFAULT_LOG_N):
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, log_n, BLOCK_SIZE, PARALLELISM)
+    return f"{PREFIX}${log_n}${BLOCK_SIZE}${PARALLELISM}${_b64(salt)}${_b64(key)}"
+
+
+def verify_password(password, stored, log_n=DEFAULT_LOG_N):
+    """
+    Returns (ok, needs_rehash). needs_rehash is True for legacy plaintext
+    rows and for hashes made with a lower work factor than log_n.
+    """
+    if stored is None:
+        return False, False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")), True
+    try:
+        _prefix, s_log_n, s_r, s_p, salt, key = stored.split("$")
+        s_log_n, s_r, s_p = int(s_log_n), int(s_r), int(s_p)
+        salt, key = base64.b64decode(salt), base64.b64decode(key)
+    except ValueError:
+        return False, False
+    ok = hmac.compare_digest(_scrypt(password, salt, s_log_n, s_r, s_p), key)
+    return ok, ok and s_log_n < log_n
+
+
+def calibrate(target_ms=100.0, min_log_n=MIN_LOG_N, max_log_n=MAX_LOG_N):
+    """
+    Largest work factor whose hash time stays within target_ms on this machine.
+    """
+    best = min_log_n
+    for log_n in range(min_log_n, max_log_n + 1):
+        start = time.perf_counter()
+        hash_password("calibration", log_n)
+        if (time.perf_counter() - start) * 1000 > target_ms:
+            break
+        best = log_n
+    return best
+
+
+def configured_log_n(users):
+    """The work factor calibrated for this database (a UserRepository), else DEFAULT_LOG_N."""
+    try:
+        log_n = int(users.get_setting(LOG_N_SETTING))
+    except (TypeError, ValueError):
+        return DEFAULT_LOG_N
+    return min(max(log_n, MIN_LOG_N), MAX_LOG_N)
+
+
+class VerificationCache:
+    """
+    Short-lived memory of successful verifications so repeat logins skip the KDF.
+    Keys are an HMAC of (stored hash, password) under a per-process secret,
+    so no plaintext is kept.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, size=CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._secret = os.urandom(32)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _key(self, password, stored):
+        return hmac.new(self._secret, f"{stored}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+    def hit(self, password, stored):
+        key = self._key(password, stored)
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False
+            return True
+
+    def add(self, password, stored):
+        key = self._key(password, stored)
+        with self._lock:
+            if len(self._entries) >= self.size:
+                now = time.monotonic()
+                self._entries = {k: t for k, t in self._entries.items() if t >= now}
+                while len(self._entries) >= self.size:
+                    # dicts keep insertion order, so this drops the oldest entry
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = time.monotonic() + self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PasswordHasher:
+    """
+    Runs scrypt in a process pool so hashing neither holds the GIL for the UI
+    nor serialises concurrent logins. processes=0 hashes inline (for platforms
+    without multiprocessing support).
+    """
+
+    def __init__(self, log_n=DEFAULT_LOG_N, processes=None, cache=None):
+        self.log_n = log_n
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.cache = cache if cache is not None else VerificationCache()
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self.processes == 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = ProcessPoolExecutor(max_workers=self.processes)
+                except (NotImplementedError, ImportError, OSError):
+                    # No multiprocessing here (e.g. iOS); scrypt releases the
+                    # GIL, so hashing on the job thread still keeps the UI live
+                    self.processes = 0
+            return self._pool
+
+    def _call(self, fn, *args):
+        pool = self._executor()
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+
+    def calibrate(self, target_ms=100.0):
+        self.log_n = self._call(calibrate, target_ms)
+        return self.log_n
+
+    def hash(self, password):
+        return self._call(hash_password, password, self.log_n)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords across all cores; results in input order."""
+        passwords = list(passwords)
+        pool = self._executor()
+        if pool is None:
+            return [hash_password(password, self.log_n) for password in passwords]
+        chunk = max(1, len(passwords) // (self.processes * 4))
+        return list(pool.map(hash_password, passwords, [self.log_n] * len(passwords), chunksize=chunk))
+
+    def verify(self, password, stored):
+        """
+        Returns (ok, needs_rehash), answering from the cache when possible.
+        """
+        if is_hashed(stored) and self.cache.hit(password, stored):
+            return True, False
+        ok, needs_rehash = self._call(verify_password, password, stored, self.log_n)
+        if ok and not needs_rehash:
+            self.cache.add(password, stored)
+        return ok, needs_rehash
+
+    def rehash_legacy(self, users, batch_size=500):
+        """
+        Hash every plaintext password in the users table across all cores,
+        one pass in id order. Returns the number of rows upgraded; a row
+        changed meanwhile (e.g. a reset) keeps its new value and is not counted.
+        """
+        upgraded = 0
+        after = 0
+        while True:
+            rows = users.legacy_passwords(batch_size, after)
+            if not rows:
+                return upgraded
+            after = rows[-1][0]
+            hashes = self.hash_many(password for _id, _aadhaar, password in rows)
+            upgraded += users.set_passwords([(hashed, aadhaar, password)
+                                             for hashed, (_id, aadhaar, password) in zip(hashes, rows)])
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
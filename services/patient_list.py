@@ -0,0 +1,176 @@
+"""
+Data model behind the doctor dashboard's patient list.
+
+Holds every patient record, and keeps the visible rows (filtered by status /
+room, sorted by one field) as a list of plain dicts that a RecycleView can
+use as its `data`. Changes are reported to listeners as small edit
+operations instead of a new list, so the view only touches affected rows:
+
+    ("reset", rows)        whole list replaced (filter / sort change)
+    ("insert", index, row)
+    ("remove", index)
+    ("update", index, row) same position, new contents
+"""
+from bisect import bisect_left
+from collections import Counter
+
+STATUS_COLORS = {
+    "Critical": "#E74C3C",
+    "Monitoring": "#F39C12",
+    "Stable": "#2ECC71",
+}
+DEFAULT_STATUS_COLOR = "#000000"
+SORT_FIELDS = ("name", "room", "status")
+
+# Sorting by status puts the most urgent first
+STATUS_ORDER = {"Critical": 0, "Monitoring": 1, "Stable": 2}
+
+
+def make_row(patient):
+    """
+    Normalise a patient record into the dict the list rows render.
+    """
+    status = patient.get("status", "")
+    return {
+        "id": patient["id"],
+        "name": patient.get("name", ""),
+        "room": patient.get("room", ""),
+        "status": status,
+        "status_color": patient.get("status_color") or STATUS_COLORS.get(status, DEFAULT_STATUS_COLOR),
+    }
+
+
+class PatientListModel:
+    """
+    Sorted, filtered view over patient records with incremental edits.
+    """
+
+    def __init__(self, patients=(), sort_field="name", status=None, room=None):
+        self._patients = {}
+        self.sort_field = sort_field
+        self.status = status
+        self.room = room
+        self.rows = []
+        self._keys = []      # sort key per visible row, kept parallel to self.rows
+        self.status_counts = Counter()   # over all patients, maintained incrementally
+        self._listeners = []
+        self.set_patients(patients)
+
+    # --- listeners ---
+
+    def bind(self, callback):
+        self._listeners.append(callback)
+
+    def _emit(self, *op):
+        for callback in self._listeners:
+            callback(op)
+
+    # --- filtering / sorting ---
+
+    def _key(self, row):
+        if self.sort_field == "status":
+            return (STATUS_ORDER.get(row["status"], len(STATUS_ORDER)), row["name"], row["id"])
+        return (row[self.sort_field], row["id"])
+
+    def _visible(self, row):
+        if self.status is not None and row["status"] != self.status:
+            return False
+        if self.room and not row["room"].startswith(self.room):
+            return False
+        return True
+
+    def _rebuild(self):
+        rows = [row for row in self._patients.values() if self._visible(row)]
+        rows.sort(key=self._key)
+        self.rows = rows
+        self._keys = [self._key(row) for row in rows]
+        self._emit("reset", rows)
+
+    def set_patients(self, patients):
+        self._patients = {}
+        for patient in patients:
+            row = make_row(patient)
+            self._patients[row["id"]] = row
+        self.status_counts = Counter(row["status"] for row in self._patients.values())
+        self._rebuild()
+
+    def set_filter(self, status=None, room=None):
+        self.status = status or None
+        self.room = room or None
+        self._rebuild()
+
+    def set_sort(self, field):
+        if field not in SORT_FIELDS:
+            raise ValueError(f"can't sort patients by {field!r}")
+        self.sort_field = field
+        self._rebuild()
+
+    # --- incremental edits ---
+
+    def _index_of(self, row):
+        key = self._key(row)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return i
+        return None
+
+    def _remove_visible(self, row):
+        i = self._index_of(row)
+        if i is not None:
+            del self.rows[i]
+            del self._keys[i]
+            self._emit("remove", i)
+
+    def _insert_visible(self, row):
+        key = self._key(row)
+        i = bisect_left(self._keys, key)
+        self.rows.insert(i, row)
+        self._keys.insert(i, key)
+        self._emit("insert", i, row)
+
+    def upsert(self, patient):
+        """
+        Add a patient or change some of its fields (must include "id").
+        """
+        old = self._patients.get(patient["id"])
+        if old is None:
+            row = make_row(patient)
+        else:
+            merged = dict(old, **patient)
+            if "status" in patient and "status_color" not in patient:
+                merged["status_color"] = None     # recompute from the new status
+            row = make_row(merged)
+            if row == old:
+                return
+            self.status_counts[old["status"]] -= 1
+        self._patients[row["id"]] = row
+        self.status_counts[row["status"]] += 1
+
+        was_visible = old is not None and self._visible(old)
+        now_visible = self._visible(row)
+        if was_visible and now_visible and self._key(old) == self._key(row):
+            i = self._index_of(old)
+            self.rows[i] = row
+            self._emit("update", i, row)
+            return
+        if was_visible:
+            self._remove_visible(old)
+        if now_visible:
+            self._insert_visible(row)
+
+    def remove(self, patient_id):
+        old = self._patients.pop(patient_id, None)
+        if old is None:
+            return
+        self.status_counts[old["status"]] -= 1
+        if self._visible(old):
+            self._remove_visible(old)
+
+    def get(self, patient_id):
+        return self._patients.get(patient_id)
+
+    def ids(self):
+        return list(self._patients)
+
+    def __len__(self):
+        return len(self._patients)
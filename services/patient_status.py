@@ -0,0 +1,57 @@
+import threading
+
+from kivy.clock import Clock
+
+from services.profiling import profiled
+
+
+class PatientStatusStore:
+    """
+    Front door for live status changes on the doctor dashboard.
+
+    set_status() can be called any number of times, from any thread; changes
+    are collected and applied to the PatientListModel once per frame, so a
+    patient that flips several times within a frame costs one row update and
+    a status that ends up unchanged costs nothing. Listeners get the diff
+    ({patient_id: (old, new)}) and the model's running status counts.
+    """
+
+    def __init__(self, model, trigger=None):
+        self.model = model
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        # One flush on the next frame, however many changes arrive before it
+        self._flush_trigger = (trigger or Clock.create_trigger)(self.flush)
+
+    def bind(self, callback):
+        self._listeners.append(callback)
+
+    def set_status(self, patient_id, status):
+        with self._lock:
+            self._pending[patient_id] = status
+        self._flush_trigger()
+
+    def update_many(self, statuses):
+        with self._lock:
+            self._pending.update(statuses)
+        self._flush_trigger()
+
+    @profiled("doctor.status_flush")
+    def flush(self, *args):
+        """
+        Apply pending changes to the model. Returns the diff that was applied.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        changed = {}
+        for patient_id, status in pending.items():
+            row = self.model.get(patient_id)
+            if row is None or row["status"] == status:
+                continue
+            changed[patient_id] = (row["status"], status)
+            self.model.upsert({"id": patient_id, "status": status})
+        if changed:
+            for callback in self._listeners:
+                callback(changed, self.model.status_counts)
+        return changed
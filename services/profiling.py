@@ -0,0 +1,256 @@
+"""
+Lightweight timing instrumentation for hot paths.
+
+    @profiled("patient.update_graph")       # decorator
+    def update_graph(self, dt): ...
+
+    with section("doctor.layout"):          # context manager
+        ...
+
+    fn = wrap("db.login", auth.login)       # per-call wrapping (e.g. jobs)
+
+Everything records into named Metrics (count, total, min/max, a fixed
+histogram and the most recent samples for percentiles). FrameMonitor feeds
+the time between Kivy frames into the "frame" metric. snapshot() returns
+it all as a dict and export() writes it as JSON or CSV.
+
+Profiling is off unless HEALTHCARE_PROFILE is set or enable() is called.
+While off, a profiled function costs one extra call and a flag check,
+section() hands back a shared no-op context manager, and wrap() returns the
+function itself. Kivy is only imported by FrameMonitor.
+"""
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+PROFILE_ENV = "HEALTHCARE_PROFILE"
+#! Where to write the metrics when the app stops (.json or .csv)
+EXPORT_ENV = "HEALTHCARE_PROFILE_EXPORT"
+#! Histogram bucket upper bounds in ms; 16.7 / 33.3 are 60 / 30 fps frames
+BUCKETS_MS = (1, 2, 4, 8, 16.7, 33.3, 50, 100, 250, 1000, float("inf"))
+RECENT_SAMPLES = 1024
+FRAME = "frame"
+
+
+class _State:
+    enabled = bool(os.environ.get(PROFILE_ENV))
+
+
+_state = _State()
+
+
+def enabled():
+    return _state.enabled
+
+
+def enable():
+    _state.enabled = True
+
+
+def disable():
+    _state.enabled = False
+
+
+class Metric:
+    """Running statistics for one named timer (milliseconds)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.histogram = [0] * len(BUCKETS_MS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        self.histogram[bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+
+    def percentile(self, pct):
+        """Percentile over the most recent samples."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "max_ms": round(self.max, 3),
+            "histogram": {_bucket_label(edge): n for edge, n in zip(BUCKETS_MS, self.histogram)},
+        }
+
+
+def _bucket_label(edge):
+    return "le_inf" if edge == float("inf") else f"le_{edge:g}ms"
+
+
+class Registry:
+    """Named metrics, safe to record into from worker threads."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, ms):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(name)
+            metric.add(ms)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def names(self):
+        with self._lock:
+            return list(self._metrics)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: metric.summary() for name, metric in self._metrics.items()}
+
+
+registry = Registry()
+record = registry.record
+
+
+class _Section:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+def section(name):
+    """Context manager timing its body into `name`."""
+    return _Section(name) if _state.enabled else _NULL_SECTION
+
+
+def profiled(name=None):
+    """
+    Decorator timing every call into `name` (default: the function's
+    qualified name) while profiling is enabled.
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+
+def wrap(name, fn):
+    """fn timed into `name` if profiling is on right now, otherwise fn itself."""
+    return profiled(name)(fn) if _state.enabled else fn
+
+
+class FrameMonitor:
+    """
+    Records the time between Kivy frames into the "frame" metric from a
+    Clock callback that runs every frame while started.
+    """
+
+    def __init__(self):
+        self._event = None
+        self._last = None
+
+    @property
+    def running(self):
+        return self._event is not None
+
+    def start(self):
+        if self._event is None:
+            from kivy.clock import Clock
+            self._last = None
+            self._event = Clock.schedule_interval(self._tick, 0)
+
+    def stop(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def _tick(self, dt):
+        now = time.perf_counter()
+        if self._last is not None:
+            record(FRAME, (now - self._last) * 1000)
+        self._last = now
+
+
+def snapshot():
+    return {"generated": time.time(), "metrics": registry.snapshot()}
+
+
+def export(path):
+    """
+    Write every metric to `path`: JSON, or CSV (one row per metric, one
+    column per histogram bucket) when the path ends in .csv.
+    """
+    data = snapshot()
+    if path.lower().endswith(".csv"):
+        buckets = [_bucket_label(edge) for edge in BUCKETS_MS]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "count", "total_ms", "mean_ms", "min_ms", "p50_ms", "p95_ms",
+                             "max_ms"] + buckets)
+            for name, m in sorted(data["metrics"].items()):
+                writer.writerow([name, m["count"], m["total_ms"], m["mean_ms"], m["min_ms"], m["p50_ms"],
+                                 m["p95_ms"], m["max_ms"]] + [m["histogram"][b] for b in buckets])
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    return path
+
+
+def export_path():
+    return os.environ.get(EXPORT_ENV) or None
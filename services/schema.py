@@ -0,0 +1,169 @@
+"""
+Versioned schema migrations for users.db and query-plan checks for the
+hot lookups.
+
+The applied version is kept in PRAGMA user_version. Each migration runs in
+its own transaction, so a failure leaves the database at the last good
+version. Check the plans against a scratch database with:
+    python -m services.schema --check
+or against a real file with:
+    python -m services.schema --check users.db
+"""
+import sqlite3
+import sys
+
+#! (version, description, statements). Append only - never edit a shipped entry.
+MIGRATIONS = [
+    (1, "base users/otps tables", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            email TEXT,
+            aadhaar TEXT UNIQUE,
+            phone TEXT,
+            password TEXT,
+            role TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS otps (
+            aadhaar TEXT,
+            otp TEXT,
+            expiry TEXT
+        )
+        """,
+    )),
+    (2, "covering and lookup indexes", (
+        # Login reads (password, role) by (aadhaar, role): answered from the index alone.
+        # The planner prefers the UNIQUE(aadhaar) index, so the query pins this one
+        # with INDEXED BY (which also errors loudly if the index ever goes missing).
+        "CREATE INDEX IF NOT EXISTS idx_users_login ON users(aadhaar, role, password)",
+        "CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone)",
+        "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
+        # Admin / doctor views list users of one role ordered by name
+        "CREATE INDEX IF NOT EXISTS idx_users_role_name ON users(role, name)",
+        "CREATE INDEX IF NOT EXISTS idx_otps_aadhaar ON otps(aadhaar, expiry)",
+        "CREATE INDEX IF NOT EXISTS idx_otps_expiry ON otps(expiry)",
+    )),
+    (3, "settings table", (
+        # Per-database settings, e.g. the calibrated password work factor
+        "CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)",
+    )),
+    (4, "session revocations", (
+        # When each user's sessions were last ended (password reset, deletion),
+        # so every process refuses tokens issued before then
+        "CREATE TABLE IF NOT EXISTS session_revocations (aadhaar TEXT PRIMARY KEY, revoked REAL NOT NULL)",
+    )),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """
+    Bring the database up to the last version in migrations (users.db's
+    by default). Returns the versions applied.
+    """
+    applied = []
+    for version, _description, statements in migrations:
+        if version <= current_version(conn):
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Re-check under the write lock in case another connection migrated
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+#! Hot queries and the index each one must be answered by. Keep in sync with
+#! the SQL constants in services/users.py and services/otp.py.
+HOT_QUERIES = {
+    "login": ("SELECT password, role FROM users INDEXED BY idx_users_login WHERE aadhaar=? AND role=?",
+              "idx_users_login"),
+    "exists": ("SELECT 1 FROM users WHERE aadhaar=?",
+               "sqlite_autoindex_users_1"),
+    "profile": ("SELECT id, name, email, aadhaar, phone, role FROM users WHERE aadhaar=?",
+                "sqlite_autoindex_users_1"),
+    "by_phone": ("SELECT id, name, aadhaar, role FROM users WHERE phone=?",
+                 "idx_users_phone"),
+    "by_email": ("SELECT id, name, aadhaar, role FROM users WHERE email=?",
+                 "idx_users_email"),
+    "by_role": ("SELECT id, name, aadhaar, phone FROM users WHERE role=? ORDER BY name LIMIT ? OFFSET ?",
+                "idx_users_role_name"),
+    "otp_lookup": ("SELECT otp, expiry FROM otps WHERE aadhaar=? AND expiry>? ORDER BY expiry DESC LIMIT 1",
+                   "idx_otps_aadhaar"),
+    "otp_purge": ("DELETE FROM otps WHERE expiry<=?",
+                  "idx_otps_expiry"),
+    "otp_load": ("SELECT aadhaar, otp, expiry FROM otps WHERE expiry>?",
+                 "idx_otps_expiry"),
+    "revoked": ("SELECT revoked FROM session_revocations WHERE aadhaar=?",
+                "sqlite_autoindex_session_revocations_1"),
+}
+
+
+def explain(conn, sql):
+    """
+    Return the EXPLAIN QUERY PLAN detail strings for sql.
+    """
+    params = (None,) * sql.count("?")
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def check_query_plans(conn):
+    """
+    Return a list of problems: any hot query that scans a table, sorts
+    with a temp b-tree, or does not use its expected index.
+    """
+    problems = []
+    for name, (sql, index) in HOT_QUERIES.items():
+        plan = explain(conn, sql)
+        text = " | ".join(plan)
+        if any(step.startswith("SCAN") for step in plan):
+            problems.append(f"{name}: full scan ({text})")
+        if any("TEMP B-TREE" in step for step in plan):
+            problems.append(f"{name}: temp b-tree sort ({text})")
+        if index not in text:
+            problems.append(f"{name}: expected {index} ({text})")
+    return problems
+
+
+def main(argv):
+    path = argv[2] if len(argv) > 2 else ":memory:"
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        if path == ":memory:":
+            migrate(conn)
+        print(f"schema version {current_version(conn)} (latest {SCHEMA_VERSION})")
+        if "--check" not in argv:
+            return 0
+        try:
+            for name, (sql, _index) in HOT_QUERIES.items():
+                print(f"{name:<11} {' | '.join(explain(conn, sql))}")
+            problems = check_query_plans(conn)
+        except sqlite3.OperationalError as e:
+            # A table or index the hot queries need is missing
+            problems = [f"schema not migrated ({e})"]
+        for problem in problems:
+            print("FAIL", problem)
+        return 1 if problems else 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
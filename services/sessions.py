@@ -0,0 +1,214 @@
+"""
+Signed-in sessions: opaque tokens plus a cache of each user's profile and role.
+
+    token = sessions.create(aadhaar)          # after a successful login
+    sessions.authorize(token, "Doctor")       # no DB round-trip while cached
+
+Tokens are random and mean nothing outside this process. Profiles are
+loaded through `loader` (UserRepository.find_profile) on first use and
+kept in an LRU of `size` users for `profile_ttl` seconds, so a role
+changed by another process (e.g. an import) is picked up within that
+time. invalidate_user() drops a user's profile and ends their sessions
+at once in this process; AuthService.reset_password and check_db's delete
+call it. Other processes learn of a reset or deletion from users.db:
+UserRepository records when a user's sessions were revoked, and with
+`revoked` set (UserRepository.sessions_revoked) a profile load ends the
+sessions opened before then, so they stop working within profile_ttl.
+
+At most `max_sessions` sessions are kept, least recently used first: a
+new one past the limit ends the oldest. Expired tokens are dropped when
+they are next looked up rather than by scanning every session.
+
+One manager is shared by the UI and the job threads (get_sessions()),
+so every method is thread-safe; the DB load runs outside the lock.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from services.api_client import api_url
+from services.users import UserRepository
+
+SESSION_TTL = 12 * 3600.0   # seconds a token stays valid
+PROFILE_TTL = 300.0         # seconds a cached profile is trusted
+CACHE_SIZE = 1024           # users whose profiles are kept
+SESSION_LIMIT = 10_000      # live sessions kept before the oldest is ended
+
+Profile = namedtuple("Profile", "id name email aadhaar phone role")
+
+
+class PermissionDenied(PermissionError):
+    pass
+
+
+class SessionManager:
+    """
+    Tokens -> users -> cached Profile. With loader=None (a remote backend)
+    the profile passed to create() is kept for as long as it stays cached.
+    """
+
+    def __init__(self, loader=None, ttl=SESSION_TTL, profile_ttl=PROFILE_TTL, size=CACHE_SIZE,
+                 max_sessions=SESSION_LIMIT, revoked=None):
+        self.loader = loader
+        self.revoked = revoked
+        self.ttl = ttl
+        self.profile_ttl = profile_ttl
+        self.size = size
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # token -> (aadhaar, expires, created), least recently used first
+        self._tokens = {}               # aadhaar -> set of tokens
+        self._profiles = OrderedDict()  # aadhaar -> (Profile, expires), least recently used first
+        # Bumped by every invalidation, so a load that raced one isn't cached
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self, aadhaar, profile, now):
+        expires = now + self.profile_ttl if self.loader is not None else float("inf")
+        self._profiles[aadhaar] = (profile, expires)
+        self._profiles.move_to_end(aadhaar)
+        while len(self._profiles) > self.size:
+            self._profiles.popitem(last=False)
+
+    def _end_user(self, aadhaar):
+        for token in self._tokens.pop(aadhaar, ()):
+            self._sessions.pop(token, None)
+
+    def _end(self, token):
+        session = self._sessions.pop(token, None)
+        if session is not None:
+            tokens = self._tokens.get(session[0])
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens[session[0]]
+
+    def _load(self, aadhaar, epoch):
+        row = self.loader(aadhaar) if self.loader is not None else None
+        profile = Profile(*row) if row is not None else None
+        revoked = self.revoked(aadhaar) if profile is not None and self.revoked is not None else 0.0
+        with self._lock:
+            if self._epoch != epoch:
+                return profile
+            if profile is None:
+                # Gone from the database (or never there): its sessions end
+                self._profiles.pop(aadhaar, None)
+                self._end_user(aadhaar)
+            else:
+                self._store(aadhaar, profile, time.monotonic())
+                # Revoked elsewhere (e.g. a reset in another process)
+                for token in [t for t in self._tokens.get(aadhaar, ()) if self._sessions[t][2] <= revoked]:
+                    self._end(token)
+        return profile
+
+    def create(self, aadhaar, profile=None):
+        """
+        A new token for the user, or None if there is no such user. Pass the
+        profile (a Profile or its fields as a row) when the caller already has
+        it to skip the lookup.
+        """
+        now = time.monotonic()
+        with self._lock:
+            epoch = self._epoch
+            if profile is not None:
+                self._store(aadhaar, Profile(*profile), now)
+        if profile is None and self._load(aadhaar, epoch) is None:
+            return None
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            while len(self._sessions) >= self.max_sessions:
+                self._end(next(iter(self._sessions)))
+            self._sessions[token] = (aadhaar, now + self.ttl, time.time())
+            self._tokens.setdefault(aadhaar, set()).add(token)
+        return token
+
+    def profile(self, token):
+        """The signed-in user's Profile, or None for an unknown, ended or expired token."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            aadhaar, expires, _created = session
+            if expires <= now:
+                self._end(token)
+                return None
+            self._sessions.move_to_end(token)
+            cached = self._profiles.get(aadhaar)
+            if cached is not None and cached[1] > now:
+                self._profiles.move_to_end(aadhaar)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            epoch = self._epoch
+        profile = self._load(aadhaar, epoch)
+        if profile is None:
+            return None
+        with self._lock:
+            # The session may have been ended while the profile loaded
+            return profile if token in self._sessions else None
+
+    def role(self, token):
+        profile = self.profile(token)
+        return profile.role if profile is not None else None
+
+    def authorize(self, token, *roles):
+        """True if the token is live and (when roles are given) its role is one of them."""
+        profile = self.profile(token)
+        if profile is None:
+            return False
+        return not roles or profile.role.lower() in {role.lower() for role in roles}
+
+    def require(self, token, *roles):
+        """Like authorize() but returns the Profile, raising PermissionDenied otherwise."""
+        profile = self.profile(token)
+        if profile is None:
+            raise PermissionDenied("not signed in or session expired")
+        if roles and profile.role.lower() not in {role.lower() for role in roles}:
+            raise PermissionDenied(f"{profile.role} may not do this")
+        return profile
+
+    def end(self, token):
+        """Sign out: the token stops working."""
+        with self._lock:
+            self._end(token)
+
+    def invalidate_user(self, aadhaar):
+        """Forget the user's profile and end all their sessions (password reset, deletion)."""
+        with self._lock:
+            self._epoch += 1
+            self._profiles.pop(aadhaar, None)
+            self._end_user(aadhaar)
+
+    def clear(self):
+        """Drop every cached profile; sessions stay valid and reload on next use."""
+        with self._lock:
+            self._epoch += 1
+            self._profiles.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+_default_sessions = None
+_default_lock = threading.Lock()
+
+
+def get_sessions():
+    """
+    Process-wide session manager, created on first use. Profiles load from
+    users.db unless HEALTHCARE_API_URL is set, in which case they come from
+    the login response.
+    """
+    global _default_sessions
+    with _default_lock:
+        if _default_sessions is None:
+            if api_url():
+                _default_sessions = SessionManager()
+            else:
+                users = UserRepository()
+                _default_sessions = SessionManager(users.find_profile, revoked=users.sessions_revoked)
+        return _default_sessions
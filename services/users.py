@@ -0,0 +1,202 @@
+import sqlite3
+import time
+
+from services.db import get_pool
+from services.schema import migrate, HOT_QUERIES
+
+#! SQL kept as constants so the connection's statement cache reuses them.
+#! Read queries come from schema.HOT_QUERIES so their plans are checked.
+SELECT_LOGIN = HOT_QUERIES["login"][0]
+SELECT_EXISTS = HOT_QUERIES["exists"][0]
+SELECT_PROFILE = HOT_QUERIES["profile"][0]
+SELECT_BY_PHONE = HOT_QUERIES["by_phone"][0]
+SELECT_BY_EMAIL = HOT_QUERIES["by_email"][0]
+SELECT_BY_ROLE = HOT_QUERIES["by_role"][0]
+SELECT_REVOKED = HOT_QUERIES["revoked"][0]
+INSERT_USER = """
+    INSERT INTO users (name, email, aadhaar, phone, password, role)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+UPDATE_PASSWORD = "UPDATE users SET password=? WHERE aadhaar=?"
+#! Walks the table by id, so rows that can't be upgraded are not read again
+SELECT_LEGACY_PASSWORDS = """
+    SELECT id, aadhaar, password FROM users
+    WHERE id > ? AND password NOT LIKE 'scrypt$%' ORDER BY id LIMIT ?
+"""
+#! Only replaces the value that was read, so a concurrent reset is not overwritten
+UPGRADE_PASSWORD = "UPDATE users SET password=? WHERE aadhaar=? AND password=?"
+DELETE_USER = "DELETE FROM users WHERE aadhaar = ?"
+#! Sessions opened before this time are refused by every process (see services.sessions)
+REVOKE_SESSIONS = "INSERT OR REPLACE INTO session_revocations (aadhaar, revoked) VALUES (?, ?)"
+SELECT_USERS = "SELECT id, name, email, aadhaar, phone, role FROM users"
+SELECT_EXPORT = "SELECT name, email, aadhaar, phone, role, password FROM users ORDER BY id"
+SELECT_EXISTING = "SELECT aadhaar FROM users WHERE aadhaar IN ({})"
+#! A NULL password in an import keeps the one already stored
+UPDATE_USER = """
+    UPDATE users SET name=?, email=?, phone=?, password=COALESCE(?, password), role=?
+    WHERE aadhaar=?
+"""
+SELECT_SETTING = "SELECT value FROM settings WHERE name=?"
+SET_SETTING = "INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)"
+#! Max Aadhaars per IN (...) lookup
+LOOKUP_CHUNK = 500
+
+AADHAAR_DIGITS = 12
+
+
+def normalize_aadhaar(value):
+    """
+    Aadhaar as stored: digits only, the way AadhaarInput keeps them
+    ("1234-5678 9012" -> "123456789012"). Does not check the length.
+    """
+    return "".join(ch for ch in str(value) if ch.isdigit())
+
+
+class UserRepository:
+    """
+    All reads and writes of the users table go through here.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
+
+    def create_tables(self):
+        """
+        Create / upgrade the schema (tables and indexes) to the latest version.
+        """
+        with self.pool.connection() as conn:
+            return migrate(conn)
+
+    def find_login(self, aadhaar, role):
+        """
+        Returns (password, role) for the account or None.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_LOGIN, (aadhaar, role)).fetchone()
+
+    def exists(self, aadhaar):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_EXISTS, (aadhaar,)).fetchone() is not None
+
+    def find_profile(self, aadhaar):
+        """
+        Returns (id, name, email, aadhaar, phone, role) or None.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_PROFILE, (aadhaar,)).fetchone()
+
+    def find_by_phone(self, phone):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_BY_PHONE, (phone,)).fetchall()
+
+    def find_by_email(self, email):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_BY_EMAIL, (email,)).fetchall()
+
+    def list_by_role(self, role, limit=50, offset=0):
+        """
+        One page of (id, name, aadhaar, phone) for a role, ordered by name.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_BY_ROLE, (role, limit, offset)).fetchall()
+
+    def add_user(self, name, email, aadhaar, phone, password, role):
+        """
+        Raises sqlite3.IntegrityError if the Aadhaar is already registered.
+        """
+        with self.pool.transaction() as conn:
+            conn.execute(INSERT_USER, (name, email, aadhaar, phone, password, role))
+
+    def update_password(self, aadhaar, password):
+        """
+        Set a new password (a reset). The user's existing sessions are
+        revoked in the same transaction.
+        """
+        with self.pool.transaction() as conn:
+            updated = conn.execute(UPDATE_PASSWORD, (password, aadhaar)).rowcount
+            conn.execute(REVOKE_SESSIONS, (aadhaar, time.time()))
+            return updated
+
+    def sessions_revoked(self, aadhaar):
+        """UNIX time the user's sessions were last revoked, or 0.0."""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_REVOKED, (aadhaar,)).fetchone()
+        return row[0] if row is not None else 0.0
+
+    def legacy_passwords(self, limit, after=0):
+        """
+        Up to limit (id, aadhaar, password) rows with an id above `after`
+        that still hold plaintext passwords, in id order.
+        """
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_LEGACY_PASSWORDS, (after, limit)).fetchall()
+
+    def set_passwords(self, updates):
+        """
+        Bulk-replace passwords from (new_password, aadhaar, old_password) rows.
+        Returns the number of rows changed.
+        """
+        with self.pool.transaction() as conn:
+            return conn.executemany(UPGRADE_PASSWORD, updates).rowcount
+
+    def get_setting(self, name):
+        """
+        The stored value of a setting, or None when it is unset (or the
+        database predates the settings table).
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(SELECT_SETTING, (name,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row is not None else None
+
+    def set_setting(self, name, value):
+        with self.pool.transaction() as conn:
+            conn.execute(SET_SETTING, (name, str(value)))
+
+    def delete_by_aadhaar(self, aadhaar):
+        with self.pool.transaction() as conn:
+            deleted = conn.execute(DELETE_USER, (aadhaar,)).rowcount
+            conn.execute(REVOKE_SESSIONS, (aadhaar, time.time()))
+            return deleted
+
+    def all_users(self):
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_USERS).fetchall()
+
+    def iter_users(self, batch_size=1000):
+        """
+        Yield (name, email, aadhaar, phone, role, password) for every user,
+        fetching batch_size rows at a time so memory stays flat.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.execute(SELECT_EXPORT)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+
+    def import_chunk(self, rows, update=False):
+        """
+        Insert (name, email, aadhaar, phone, password, role) rows, whose
+        Aadhaars must be distinct, in one write transaction. Rows whose
+        Aadhaar is already registered are skipped, or update that user when
+        update=True. Returns the set of those Aadhaars.
+        """
+        with self.pool.transaction() as conn:
+            # Take the write lock up front so the lookup and the inserts agree
+            conn.execute("BEGIN IMMEDIATE")
+            aadhaars = [row[2] for row in rows]
+            existing = set()
+            for start in range(0, len(aadhaars), LOOKUP_CHUNK):
+                part = aadhaars[start:start + LOOKUP_CHUNK]
+                sql = SELECT_EXISTING.format(", ".join("?" * len(part)))
+                existing.update(aadhaar for (aadhaar,) in conn.execute(sql, part))
+            conn.executemany(INSERT_USER, (row for row in rows if row[2] not in existing))
+            if update and existing:
+                conn.executemany(UPDATE_USER, ((name, email, phone, password, role, aadhaar)
+                                               for name, email, aadhaar, phone, password, role in rows
+                                               if aadhaar in existing))
+        return existing
@@ -0,0 +1,211 @@
+"""
+Streaming ward-wide aggregation of one vital sign.
+
+WardAggregator keeps two things up to date as readings arrive, without
+ever revisiting a patient's history:
+
+  * time buckets - for each of the last `buckets` periods of
+    `bucket_seconds`: count, sum, min, max and a fixed-width histogram
+    (approximate percentiles, to within one bin)
+  * the ward now  - the same statistics over each member's latest reading
+
+Adding a reading is O(1): one bucket's counters and one histogram bin,
+plus swapping the patient's previous latest value out of the ward-now
+histogram. Batches go through NumPy, so a tick of readings for the whole
+ward is a few array operations. Patients join and leave with
+add_patient() / remove_patient(); readings from non-members are ignored
+and a leaving patient's latest value drops out of the ward-now
+statistics at once. Past buckets keep what was recorded while they were
+current.
+"""
+import math
+
+import numpy as np
+
+#! Heart rate by default; bins are bin_width wide between low and high
+HR_RANGE = (0.0, 250.0)
+
+
+class WardAggregator:
+    def __init__(self, patient_ids=(), bucket_seconds=60.0, buckets=12,
+                 low=HR_RANGE[0], high=HR_RANGE[1], bin_width=1.0):
+        self.bucket_seconds = float(bucket_seconds)
+        self.buckets = int(buckets)
+        self.low = float(low)
+        self.bin_width = float(bin_width)
+        self.bins = max(1, int(math.ceil((high - low) / bin_width)))
+        b = self.buckets
+        self._bucket_ids = np.full(b, -1, dtype=np.int64)    # absolute bucket number in each slot
+        self._count = np.zeros(b, dtype=np.int64)
+        self._sum = np.zeros(b)
+        self._min = np.full(b, np.inf)
+        self._max = np.full(b, -np.inf)
+        self._hist = np.zeros((b, self.bins), dtype=np.int64)
+        self.newest = None
+        # Ward now: latest value per member slot
+        self._slots = {}
+        self._free = []
+        self._latest = np.full(0, np.nan)
+        self._now_hist = np.zeros(self.bins, dtype=np.int64)
+        self._now_sum = 0.0
+        self._now_count = 0
+        self.set_patients(patient_ids)
+
+    # --- membership ---
+
+    def add_patient(self, patient_id):
+        if patient_id in self._slots:
+            return
+        if not self._free:
+            grow = max(16, len(self._latest))
+            self._free = list(range(len(self._latest) + grow - 1, len(self._latest) - 1, -1))
+            self._latest = np.concatenate([self._latest, np.full(grow, np.nan)])
+        self._slots[patient_id] = self._free.pop()
+
+    def remove_patient(self, patient_id):
+        slot = self._slots.pop(patient_id, None)
+        if slot is None:
+            return
+        old = self._latest[slot]
+        if not np.isnan(old):
+            self._now_hist[self._bin(old)] -= 1
+            self._now_sum -= old
+            self._now_count -= 1
+            self._latest[slot] = np.nan
+        self._free.append(slot)
+
+    def set_patients(self, patient_ids):
+        patient_ids = set(patient_ids)
+        for patient_id in [p for p in self._slots if p not in patient_ids]:
+            self.remove_patient(patient_id)
+        for patient_id in patient_ids:
+            self.add_patient(patient_id)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._slots
+
+    # --- ingestion ---
+
+    def _bin(self, values):
+        idx = ((np.asarray(values) - self.low) / self.bin_width).astype(np.int64)
+        return np.clip(idx, 0, self.bins - 1)
+
+    def _advance(self, bucket):
+        """Make `bucket` the newest, recycling the slots of buckets that fall out."""
+        if self.newest is not None and bucket <= self.newest:
+            return
+        start = bucket - self.buckets + 1 if self.newest is None else max(self.newest + 1, bucket - self.buckets + 1)
+        for b in range(start, bucket + 1):
+            s = b % self.buckets
+            self._bucket_ids[s] = b
+            self._count[s] = 0
+            self._sum[s] = 0.0
+            self._min[s] = np.inf
+            self._max[s] = -np.inf
+            self._hist[s] = 0
+        self.newest = bucket
+
+    def add(self, patient_id, timestamp, value):
+        self.add_many([patient_id], [timestamp], [value])
+
+    def add_readings(self, readings, metric="hr"):
+        """vitals.ingest.Reading tuples, oldest first."""
+        if readings:
+            self.add_many([r.patient for r in readings], [r.timestamp for r in readings],
+                          [getattr(r, metric) for r in readings])
+
+    def add_many(self, patient_ids, timestamps, values):
+        """
+        Add readings (oldest first). Readings from patients outside the ward,
+        NaNs and readings older than the oldest bucket are dropped.
+        """
+        get = self._slots.get
+        slots = np.fromiter((get(p, -1) for p in patient_ids), dtype=np.int64, count=len(patient_ids))
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        keep = (slots >= 0) & ~np.isnan(values)
+        if not keep.all():
+            slots, timestamps, values = slots[keep], timestamps[keep], values[keep]
+        if not len(values):
+            return
+        bins = self._bin(values)
+
+        # Time buckets
+        buckets = np.floor(timestamps / self.bucket_seconds).astype(np.int64)
+        self._advance(int(buckets.max()))
+        live = buckets > self.newest - self.buckets
+        b, v, vb = buckets[live], values[live], bins[live]
+        s = b % self.buckets
+        n = self.buckets
+        self._count += np.bincount(s, minlength=n)
+        self._sum += np.bincount(s, weights=v, minlength=n)
+        self._hist += np.bincount(s * self.bins + vb, minlength=n * self.bins).reshape(n, self.bins)
+        for slot in np.unique(s):
+            mine = v[s == slot]
+            self._min[slot] = min(self._min[slot], mine.min())
+            self._max[slot] = max(self._max[slot], mine.max())
+
+        # Ward now: each patient's last reading in this batch replaces their previous one
+        order = slots[::-1]
+        last_slots, first = np.unique(order, return_index=True)
+        last_values = values[::-1][first]
+        last_bins = bins[::-1][first]
+        old = self._latest[last_slots]
+        had = ~np.isnan(old)
+        if had.any():
+            self._now_hist -= np.bincount(self._bin(old[had]), minlength=self.bins)
+            self._now_sum -= old[had].sum()
+            self._now_count -= int(had.sum())
+        self._latest[last_slots] = last_values
+        self._now_hist += np.bincount(last_bins, minlength=self.bins)
+        self._now_sum += last_values.sum()
+        self._now_count += len(last_values)
+
+    # --- queries ---
+
+    def _percentile(self, hist, count, pct):
+        if not count:
+            return math.nan
+        rank = max(1, math.ceil(count * pct / 100))
+        index = int(np.searchsorted(np.cumsum(hist), rank))
+        return self.low + (index + 0.5) * self.bin_width
+
+    def trend(self, percentiles=(10, 50, 90)):
+        """
+        Oldest-first list of dicts for the buckets in the window: start time,
+        count, mean, min, max and p<N> for each requested percentile (NaN for
+        buckets without readings).
+        """
+        if self.newest is None:
+            return []
+        out = []
+        for b in range(self.newest - self.buckets + 1, self.newest + 1):
+            s = b % self.buckets
+            count = int(self._count[s]) if self._bucket_ids[s] == b else 0
+            row = {"start": b * self.bucket_seconds, "count": count,
+                   "mean": float(self._sum[s]) / count if count else math.nan,
+                   "min": float(self._min[s]) if count else math.nan,
+                   "max": float(self._max[s]) if count else math.nan}
+            for pct in percentiles:
+                row[f"p{pct}"] = self._percentile(self._hist[s], count, pct)
+            out.append(row)
+        return out
+
+    def series(self, stat="mean"):
+        """(bucket index, value) points for a graph, oldest bucket at 0; empty buckets skipped."""
+        pct = (int(stat[1:]),) if stat.startswith("p") else ()
+        return [(i, row[stat]) for i, row in enumerate(self.trend(pct)) if row["count"]]
+
+    def now(self, percentiles=(10, 50, 90)):
+        """Statistics over every member's latest reading; min/max to within a bin."""
+        count = self._now_count
+        nonzero = np.flatnonzero(self._now_hist)
+        row = {"count": count, "mean": float(self._now_sum) / count if count else math.nan,
+               "min": self.low + int(nonzero[0]) * self.bin_width if count else math.nan,
+               "max": self.low + int(nonzero[-1] + 1) * self.bin_width if count else math.nan}
+        for pct in percentiles:
+            row[f"p{pct}"] = self._percentile(self._now_hist, count, pct)
+        return row
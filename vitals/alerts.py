@@ -0,0 +1,348 @@
+"""
+Vectorized alert rules over the vitals of a whole ward.
+
+AlertEngine keeps the last `window` readings of every metric for every
+patient in one (metrics, patients, window) NumPy array, plus running sums
+that are updated as readings arrive. evaluate() then checks every rule
+for all patients at once, so one tick costs a handful of array operations
+however many patients there are:
+
+  * ThresholdRule - latest value outside [low, high]
+  * ZScoreRule    - latest value more than `z` standard deviations from
+                    the mean of the rest of the window
+  * TrendRule     - least-squares slope over the window, in units per
+                    minute, past `per_minute` (rising if positive,
+                    falling if negative)
+
+A patient's status is the most severe rule firing for them ("Critical",
+"Monitoring"), otherwise "Stable". An Alert is emitted when a rule starts
+firing for a patient, not on every tick it stays on.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+METRICS = ("hr", "bp", "spo2", "temp")
+STABLE = "Stable"
+#! Most severe first; index 0 of the status codes means STABLE
+SEVERITIES = ("Critical", "Monitoring")
+#! Ticks between exact recomputations of the running sums
+RESYNC_TICKS = 1000
+
+Alert = namedtuple("Alert", "patient rule severity value")
+
+
+class Rule:
+    def __init__(self, name, metric, severity, min_samples=1):
+        if severity not in SEVERITIES:
+            raise ValueError(f"unknown severity {severity!r}")
+        self.name = name
+        self.metric = metric
+        self.severity = severity
+        self.min_samples = min_samples
+
+    def evaluate(self, engine):
+        """(fired, value) boolean and float arrays with one entry per patient."""
+        raise NotImplementedError
+
+
+class ThresholdRule(Rule):
+    def __init__(self, metric, low=None, high=None, severity="Monitoring", name=None):
+        super().__init__(name or f"{metric} outside [{low}, {high}]", metric, severity)
+        self.low = -np.inf if low is None else low
+        self.high = np.inf if high is None else high
+
+    def evaluate(self, engine):
+        value = engine.latest(self.metric)
+        return (value < self.low) | (value > self.high), value
+
+
+class ZScoreRule(Rule):
+    def __init__(self, metric, z=3.0, severity="Monitoring", min_samples=10, name=None):
+        super().__init__(name or f"{metric} z-score > {z}", metric, severity, min_samples)
+        self.z = z
+
+    def evaluate(self, engine):
+        value = engine.zscore(self.metric)
+        return np.abs(value) > self.z, value
+
+
+class TrendRule(Rule):
+    def __init__(self, metric, per_minute, severity="Monitoring", min_samples=None, name=None):
+        direction = "rising" if per_minute > 0 else "falling"
+        super().__init__(name or f"{metric} {direction} {abs(per_minute)}/min", metric, severity,
+                         min_samples or 0)
+        self.per_minute = per_minute
+
+    def evaluate(self, engine):
+        value = engine.slope(self.metric)
+        fired = value > self.per_minute if self.per_minute > 0 else value < self.per_minute
+        return fired, value
+
+
+#! Adult ranges for the simulator's units (bpm, systolic mmHg, %, deg F).
+#! Trend rules only look at full windows (min_samples=None).
+DEFAULT_RULES = (
+    ThresholdRule("hr", 40, 130, "Critical"),
+    ThresholdRule("hr", 50, 110),
+    ThresholdRule("bp", 80, 180, "Critical"),
+    ThresholdRule("bp", 90, 140),
+    ThresholdRule("spo2", 90, None, "Critical"),
+    ThresholdRule("spo2", 94, None),
+    ThresholdRule("temp", 95.0, 103.0, "Critical"),
+    ThresholdRule("temp", None, 100.4),
+    ZScoreRule("hr", 3.5),
+    ZScoreRule("bp", 3.5),
+    TrendRule("hr", 20.0),
+    TrendRule("spo2", -3.0),
+)
+
+
+class AlertEngine:
+    """
+    Rolling windows and rule evaluation for a fixed set of patients.
+    Not thread-safe: feed and evaluate it from one thread (the UI Clock).
+    """
+
+    def __init__(self, patient_ids, rules=DEFAULT_RULES, window=60, rate_hz=1.0, metrics=METRICS):
+        self.rules = tuple(rules)
+        self.window = window
+        self.rate_hz = rate_hz
+        self.metrics = tuple(metrics)
+        self._metric_index = {name: i for i, name in enumerate(self.metrics)}
+        for rule in self.rules:
+            if rule.metric not in self._metric_index:
+                raise ValueError(f"rule {rule.name!r} uses unknown metric {rule.metric!r}")
+        self.set_patients(patient_ids)
+
+    def set_patients(self, patient_ids):
+        """
+        (Re)start with empty windows for these patients.
+        """
+        ids = np.asarray(list(patient_ids), dtype=np.int64)
+        self.ids = ids
+        self._order = np.argsort(ids, kind="stable")
+        self._sorted_ids = ids[self._order]
+        n, w, m = len(ids), self.window, len(self.metrics)
+        self._values = np.zeros((m, n, w))
+        self._x = np.zeros((n, w))        # sample number of each slot, for slopes
+        self._head = np.zeros(n, dtype=np.int64)
+        self._next_x = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+        # Running sums over each window: y, y^2, x*y per metric; x, x^2 per patient
+        self._sy = np.zeros((m, n))
+        self._syy = np.zeros((m, n))
+        self._sxy = np.zeros((m, n))
+        self._sx = np.zeros(n)
+        self._sxx = np.zeros(n)
+        self._fired = np.zeros((n, len(self.rules)), dtype=bool)
+        self._ticks = 0
+        self.status_codes = np.zeros(n, dtype=np.int8)
+        self._reported = np.full(n, -1, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def slots(self, patient_ids):
+        """
+        Row index of each patient id, or -1 for ids the engine doesn't track.
+        """
+        patient_ids = np.asarray(patient_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(patient_ids.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_ids, patient_ids)
+        pos = np.minimum(pos, len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[pos] == patient_ids, self._order[pos], -1)
+
+    # --- ingestion ---
+
+    def ingest_readings(self, readings):
+        """
+        Add vitals.ingest.Reading tuples (oldest first). Readings for unknown
+        patients are ignored.
+        """
+        if not readings:
+            return
+        data = np.array(readings, dtype=np.float64)
+        columns = [2 + ("hr", "bp", "spo2", "temp").index(name) for name in self.metrics]
+        self.ingest(self.slots(data[:, 0].astype(np.int64)), data[:, columns])
+
+    def ingest(self, slots, values):
+        """
+        Add one row of `values` (one column per metric) for each slot, in
+        order. A slot may repeat; its readings are applied oldest first.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        known = slots >= 0
+        if not known.all():
+            slots, values = slots[known], values[known]
+        if not len(slots):
+            return
+        # Rank of each reading among those for the same patient: readings of
+        # equal rank touch distinct patients and can be pushed together
+        order = np.argsort(slots, kind="stable")
+        ordered = slots[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        rank = np.arange(len(ordered)) - np.repeat(starts, np.diff(np.r_[starts, len(ordered)]))
+        if not rank.any():
+            self._push(ordered, values[order])
+            return
+        for r in range(int(rank.max()) + 1):
+            pick = order[rank == r]
+            self._push(slots[pick], values[pick])
+
+    def _push(self, slots, values):
+        head = self._head[slots]
+        y = values.T                                   # (metrics, k)
+        old_y = self._values[:, slots, head]
+        old_x = self._x[slots, head]
+        x = self._next_x[slots]
+        # Empty slots hold zeros, so subtracting them is a no-op
+        self._sy[:, slots] += y - old_y
+        self._syy[:, slots] += y * y - old_y * old_y
+        self._sxy[:, slots] += x * y - old_x * old_y
+        self._sx[slots] += x - old_x
+        self._sxx[slots] += x * x - old_x * old_x
+        self._values[:, slots, head] = y
+        self._x[slots, head] = x
+        self._next_x[slots] = x + 1
+        self._head[slots] = (head + 1) % self.window
+        self.count[slots] = np.minimum(self.count[slots] + 1, self.window)
+
+    def resync(self):
+        """
+        Recompute the running sums exactly from the windows and renumber the
+        samples from 0, so rounding error and sample numbers stay bounded.
+        """
+        base = self._next_x - self.count
+        filled = np.arange(self.window) < self.count[:, None]
+        filled |= (self.count == self.window)[:, None]
+        # Every slot is either a window sample or still all zeros
+        self._x = np.where(filled, self._x - base[:, None], 0.0)
+        self._next_x -= base
+        self._sy = self._values.sum(axis=2)
+        self._syy = np.einsum("mnw,mnw->mn", self._values, self._values)
+        self._sxy = np.einsum("mnw,nw->mn", self._values, self._x)
+        self._sx = self._x.sum(axis=1)
+        self._sxx = np.einsum("nw,nw->n", self._x, self._x)
+
+    def windows(self):
+        """
+        (values, count): every window as a (metrics, patients, window) array,
+        oldest first and right-aligned, so the last count[i] samples of row i
+        are real. restore() takes the same pair back (see vitals.snapshot).
+        """
+        idx = (self._head[:, None] + np.arange(self.window)) % self.window
+        return np.take_along_axis(self._values, idx[None], axis=2), self.count.copy()
+
+    def restore(self, values, count):
+        """
+        Refill the windows from windows()-style values (any number of samples;
+        only the last `window` are kept), as if those readings had just been
+        ingested. Rows follow self.ids. Status reporting starts over.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        m, n, samples = values.shape
+        if (m, n) != (len(self.metrics), len(self.ids)):
+            raise ValueError(f"windows for {m} metrics x {n} patients, engine has "
+                             f"{len(self.metrics)} x {len(self.ids)}")
+        take = min(samples, self.window)
+        count = np.minimum(np.asarray(count, dtype=np.int64), take)
+        self.set_patients(self.ids)
+        # Real sample j of a row goes to slot j, where the j-th push would put it
+        j = np.arange(take)
+        filled = j < count[:, None]
+        src = np.minimum(samples - count[:, None] + j, samples - 1)
+        self._values[:, :, :take] = np.where(filled, np.take_along_axis(values, src[None], axis=2), 0.0)
+        self._x[:, :take] = np.where(filled, j, 0.0)
+        self._next_x = count.astype(np.float64)
+        self._head = count % self.window
+        self.count = count
+        self.resync()
+
+    # --- statistics (one value per patient, NaN where undefined) ---
+
+    def latest(self, metric):
+        m = self._metric_index[metric]
+        idx = (self._head - 1) % self.window
+        value = self._values[m, np.arange(len(self.ids)), idx]
+        return np.where(self.count > 0, value, np.nan)
+
+    def mean(self, metric):
+        m = self._metric_index[metric]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._sy[m] / self.count
+
+    def zscore(self, metric):
+        """
+        Latest value against the mean and standard deviation of the readings
+        before it in the window.
+        """
+        m = self._metric_index[metric]
+        y = self.latest(metric)
+        k = self.count - 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (self._sy[m] - y) / k
+            var = (self._syy[m] - y * y) / k - mean * mean
+            std = np.sqrt(np.maximum(var, 0.0))
+            # A flat history has no spread: any change from it is an outlier
+            return np.where(std > 1e-9, (y - mean) / std,
+                            np.where(np.abs(y - mean) > 1e-9, np.inf * np.sign(y - mean), 0.0))
+
+    def slope(self, metric):
+        """Least-squares slope over the window, in units per minute."""
+        m = self._metric_index[metric]
+        k = self.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            denom = k * self._sxx - self._sx * self._sx
+            per_sample = (k * self._sxy[m] - self._sx * self._sy[m]) / denom
+        return np.where(denom > 0, per_sample, np.nan) * (60.0 * self.rate_hz)
+
+    # --- rules ---
+
+    def evaluate(self):
+        """
+        Run every rule for every patient. Updates status_codes and returns the
+        list of new Alerts (rules that started firing since the last call).
+        """
+        self._ticks += 1
+        if self._ticks % RESYNC_TICKS == 0:
+            self.resync()
+        n = len(self.ids)
+        fired = np.zeros((n, len(self.rules)), dtype=bool)
+        values = np.empty((n, len(self.rules)))
+        codes = np.zeros(n, dtype=np.int8)
+        for r, rule in enumerate(self.rules):
+            hit, value = rule.evaluate(self)
+            hit &= self.count >= (rule.min_samples or self.window)
+            fired[:, r] = hit
+            values[:, r] = value
+            # Code 1 is the most severe, so keep the smallest non-zero code
+            code = SEVERITIES.index(rule.severity) + 1
+            codes = np.where(hit & ((codes == 0) | (codes > code)), code, codes)
+        started = fired & ~self._fired
+        self._fired = fired
+        self.status_codes = codes
+        alerts = []
+        for p, r in zip(*np.nonzero(started)):
+            rule = self.rules[r]
+            alerts.append(Alert(int(self.ids[p]), rule.name, rule.severity, float(values[p, r])))
+        return alerts
+
+    def status(self, code):
+        return SEVERITIES[code - 1] if code else STABLE
+
+    def status_changes(self):
+        """
+        {patient id: status} for patients whose status differs from the last
+        call. Patients without readings yet are left out.
+        """
+        changed = np.flatnonzero((self.status_codes != self._reported) & (self.count > 0))
+        self._reported[changed] = self.status_codes[changed]
+        names = (STABLE,) + SEVERITIES
+        return {int(pid): names[code] for pid, code in zip(self.ids[changed], self.status_codes[changed])}
+
+    def firing(self):
+        """Number of (patient, rule) pairs currently firing."""
+        return int(self._fired.sum())
@@ -0,0 +1,80 @@
+"""
+Fixed-size circular buffers for vitals samples.
+
+Each value is written twice, at i and i + capacity, in an array twice the
+window size. The latest `capacity` samples are therefore always one
+contiguous slice, so `view()` can hand out a memoryview (oldest sample
+first) without copying or reordering anything. Appends are O(1) and never
+allocate.
+"""
+from array import array
+
+#! Supported window sizes: the 12-point dashboard up to one day at 1 Hz
+MIN_WINDOW = 12
+MAX_WINDOW = 24 * 60 * 60
+
+
+class RingBuffer:
+    """
+    Circular buffer of doubles with an O(1) append and zero-copy view.
+    """
+
+    def __init__(self, capacity, fill=None):
+        if not MIN_WINDOW <= capacity <= MAX_WINDOW:
+            raise ValueError(f"window must be between {MIN_WINDOW} and {MAX_WINDOW} samples")
+        self.capacity = capacity
+        self._data = array('d', bytes(16 * capacity))   # 2 * capacity doubles, zeroed
+        self._head = 0      # slot the next sample goes into
+        self._count = 0
+        if fill is not None:
+            for value in fill:
+                self.append(value)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def latest(self):
+        if not self._count:
+            raise IndexError("latest() on an empty buffer")
+        return self._data[self._head - 1 if self._head else self.capacity - 1]
+
+    def view(self):
+        """
+        Zero-copy memoryview of the stored samples, oldest first. Only valid
+        until the next append.
+        """
+        end = self._head + self.capacity
+        return memoryview(self._data)[end - self._count:end]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+class VitalsBuffer:
+    """
+    One RingBuffer per metric, all sharing the same window.
+    """
+
+    def __init__(self, metrics, window=MIN_WINDOW):
+        self.window = window
+        self.metrics = {name: RingBuffer(window) for name in metrics}
+
+    def __getitem__(self, name):
+        return self.metrics[name]
+
+    def append(self, **values):
+        for name, value in values.items():
+            self.metrics[name].append(value)
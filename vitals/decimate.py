@@ -0,0 +1,136 @@
+"""
+Decimation of long vitals series down to what a graph can actually show.
+
+  * minmax()          - keep the min and max of each bucket (preserves spikes)
+  * lttb()            - Largest-Triangle-Three-Buckets (preserves shape)
+  * MultiResolution   - precomputed min/max pyramid so any zoom / pan range is
+                        reduced from a level close to the target size instead of
+                        from the raw samples
+
+All of them work on NumPy arrays; the only Python-level loop is LTTB's
+per-output-point step.
+"""
+import numpy as np
+
+
+def _as_xy(y, x):
+    y = np.asarray(y, dtype=np.float64)
+    if x is None:
+        x = np.arange(y.shape[0], dtype=np.float64)
+    else:
+        x = np.asarray(x, dtype=np.float64)
+    return x, y
+
+
+def minmax(y, buckets, x=None):
+    """
+    Reduce y to at most 2 * buckets points: the min and max of each bucket,
+    in their original order. Returns (x, y) arrays.
+    """
+    x, y = _as_xy(y, x)
+    n = y.shape[0]
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    full = (n // size) * size
+    body = y[:full].reshape(-1, size)       # a view, no copy
+    base = np.arange(0, full, size)
+    lo = body.argmin(axis=1) + base
+    hi = body.argmax(axis=1) + base
+    if full < n:
+        # Last, shorter bucket
+        lo = np.append(lo, y[full:].argmin() + full)
+        hi = np.append(hi, y[full:].argmax() + full)
+    idx = np.column_stack((np.minimum(lo, hi), np.maximum(lo, hi))).ravel()
+    return x[idx], y[idx]
+
+
+def lttb(y, n_out, x=None):
+    """
+    Largest-Triangle-Three-Buckets down to n_out points (first and last kept).
+    Returns (x, y) arrays.
+    """
+    x, y = _as_xy(y, x)
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The "next bucket" average for the last bucket is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.intp)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        bx, by = x[start:end], y[start:end]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (by - ay) - (ax - bx) * (next_y[i] - ay))
+        a = start + int(area.argmax())
+        out[i + 1] = a
+    return x[out], y[out]
+
+
+class MultiResolution:
+    """
+    Min/max pyramid over one series. Level 0 is the raw data; each level
+    above merges `factor` buckets of the one below. Build once per series
+    (or per stored range) and query as often as the view changes.
+    """
+
+    def __init__(self, y, x=None, factor=4, min_buckets=512):
+        x, y = _as_xy(y, x)
+        self.factor = factor
+        self.x = x
+        # Each level: (bucket start x, bucket min, bucket max)
+        self.levels = [(x, y, y)]
+        while self.levels[-1][0].shape[0] > min_buckets * factor:
+            bx, lo, hi = self.levels[-1]
+            full = (bx.shape[0] // factor) * factor
+            lo_next = lo[:full].reshape(-1, factor).min(axis=1)
+            hi_next = hi[:full].reshape(-1, factor).max(axis=1)
+            if full < bx.shape[0]:
+                # Partial last bucket so every level covers the whole series
+                lo_next = np.append(lo_next, lo[full:].min())
+                hi_next = np.append(hi_next, hi[full:].max())
+            self.levels.append((bx[::factor], lo_next, hi_next))
+
+    def query(self, x0, x1, width):
+        """
+        Render-ready (x, y) for x0 <= x <= x1, at most about 2 * width points.
+        """
+        i0 = int(np.searchsorted(self.x, x0, side="left"))
+        i1 = int(np.searchsorted(self.x, x1, side="right"))
+        if i1 <= i0:
+            return np.empty(0), np.empty(0)
+
+        # Coarsest level that still has >= 2 buckets per output pixel
+        level = 0
+        while level + 1 < len(self.levels):
+            scale = self.factor ** (level + 1)
+            if (i1 - i0) / scale < 2 * width:
+                break
+            level += 1
+
+        scale = self.factor ** level
+        bx, lo, hi = self.levels[level]
+        j0, j1 = i0 // scale, -(-i1 // scale)
+        bx, lo, hi = bx[j0:j1], lo[j0:j1], hi[j0:j1]
+        if level == 0:
+            return minmax(lo, width, bx)
+
+        # Merge the slice into `width` columns and draw each as a min -> max span
+        if bx.shape[0] > width:
+            edges = np.linspace(0, bx.shape[0], width + 1).astype(np.intp)[:-1]
+            edges = np.unique(edges)
+            bx = bx[edges]
+            lo = np.minimum.reduceat(lo, edges)
+            hi = np.maximum.reduceat(hi, edges)
+        return np.repeat(bx, 2), np.column_stack((lo, hi)).ravel()
@@ -0,0 +1,232 @@
+"""
+Vitals ingestion: pluggable sources, a background reader and a bounded
+hand-off queue that the UI drains at its own redraw rate.
+
+    source  --(reader thread, batches)-->  bounded pending queue  --drain()-->  UI Clock callback
+
+The reader never calls into Kivy, so a fast feed cannot flood the Clock;
+the screen decides how often it drains. When the queue is full the
+pipeline either drops the oldest readings (DROP_OLDEST) or keeps only the
+latest reading per patient (COALESCE). A sink that raises is logged and
+skipped for that batch; ingestion carries on.
+"""
+import logging
+import random
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+Reading = namedtuple("Reading", "patient timestamp hr bp spo2 temp")
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+
+
+def parse_line(line):
+    """
+    Parse one line-protocol record: b"<patient> <timestamp> <hr> <bp> <spo2> <temp>".
+    Returns None for blank or malformed lines.
+    """
+    fields = line.split()
+    if len(fields) != 6:
+        return None
+    try:
+        return Reading(int(fields[0]), float(fields[1]), float(fields[2]),
+                       float(fields[3]), float(fields[4]), float(fields[5]))
+    except ValueError:
+        return None
+
+
+def format_line(reading):
+    return ("%d %.3f %g %g %g %g\n" % reading).encode("ascii")
+
+
+class VitalsSource:
+    """
+    Interface for anything that produces readings. read_batch() blocks for
+    at most `timeout` seconds and returns a (possibly empty) list; it returns
+    None once the source is exhausted or closed.
+    """
+
+    def read_batch(self, max_items=256, timeout=0.1):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SimulatedSource(VitalsSource):
+    """
+    Local device simulator: random readings for `patients` patients at
+    `rate_hz` readings per second each (rate_hz=None means as fast as possible).
+    Patients are numbered from 0 unless `ids` gives their ids.
+    """
+
+    def __init__(self, patients=1, rate_hz=1.0, seed=None, ids=None):
+        self.ids = list(ids) if ids is not None else list(range(patients))
+        self.patients = len(self.ids)
+        self.rate_hz = rate_hz
+        self._random = random.Random(seed)
+        self._next = time.monotonic()
+        self._closed = False
+
+    def _reading(self, patient, now):
+        r = self._random
+        return Reading(patient, now, r.randint(70, 90), r.randint(115, 135),
+                       r.randint(94, 99), round(r.uniform(97.5, 99.5), 1))
+
+    def read_batch(self, max_items=256, timeout=0.1):
+        if self._closed:
+            return None
+        if self.rate_hz is None:
+            now = time.time()
+            return [self._reading(self.ids[i % self.patients], now) for i in range(max_items)]
+
+        # Sleep until the next tick is due (but not longer than timeout)
+        wait = self._next - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if self._next > time.monotonic():
+                return []
+        self._next += 1.0 / self.rate_hz
+        now = time.time()
+        return [self._reading(p, now) for p in self.ids[:max_items]]
+
+    def close(self):
+        self._closed = True
+
+
+class LineProtocolSource(VitalsSource):
+    """
+    Stand-in for a bedside device gateway: newline-delimited records (see
+    parse_line) over a TCP connection or an already connected socket.
+    """
+
+    def __init__(self, sock=None, host=None, port=None):
+        self._sock = sock if sock is not None else socket.create_connection((host, port))
+        self._buffer = b""
+        self._eof = False
+        self.malformed = 0
+
+    def read_batch(self, max_items=256, timeout=0.1):
+        if self._eof:
+            return None
+        try:
+            self._sock.settimeout(timeout)
+            data = self._sock.recv(65536)
+        except socket.timeout:
+            return []
+        except OSError:
+            # Includes the socket being closed under us by stop(): treat as EOF
+            data = b""
+        if not data:
+            self._eof = True
+            data = b"\n"       # flush a final unterminated record
+        # Only complete lines are parsed; a partial tail waits for the next recv
+        complete, _, self._buffer = (self._buffer + data).rpartition(b"\n")
+        batch = []
+        for line in complete.split(b"\n"):
+            reading = parse_line(line)
+            if reading is not None:
+                batch.append(reading)
+            elif line.strip():
+                self.malformed += 1
+        return batch
+
+    def close(self):
+        self._eof = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class IngestPipeline:
+    """
+    Runs a source on a background thread and buffers its readings in a
+    bounded queue until the UI calls drain().
+    """
+
+    def __init__(self, source, max_pending=4096, policy=DROP_OLDEST, batch_size=256, sinks=()):
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError(f"unknown policy {policy!r}")
+        self.source = source
+        self.max_pending = max_pending
+        self.policy = policy
+        self.batch_size = batch_size
+        # Called on the reader thread with every batch (e.g. a vitals.store.BatchWriter)
+        self.sinks = list(sinks)
+        self._pending = deque(maxlen=max_pending)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.received = 0
+        self.dropped = 0
+        self.sink_errors = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vitals-ingest", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.source.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.source.read_batch(self.batch_size)
+            if batch is None:
+                break
+            if batch:
+                for sink in self.sinks:
+                    try:
+                        sink(batch)
+                    except Exception:
+                        self.sink_errors += 1
+                        logger.exception("vitals ingest: sink %r failed on a batch of %d", sink, len(batch))
+                self.offer(batch)
+
+    def offer(self, batch):
+        with self._lock:
+            self.received += len(batch)
+            if self.policy == COALESCE:
+                latest = self._latest
+                for reading in batch:
+                    if reading.patient not in latest and len(latest) >= self.max_pending:
+                        self.dropped += 1
+                        continue
+                    if reading.patient in latest:
+                        self.dropped += 1
+                    latest[reading.patient] = reading
+            else:
+                overflow = len(self._pending) + len(batch) - self.max_pending
+                if overflow > 0:
+                    self.dropped += overflow
+                self._pending.extend(batch)   # deque(maxlen) discards the oldest
+
+    def drain(self):
+        """
+        Take everything buffered so far (oldest first). Call from the UI thread.
+        """
+        with self._lock:
+            if self.policy == COALESCE:
+                readings = list(self._latest.values())
+                self._latest = {}
+            else:
+                readings = list(self._pending)
+                self._pending.clear()
+        return readings
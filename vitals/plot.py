@@ -0,0 +1,58 @@
+import numpy as np
+from kivy_garden.graph import MeshLinePlot
+
+from services.profiling import profiled
+from vitals.decimate import minmax
+
+
+class RingLinePlot(MeshLinePlot):
+    """
+    MeshLinePlot that reads its y values straight from a RingBuffer instead
+    of a list of (x, y) tuples. Sample i is drawn at x = i, so call
+    `ask_draw()` after appending to the buffer to redraw. Linear axes only.
+
+    Windows wider than the plot are min/max decimated to the pixel width, so
+    a day of 1 Hz samples costs about the same to draw as a few hundred.
+
+    The mesh reads its vertices and indices from float32 / uint16 arrays
+    owned by the plot; a redraw overwrites the x, y columns in place and
+    hands the same buffer back, so no per-point Python floats are made and
+    the index list only changes when the point count does.
+    """
+
+    def __init__(self, buffer, **kwargs):
+        self.buffer = buffer
+        self._vertices = np.zeros(0, dtype=np.float32)
+        self._indices = np.zeros(0, dtype=np.uint16)
+        self._count = 0
+        super().__init__(**kwargs)
+
+    def _reserve(self, count):
+        """Grow the vertex/index arrays (never shrinks) and point the mesh at `count` of them."""
+        if count > len(self._indices):
+            capacity = max(count, 2 * len(self._indices), 64)
+            self._vertices = np.zeros(4 * capacity, dtype=np.float32)
+            self._indices = np.arange(capacity, dtype=np.uint16)
+            self._count = -1
+        if count != self._count:
+            self._mesh.indices = self._indices[:count]
+            self._count = count
+        return self._vertices[:4 * count]
+
+    @profiled("plot.mesh")
+    def plot_mesh(self):
+        params = self.params
+        x0, y0, x1, y1 = params['size']
+        values = np.frombuffer(self.buffer.view(), dtype=np.float64)
+        xs, ys = minmax(values, max(1, int(x1 - x0)))
+
+        vert = self._reserve(len(ys))
+        if len(ys):
+            xmin, xmax = params['xmin'], params['xmax']
+            ymin, ymax = params['ymin'], params['ymax']
+            ratiox = (x1 - x0) / float(xmax - xmin)
+            ratioy = (y1 - y0) / float(ymax - ymin)
+            # x, y per point (u, v stay 0)
+            vert[0::4] = (xs - xmin) * ratiox + x0
+            vert[1::4] = (ys - ymin) * ratioy + y0
+        self._mesh.vertices = vert
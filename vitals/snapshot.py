@@ -0,0 +1,179 @@
+"""
+Ward snapshot: the patient list and each patient's recent vitals in one
+file of fixed-width columns, for opening a dashboard without a database
+round-trip.
+
+    header   = magic b"WSNP", version u16, flags u16 (0), patients u32,
+               window u32, written f64 (UNIX time)          (padded to 64 bytes)
+    columns  = id u4, name S48, room S8, status S12, count u2
+               one value per patient, rows sorted by id
+               hr, bp, spo2, temp f4
+               `window` values per patient, oldest first and right-aligned:
+               only the last count[i] of row i are real
+
+All little-endian; every column starts on a 64-byte boundary. WardSnapshot
+maps the file with numpy.memmap and hands out views of it, so opening
+costs the same for ten patients or ten thousand and only the pages a
+dashboard reads are ever loaded. Text is UTF-8, cut to the column width.
+
+write_snapshot() writes a temporary file and renames it over the old one,
+so a reader sees either the previous snapshot or the new one, never half
+of each. A reader keeps the file it opened for as long as it holds views
+of it (on Windows the rename fails until then; drop the snapshot once the
+dashboard has what it needs).
+"""
+import os
+import struct
+import time
+
+import numpy as np
+
+from vitals.alerts import METRICS
+
+SNAPSHOT_FILE = "ward_snapshot.bin"
+MAGIC = b"WSNP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIId")
+ALIGN = 64
+#! (column, dtype) of the per-patient columns, in file order
+FIELDS = (("id", "<u4"), ("name", "S48"), ("room", "S8"), ("status", "S12"), ("count", "<u2"))
+#! Upper bound on patients, so a corrupt header can't map something absurd
+MAX_PATIENTS = 1 << 22
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _layout(patients, window):
+    """[(column, dtype, shape, offset)] and the file size."""
+    columns, offset = [], ALIGN
+    for name, dtype in FIELDS + tuple((metric, "<f4") for metric in METRICS):
+        dtype = np.dtype(dtype)
+        shape = (patients,) if name not in METRICS else (patients, window)
+        columns.append((name, dtype, shape, offset))
+        offset += -(-dtype.itemsize * int(np.prod(shape)) // ALIGN) * ALIGN
+    return columns, offset
+
+
+def _text(values, width):
+    return np.array([str(v).encode("utf-8")[:width] for v in values], dtype=f"S{width}")
+
+
+def write_snapshot(path, patients, values=None, count=None, window=None, written=None):
+    """
+    Write a snapshot of `patients` (dicts with id, name, room, status, as
+    PatientListModel holds them). values / count are the patients' recent
+    vitals as AlertEngine.windows() returns them: (metrics, patients,
+    samples) in METRICS order, rows matching `patients`. Without them the
+    vitals columns are empty, `window` samples wide.
+    """
+    patients = list(patients)
+    n = len(patients)
+    if values is None:
+        values = np.zeros((len(METRICS), n, window or 1), dtype=np.float32)
+        count = np.zeros(n, dtype=np.int64)
+    values = np.asarray(values)
+    if values.shape[:2] != (len(METRICS), n):
+        raise SnapshotError(f"vitals for {values.shape[:2]} metrics x patients, want {(len(METRICS), n)}")
+    window = values.shape[2]
+    ids = np.array([p["id"] for p in patients], dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    data = {
+        "id": ids[order],
+        "name": _text([patients[i].get("name", "") for i in order], 48),
+        "room": _text([patients[i].get("room", "") for i in order], 8),
+        "status": _text([patients[i].get("status", "") for i in order], 12),
+        "count": np.minimum(np.asarray(count)[order], window),
+    }
+    for m, metric in enumerate(METRICS):
+        data[metric] = values[m][order]
+
+    columns, size = _layout(n, window)
+    written = time.time() if written is None else written
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, n, window, written).ljust(ALIGN, b"\0"))
+        for name, dtype, shape, offset in columns:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(np.ascontiguousarray(data[name], dtype=dtype).reshape(shape).tobytes())
+        f.write(b"\0" * (size - f.tell()))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return size
+
+
+class WardSnapshot:
+    """
+    A snapshot file mapped read-only. Columns are attributes named as in
+    the module docstring (ids, names, rooms, statuses, count) plus
+    vitals[metric], all views of the file. Raises SnapshotError for a file
+    that isn't a complete snapshot of this version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{path}: too short for a snapshot")
+        magic, version, _flags, patients, window, written = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a ward snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{path}: unsupported snapshot version {version}")
+        if patients > MAX_PATIENTS or not window:
+            raise SnapshotError(f"{path}: bad header ({patients} patients, window {window})")
+        columns, size = _layout(patients, window)
+        if len(self._map) < size:
+            raise SnapshotError(f"{path}: truncated ({len(self._map)} of {size} bytes)")
+        self.window = window
+        self.written = written
+        arrays = {name: np.ndarray(shape, dtype, buffer=self._map, offset=offset)
+                  for name, dtype, shape, offset in columns}
+        self.ids = arrays["id"]
+        self.names = arrays["name"]
+        self.rooms = arrays["room"]
+        self.statuses = arrays["status"]
+        self.count = arrays["count"]
+        self.vitals = {metric: arrays[metric] for metric in METRICS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index(self, patient_id):
+        """Row of the patient, or -1 if the snapshot doesn't have them."""
+        i = int(np.searchsorted(self.ids, patient_id))
+        return i if i < len(self.ids) and self.ids[i] == patient_id else -1
+
+    def row(self, i):
+        """The patient dict at row i (as rows() makes them)."""
+        return {"id": int(self.ids[i]), "name": self.names[i].decode("utf-8", "ignore"),
+                "room": self.rooms[i].decode("utf-8", "ignore"),
+                "status": self.statuses[i].decode("utf-8", "ignore")}
+
+    def rows(self):
+        """Every patient as a dict for PatientListModel, in id order."""
+        columns = zip(self.ids.tolist(), self.names.tolist(), self.rooms.tolist(), self.statuses.tolist())
+        return [{"id": pid, "name": name.decode("utf-8", "ignore"), "room": room.decode("utf-8", "ignore"),
+                 "status": status.decode("utf-8", "ignore")} for pid, name, room, status in columns]
+
+    def recent(self, patient_id):
+        """{metric: float32 view of the patient's real samples, oldest first}, or None."""
+        i = self.index(patient_id)
+        if i < 0:
+            return None
+        start = self.window - int(self.count[i])
+        return {metric: column[i, start:] for metric, column in self.vitals.items()}
+
+    def windows(self):
+        """(values, count) for AlertEngine.restore(), rows in id order."""
+        return np.stack([self.vitals[metric] for metric in METRICS]), self.count
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """The WardSnapshot at path, or None when there is none (or it can't be used)."""
+    try:
+        return WardSnapshot(path)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,319 @@
+"""
+Persistent vitals history in vitals.db.
+
+Layout:
+  vitals_raw_YYYYMMDD  one WITHOUT ROWID table per UTC day, keyed (patient, ts),
+                       so a patient's range is contiguous on disk and retention
+                       is a DROP TABLE instead of a big DELETE
+  vitals_minute        per-patient minute roll-ups (count, avg/min/max per metric)
+  vitals_hour          per-patient hour roll-ups built from the minute table
+  rollup_state         how far each roll-up has been computed
+
+history() answers a range from the coarsest table that still gives enough
+points, so graphs over hours or days never touch raw rows.
+"""
+import logging
+import threading
+import queue
+import time
+from datetime import datetime, timezone, timedelta
+
+from services.db import ConnectionPool
+from services.schema import migrate
+
+VITALS_DB_FILE = "vitals.db"
+METRICS = ("hr", "bp", "spo2", "temp")
+
+logger = logging.getLogger(__name__)
+
+RAW_RETENTION_DAYS = 7
+MINUTE_RETENTION_DAYS = 90
+
+
+def _rollup_table(name):
+    columns = ",\n            ".join(f"{m}_avg REAL, {m}_min REAL, {m}_max REAL" for m in METRICS)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            patient INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            {columns},
+            PRIMARY KEY (patient, bucket)
+        ) WITHOUT ROWID
+    """
+
+
+MIGRATIONS = [
+    (1, "roll-up tables", (
+        _rollup_table("vitals_minute"),
+        _rollup_table("vitals_hour"),
+        "CREATE INDEX IF NOT EXISTS idx_vitals_minute_bucket ON vitals_minute(bucket)",
+        "CREATE TABLE IF NOT EXISTS rollup_state (name TEXT PRIMARY KEY, upto INTEGER NOT NULL)",
+    )),
+]
+
+CREATE_RAW = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        patient INTEGER NOT NULL,
+        ts REAL NOT NULL,
+        hr REAL, bp REAL, spo2 REAL, temp REAL,
+        PRIMARY KEY (patient, ts)
+    ) WITHOUT ROWID
+"""
+INSERT_RAW = "INSERT OR REPLACE INTO {table} (patient, ts, hr, bp, spo2, temp) VALUES (?, ?, ?, ?, ?, ?)"
+SELECT_RAW = "SELECT ts, hr, bp, spo2, temp FROM {table} WHERE patient=? AND ts>=? AND ts<? ORDER BY ts"
+SELECT_ROLLUP = ("SELECT bucket, " + ", ".join(f"{m}_avg" for m in METRICS) +
+                 " FROM {table} WHERE patient=? AND bucket>=? AND bucket<? ORDER BY bucket")
+ROLLUP_MINUTE = (
+    "INSERT OR REPLACE INTO vitals_minute SELECT patient, CAST(ts / 60 AS INTEGER) * 60 AS b, count(*), "
+    + ", ".join(f"avg({m}), min({m}), max({m})" for m in METRICS)
+    + " FROM {table} WHERE ts>=? AND ts<? GROUP BY patient, b"
+)
+#! Move a roll-up watermark back (never forward) to a bucket that got new rows
+REWIND_ROLLUP = "UPDATE rollup_state SET upto=? WHERE name=? AND upto>?"
+ROLLUP_HOUR = (
+    "INSERT OR REPLACE INTO vitals_hour SELECT patient, (bucket / 3600) * 3600 AS b, sum(n), "
+    + ", ".join(f"sum({m}_avg * n) / sum(n), min({m}_min), max({m}_max)" for m in METRICS)
+    + " FROM vitals_minute WHERE bucket>=? AND bucket<? GROUP BY patient, b"
+)
+
+
+def partition_name(ts):
+    return "vitals_raw_" + datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+
+
+def _day_start(ts):
+    return int(ts // 86400) * 86400
+
+
+class VitalsStore:
+    """
+    Batched writes, roll-ups, retention and range reads for vitals history.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or ConnectionPool(VITALS_DB_FILE)
+        self._partitions = set()
+        with self.pool.connection() as conn:
+            migrate(conn, MIGRATIONS)
+            self._partitions.update(self._existing_partitions(conn))
+
+    @staticmethod
+    def _existing_partitions(conn):
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'vitals_raw_%'")
+        return [name for (name,) in rows]
+
+    def _partition(self, conn, ts, created):
+        table = partition_name(ts)
+        if table not in self._partitions:
+            conn.execute(CREATE_RAW.format(table=table))
+            # Only known to exist once the transaction commits
+            created.add(table)
+        return table
+
+    def _partitions_between(self, t0, t1):
+        day = _day_start(t0)
+        while day < t1:
+            table = partition_name(day)
+            if table in self._partitions:
+                yield table
+            day += 86400
+
+    # --- writes ---
+
+    def insert_many(self, readings):
+        """
+        Store readings ((patient, ts, hr, bp, spo2, temp) tuples) in one transaction.
+        """
+        by_day = {}
+        for reading in readings:
+            by_day.setdefault(_day_start(reading[1]), []).append(reading)
+        created = set()
+        with self.pool.transaction() as conn:
+            for day, rows in by_day.items():
+                table = self._partition(conn, day, created)
+                conn.executemany(INSERT_RAW.format(table=table), rows)
+            if readings:
+                # Rows for minutes that were already rolled up (late devices, or
+                # readings that waited in BatchWriter's queue past a roll-up):
+                # move the watermarks back so the next run recomputes them
+                earliest = min(reading[1] for reading in readings)
+                minute, hour = int(earliest // 60) * 60, int(earliest // 3600) * 3600
+                conn.execute(REWIND_ROLLUP, (minute, "minute", minute))
+                conn.execute(REWIND_ROLLUP, (hour, "hour", hour))
+        self._partitions.update(created)
+        return len(readings)
+
+    # --- background jobs ---
+
+    def _watermark(self, conn, name, default):
+        row = conn.execute("SELECT upto FROM rollup_state WHERE name=?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def run_rollups(self, now=None):
+        """
+        Aggregate every complete minute and hour since the last run, and
+        recompute earlier ones that have received rows since (see
+        insert_many()). Returns (minutes_upto, hours_upto).
+        """
+        now = time.time() if now is None else now
+        minute_end = int(now // 60) * 60
+        hour_end = int(now // 3600) * 3600
+        oldest = min(self._partitions, default=None)
+        if oldest is None:
+            return minute_end, hour_end
+        first = int(datetime.strptime(oldest[-8:], "%Y%m%d").replace(tzinfo=timezone.utc).timestamp())
+        with self.pool.transaction() as conn:
+            start = self._watermark(conn, "minute", first)
+            for table in self._partitions_between(start, minute_end):
+                conn.execute(ROLLUP_MINUTE.format(table=table), (start, minute_end))
+            conn.execute("INSERT OR REPLACE INTO rollup_state VALUES ('minute', ?)", (max(start, minute_end),))
+
+            start = self._watermark(conn, "hour", first - first % 3600)
+            if hour_end > start:
+                conn.execute(ROLLUP_HOUR, (start, hour_end))
+                conn.execute("INSERT OR REPLACE INTO rollup_state VALUES ('hour', ?)", (hour_end,))
+        return minute_end, hour_end
+
+    def apply_retention(self, now=None, raw_days=RAW_RETENTION_DAYS, minute_days=MINUTE_RETENTION_DAYS):
+        """
+        Drop raw day partitions and minute roll-ups past their retention.
+        Hour roll-ups are kept. Run after run_rollups() so nothing is lost.
+        """
+        now = time.time() if now is None else now
+        raw_cutoff = partition_name(now - timedelta(days=raw_days).total_seconds())
+        with self.pool.transaction() as conn:
+            for table in sorted(self._partitions):
+                if table < raw_cutoff:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                    self._partitions.discard(table)
+            conn.execute("DELETE FROM vitals_minute WHERE bucket < ?",
+                         (int(now - timedelta(days=minute_days).total_seconds()),))
+
+    # --- reads ---
+
+    def history(self, patient, t0, t1, max_points=500, resolution=None):
+        """
+        Rows of (ts, hr, bp, spo2, temp) for [t0, t1), from raw samples, minute
+        or hour roll-ups depending on how many points the range would need
+        (or as forced by resolution="raw" / "minute" / "hour").
+        Roll-ups are only as fresh as the last run_rollups().
+        """
+        if resolution is None:
+            span = t1 - t0
+            resolution = "hour" if span / 3600 >= max_points else "minute" if span / 60 >= max_points else "raw"
+        with self.pool.connection() as conn:
+            if resolution != "raw":
+                size = 3600 if resolution == "hour" else 60
+                # Include the bucket that t0 falls in
+                start = int(t0 // size) * size
+                return conn.execute(SELECT_ROLLUP.format(table="vitals_" + resolution),
+                                    (patient, start, t1)).fetchall()
+            rows = []
+            for table in self._partitions_between(t0, t1):
+                rows.extend(conn.execute(SELECT_RAW.format(table=table), (patient, t0, t1)))
+            return rows
+
+    def close(self):
+        self.pool.close()
+
+
+class BatchWriter:
+    """
+    Collects readings from any thread and writes them to a VitalsStore in
+    large transactions from its own thread, running roll-ups every
+    `rollup_interval` and retention every `retention_interval` seconds in
+    between. Pass `writer.offer` as an IngestPipeline sink.
+
+    A failed write is logged and the batch retried every `interval` up to
+    `max_retries` times before it is counted as dropped; failed roll-ups
+    and retention are logged and run again at their next interval. The
+    thread keeps going either way.
+    """
+
+    def __init__(self, store, max_batch=5000, interval=1.0, max_pending=100_000,
+                 rollup_interval=60.0, retention_interval=3600.0, max_retries=5):
+        self.store = store
+        self.max_batch = max_batch
+        self.interval = interval
+        self.rollup_interval = rollup_interval
+        self.retention_interval = retention_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vitals-writer", daemon=True)
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def offer(self, readings):
+        for reading in readings:
+            try:
+                self._queue.put_nowait(reading)
+            except queue.Full:
+                self.dropped += 1
+
+    def _take_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch, attempt):
+        """Write batch; True when it is done with (written, or dropped after max_retries)."""
+        try:
+            self.written += self.store.insert_many(batch)
+            return True
+        except Exception:
+            self.errors += 1
+            if attempt >= self.max_retries:
+                logger.exception("vitals writer: dropping %d readings after %d failed writes", len(batch), attempt)
+                self.dropped += len(batch)
+                return True
+            logger.exception("vitals writer: writing %d readings failed, retrying", len(batch))
+            return False
+
+    def _maintain(self, task, label):
+        try:
+            task()
+        except Exception:
+            self.errors += 1
+            logger.exception("vitals writer: %s failed", label)
+
+    def _run(self):
+        next_rollup = time.monotonic() + self.rollup_interval
+        next_retention = time.monotonic() + self.retention_interval
+        batch, attempt = [], 0
+        while not self._stop.is_set() or not self._queue.empty() or batch:
+            if batch:
+                # Retrying a failed batch: give the database a moment first
+                self._stop.wait(self.interval)
+            else:
+                batch, attempt = self._take_batch(), 0
+            if batch:
+                attempt += 1
+                if self._write(batch, attempt):
+                    batch = []
+            now = time.monotonic()
+            if now >= next_rollup:
+                self._maintain(self.store.run_rollups, "roll-up")
+                next_rollup = now + self.rollup_interval
+            if now >= next_retention:
+                self._maintain(self.store.apply_retention, "retention")
+                next_retention = now + self.retention_interval
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,197 @@
+"""
+Binary vitals wire format: versioned frames of fixed-width records.
+
+    frame   = header + count * record
+    header  = magic b"VITL", version u8, flags u8 (0), record size u16,
+              count u32, sequence u32, CRC-32 of the records u32,
+              CRC-32 of the header's first 20 bytes u32          (24 bytes)
+    record  = patient u32, timestamp f64, hr f32, bp f32, spo2 f32, temp f32
+                                                                   (28 bytes)
+
+All little-endian, no padding. A frame decodes to a NumPy structured
+array that is a view of the received bytes: no per-reading Python
+objects are created, and consumers that take columns (AlertEngine,
+WardAggregator) can use records["hr"] etc. directly. to_readings() turns
+a frame into vitals.ingest.Reading tuples for IngestPipeline.
+
+FrameEncoder writes frames for the device simulator (or a gateway);
+FrameDecoder reassembles them from arbitrary stream chunks. The header
+checksum is verified before its count is used, so a damaged header can't
+make the decoder skip or wait for bytes that aren't its frame; after any
+bad frame (checksum, unknown version, garbage) it resynchronises on the
+next magic.
+"""
+import socket
+import struct
+import zlib
+
+import numpy as np
+
+from vitals.ingest import Reading, VitalsSource
+
+MAGIC = b"VITL"
+VERSION = 2
+HEADER = struct.Struct("<4sBBHIIII")
+#! The header checksum covers everything before it
+HEADER_CHECKED = HEADER.size - 4
+RECORD = np.dtype([("patient", "<u4"), ("timestamp", "<f8"),
+                   ("hr", "<f4"), ("bp", "<f4"), ("spo2", "<f4"), ("temp", "<f4")])
+#! Upper bound on records per frame, so a corrupt count can't ask for gigabytes
+MAX_RECORDS = 1 << 20
+
+
+class FrameError(ValueError):
+    pass
+
+
+def encode_frame(readings, sequence=0):
+    """
+    One frame from Reading tuples (or anything np.array turns into RECORD
+    rows, including a RECORD array).
+    """
+    records = readings if isinstance(readings, np.ndarray) and readings.dtype == RECORD \
+        else np.array(readings, dtype=RECORD)
+    if len(records) > MAX_RECORDS:
+        raise FrameError(f"{len(records)} records is more than a frame holds ({MAX_RECORDS})")
+    payload = records.tobytes()
+    header = HEADER.pack(MAGIC, VERSION, 0, RECORD.itemsize, len(records),
+                         sequence & 0xFFFFFFFF, zlib.crc32(payload), 0)[:HEADER_CHECKED]
+    return header + struct.pack("<I", zlib.crc32(header)) + payload
+
+
+def _parse(view, offset):
+    """
+    (records, end) for the frame at offset; None if the buffer stops before
+    the frame does. Raises FrameError for a frame that can't be used.
+    """
+    if len(view) - offset < HEADER.size:
+        return None
+    magic, version, _flags, size, count, _sequence, crc, header_crc = HEADER.unpack_from(view, offset)
+    if magic != MAGIC:
+        raise FrameError(f"bad magic {bytes(magic)!r} at offset {offset}")
+    if version != VERSION:
+        raise FrameError(f"unsupported frame version {version} at offset {offset}")
+    if zlib.crc32(view[offset:offset + HEADER_CHECKED]) != header_crc:
+        raise FrameError(f"header checksum mismatch at offset {offset}")
+    if size != RECORD.itemsize or count > MAX_RECORDS:
+        raise FrameError(f"bad frame header at offset {offset} ({count} records of {size} bytes)")
+    end = offset + HEADER.size + size * count
+    if len(view) < end:
+        return None
+    payload = view[offset + HEADER.size:end]
+    if zlib.crc32(payload) != crc:
+        raise FrameError(f"checksum mismatch in frame at offset {offset}")
+    return np.frombuffer(payload, dtype=RECORD), end
+
+
+def decode_frame(buffer, offset=0):
+    """
+    Decode the frame starting at offset in a bytes-like object. Returns
+    (records, end offset); records is a read-only view of buffer.
+    """
+    parsed = _parse(memoryview(buffer), offset)
+    if parsed is None:
+        raise FrameError(f"truncated frame at offset {offset}")
+    return parsed
+
+
+def to_readings(records):
+    """Reading tuples for a frame (one tolist() call, not one per field)."""
+    return list(map(Reading._make, records.tolist()))
+
+
+class FrameEncoder:
+    """Numbers frames consecutively so a receiver can spot gaps."""
+
+    def __init__(self):
+        self.sequence = 0
+
+    def encode(self, readings):
+        frame = encode_frame(readings, self.sequence)
+        self.sequence += 1
+        return frame
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for a byte stream. feed() returns the record arrays
+    of every frame completed by the new data; unusable frames are counted
+    in `malformed` and skipped.
+    """
+
+    def __init__(self):
+        self._tail = b""
+        self.frames = 0
+        self.malformed = 0
+
+    def feed(self, data):
+        # Only the unfinished tail is copied; decoded frames are views of `buffer`
+        buffer = self._tail + bytes(data) if self._tail else bytes(data)
+        view = memoryview(buffer)
+        frames, offset = [], 0
+        while True:
+            try:
+                parsed = _parse(view, offset)
+            except FrameError:
+                self.malformed += 1
+                # Nothing in a bad frame is trusted, its length included:
+                # look for the next frame start
+                found = buffer.find(MAGIC, offset + 1)
+                offset = found if found >= 0 else max(offset + 1, len(buffer) - len(MAGIC) + 1)
+                continue
+            if parsed is None:
+                break
+            records, offset = parsed
+            frames.append(records)
+            self.frames += 1
+        self._tail = buffer[offset:]
+        return frames
+
+
+class BinaryFrameSource(VitalsSource):
+    """
+    Frames (see module docstring) over a TCP connection or an already
+    connected socket. read_records() hands out the structured arrays;
+    read_batch() converts them to Readings for IngestPipeline.
+    """
+
+    def __init__(self, sock=None, host=None, port=None):
+        self._sock = sock if sock is not None else socket.create_connection((host, port))
+        self.decoder = FrameDecoder()
+        self._eof = False
+
+    @property
+    def malformed(self):
+        return self.decoder.malformed
+
+    def read_records(self, timeout=0.1):
+        """Record arrays of the frames received within timeout; None at end of stream."""
+        if self._eof:
+            return None
+        try:
+            self._sock.settimeout(timeout)
+            data = self._sock.recv(1 << 18)
+        except socket.timeout:
+            return []
+        except OSError:
+            # Includes the socket being closed under us by stop(): treat as EOF
+            data = b""
+        if not data:
+            self._eof = True
+            return []
+        return self.decoder.feed(data)
+
+    def read_batch(self, max_items=256, timeout=0.1):
+        # Frames are never split, so a batch can be larger than max_items
+        frames = self.read_records(timeout)
+        if frames is None:
+            return None
+        return [reading for records in frames for reading in to_readings(records)]
+
+    def close(self):
+        self._eof = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()